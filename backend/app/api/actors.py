@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+from app.api.connections import batch
+from app.log import log_event
+
+logger = logging.getLogger(__name__)
+
+# Recent commands per game kept for the latency percentiles and throughput in stats()
+ACTOR_LATENCY_SAMPLES = int(os.getenv("ACTOR_LATENCY_SAMPLES", "256"))
+
+Command = Callable[..., Awaitable[Any]]
+
+class GameActor:
+    """
+    The single writer of one game's state
+
+    Websocket messages, bot moves and REST calls that change a game do not
+    run the handler themselves: they put it in the game's mailbox, and one
+    task applies the commands in arrival order, each to completion (awaits
+    included) before the next starts. Two players' moves can therefore
+    never interleave mid-update, without any locks. The task exits when
+    the mailbox is empty and the next command starts a new one, so idle
+    games cost no task.
+
+    Each command runs inside a batch, so everything it causes reaches each
+    client as one frame.
+    """
+
+    __slots__ = ("game_id", "mailbox", "task", "processed", "failed", "max_depth", "samples")
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.mailbox: deque = deque()  # (queued at, command, args, future or None)
+        self.task: Optional[asyncio.Task] = None
+        self.processed = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.samples: deque = deque(maxlen=ACTOR_LATENCY_SAMPLES)  # (finished at, seconds since queued)
+
+    def tell(self, command: Command, *args):
+        """Queue a command without waiting for it; failures are logged"""
+        self._post(command, args, None)
+
+    async def ask(self, command: Command, *args) -> Any:
+        """Queue a command and wait for its result (or exception)"""
+        future = asyncio.get_running_loop().create_future()
+        self._post(command, args, future)
+        return await future
+
+    def _post(self, command: Command, args: tuple, future: Optional[asyncio.Future]):
+        self.mailbox.append((time.monotonic(), command, args, future))
+        if len(self.mailbox) > self.max_depth:
+            self.max_depth = len(self.mailbox)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        mailbox = self.mailbox
+        while mailbox:
+            queued_at, command, args, future = mailbox.popleft()
+            try:
+                with batch():
+                    result = await command(*args)
+            except Exception as e:
+                self.failed += 1
+                if future is None:
+                    log_event(logger, logging.ERROR, "actor.error", exc_info=True, game_id=self.game_id,
+                              command=command.__name__)
+                elif not future.done():
+                    future.set_exception(e)
+            else:
+                if future is not None and not future.done():
+                    future.set_result(result)
+            finished = time.monotonic()
+            self.processed += 1
+            self.samples.append((finished, finished - queued_at))
+
+    def stats(self) -> dict:
+        """Commands applied, mailbox depth, and latency (queued to done) and throughput over recent commands"""
+        stats = {
+            "game_id": self.game_id,
+            "processed": self.processed,
+            "failed": self.failed,
+            "queued": len(self.mailbox),
+            "max_queued": self.max_depth,
+        }
+        if self.samples:
+            latencies = sorted(latency for _, latency in self.samples)
+            last = len(latencies) - 1
+            for name, share in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                stats[f"latency_{name}_ms"] = round(latencies[round(last * share)] * 1000, 3)
+            first_finished, first_latency = self.samples[0]
+            span = self.samples[-1][0] - (first_finished - first_latency)
+            stats["commands_per_second"] = round(len(self.samples) / span, 1) if span > 0 else None
+        return stats
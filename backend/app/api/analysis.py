@@ -0,0 +1,185 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import json
+import logging
+import os
+from app.database.database import get_db, SessionLocal
+from app.database.models import User, RoundAnalysis, RoundAnalysisPlayer
+from app.auth.security import get_current_active_user
+from app.game_logic.analysis import analyze_round, expand_analysis
+from app.game_logic.shared_table import SharedTranspositionTable
+from app.log import log_event
+
+router = APIRouter(prefix="/analysis", tags=["analysis"])
+logger = logging.getLogger(__name__)
+
+# Worker processes analysing finished rounds
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+# Rounds waiting for a worker; further rounds are dropped rather than queued
+ANALYSIS_QUEUE_SIZE = int(os.getenv("ANALYSIS_QUEUE_SIZE", "64"))
+# Slots in a transposition table shared by all workers (power of two, 0 = one
+# private table per analysed round)
+ANALYSIS_TABLE_SLOTS = int(os.getenv("ANALYSIS_TABLE_SLOTS", "0"))
+
+# Table used by analyze_in_worker inside each worker process
+_worker_table = None
+
+def _init_worker(table=None):
+    """Run analysis workers at low CPU priority so live games come first"""
+    global _worker_table
+    _worker_table = table
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+def analyze_in_worker(record: dict) -> dict:
+    """Analyse a round with the worker's shared table, if there is one"""
+    return analyze_round(record, table=_worker_table)
+
+def save_analysis(record: dict, analysis: dict):
+    """Store an analysis blob and link it to the human players of the round"""
+    db = SessionLocal()
+    try:
+        row = RoundAnalysis(
+            game_id=record["game_id"],
+            round_number=record["round_number"],
+            contract_type=record["contract_type"],
+            analysis=json.dumps(analysis, separators=(",", ":")),
+            created_at=datetime.utcnow()
+        )
+        db.add(row)
+        db.flush()
+        for player_index, user_id in enumerate(record["user_ids"]):
+            if user_id is None:
+                continue
+            db.add(RoundAnalysisPlayer(analysis_id=row.id, user_id=user_id, player_index=player_index))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+class AnalysisPipeline:
+    """
+    Background analysis of finished rounds
+
+    Rounds go into a bounded queue that a few consumer tasks drain into a
+    process pool. Submitting never waits: when the queue is full the round is
+    dropped and counted, so analysis can never hold up a game handler.
+    """
+
+    def __init__(
+        self,
+        workers: int = ANALYSIS_WORKERS,
+        queue_size: int = ANALYSIS_QUEUE_SIZE,
+        table_slots: int = ANALYSIS_TABLE_SLOTS,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.table_slots = table_slots
+        self.queue: Optional[asyncio.Queue] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.table: Optional[SharedTranspositionTable] = None
+        self.tasks: List[asyncio.Task] = []
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self, executor=None):
+        """Start the consumer tasks (call from the running event loop)"""
+        if self.tasks:
+            return
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        if executor is None:
+            if self.table_slots:
+                self.table = SharedTranspositionTable(self.table_slots)
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.table,)
+            )
+        self.executor = executor
+        self.tasks = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the consumers and shut the worker processes down"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+        self.queue = None
+
+    def submit(self, record: dict) -> bool:
+        """Queue a round for analysis; returns False if it was dropped"""
+        if self.queue is None:
+            self.dropped += 1
+            return False
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            record = await self.queue.get()
+            try:
+                analysis = await loop.run_in_executor(self.executor, analyze_in_worker, record)
+                await loop.run_in_executor(None, save_analysis, record, analysis)
+                self.completed += 1
+            except Exception:
+                self.failed += 1
+                log_event(logger, logging.ERROR, "analysis.failed", exc_info=True, game_id=record.get("game_id"))
+            finally:
+                self.queue.task_done()
+
+pipeline = AnalysisPipeline()
+
+@router.get("/recent")
+async def get_recent_analyses(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+    limit: int = 10
+):
+    """Get the analysis of the current user's most recent rounds"""
+    rows = db.query(RoundAnalysis, RoundAnalysisPlayer.player_index).join(
+        RoundAnalysisPlayer, RoundAnalysisPlayer.analysis_id == RoundAnalysis.id
+    ).filter(
+        RoundAnalysisPlayer.user_id == current_user.id
+    ).order_by(RoundAnalysis.created_at.desc()).limit(min(limit, 50)).all()
+
+    return [
+        {
+            "gameId": row.game_id,
+            "roundNumber": row.round_number,
+            "contractType": row.contract_type,
+            "yourPlayerIndex": player_index,
+            "date": row.created_at.isoformat() if row.created_at else "",
+            "analysis": expand_analysis(json.loads(row.analysis)),
+        }
+        for row, player_index in rows
+    ]
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from app.database.database import get_db
 from app.database.models import User, PlayerStats
+from app.models.room import BOT_NAME_PREFIX, is_bot_name
 from app.auth.security import (
     verify_password,
     get_password_hash,
@@ -36,6 +37,13 @@ class Token(BaseModel):
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user and return access token (auto-login)"""
+    # Bots sit at tables under these names
+    if is_bot_name(user_data.username):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Usernames starting with '{BOT_NAME_PREFIX} ' are reserved"
+        )
+    
     # Check if username exists
     db_user = db.query(User).filter(User.username == user_data.username).first()
     if db_user:
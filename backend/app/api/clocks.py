@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Set
+from app.log import log_event
+
+logger = logging.getLogger(__name__)
+
+# Seconds per timer wheel tick: how precisely clocks run out
+CLOCK_TICK = float(os.getenv("CLOCK_TICK", "0.25"))
+
+class Timer:
+    __slots__ = ("key", "expires", "callback", "slot")
+
+    def __init__(self, key: Hashable, expires: int, callback: Callable[[], None]):
+        self.key = key
+        self.expires = expires  # tick number
+        self.callback = callback
+        self.slot: Optional[Set["Timer"]] = None  # wheel slot holding the timer
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel
+
+    Time is counted in ticks. Level 0 has a slot per tick for the next
+    `slots` ticks, level 1 a slot per `slots` ticks, and so on: a timer sits
+    at the level of the highest base-`slots` digit in which its expiry
+    differs from the current tick, in the slot of that digit. Advancing one
+    tick fires the current level 0 slot, and whenever a lower level wraps
+    around the next slot of the level above is emptied into the levels
+    below. Arming, cancelling and each tick are O(1) however many timers
+    there are; each timer moves down at most once per level.
+    """
+
+    def __init__(self, tick: float, slots: int = 64, levels: int = 4, now: Optional[float] = None):
+        self.tick = tick
+        self.slots = slots
+        self.wheels: List[List[Set[Timer]]] = [[set() for _ in range(slots)] for _ in range(levels)]
+        self.origin = time.monotonic() if now is None else now
+        self.current = 0  # ticks since origin
+        self.timers: Dict[Hashable, Timer] = {}
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable[[], None], now: Optional[float] = None):
+        """Call callback once `delay` seconds from now, replacing the key's previous timer"""
+        self.cancel(key)
+        now = time.monotonic() if now is None else now
+        expires = max(math.ceil((now + delay - self.origin) / self.tick), self.current + 1)
+        if expires - self.current >= self.slots ** len(self.wheels):
+            raise ValueError(f"Delay of {delay}s is beyond the timer wheel")
+        timer = self.timers[key] = Timer(key, expires, callback)
+        self._place(timer)
+
+    def cancel(self, key: Hashable):
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            timer.slot.discard(timer)
+
+    def _place(self, timer: Timer):
+        expires, current, slots = timer.expires, self.current, self.slots
+        level = 0
+        while expires // slots != current // slots:
+            expires //= slots
+            current //= slots
+            level += 1
+        timer.slot = self.wheels[level][expires % slots]
+        timer.slot.add(timer)
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Run the wheel up to `now`, calling the callbacks of expired timers; returns how many fired"""
+        now = time.monotonic() if now is None else now
+        target = int((now - self.origin) / self.tick)
+        if not self.timers:
+            self.current = max(self.current, target)
+            return 0
+        fired = 0
+        while self.current < target:
+            self.current += 1
+            self._cascade()
+            due = self.wheels[0][self.current % self.slots]
+            if not due:
+                continue
+            timers = list(due)
+            due.clear()
+            for timer in timers:
+                del self.timers[timer.key]
+                fired += 1
+                try:
+                    timer.callback()
+                except Exception:
+                    log_event(logger, logging.ERROR, "clocks.error", exc_info=True, key=timer.key)
+        return fired
+
+    def _cascade(self):
+        """Empty the slots of the levels that wrapped around at this tick into the levels below"""
+        slots = self.slots
+        wrapped = []
+        ticks = self.current
+        for level in range(1, len(self.wheels)):
+            if ticks % slots:
+                break
+            ticks //= slots
+            wrapped.append((level, ticks % slots))
+        # Highest level first, so timers can fall through several levels in one tick
+        for level, index in reversed(wrapped):
+            slot = self.wheels[level][index]
+            timers = list(slot)
+            slot.clear()
+            for timer in timers:
+                self._place(timer)
+
+class Clocks:
+    """One timer wheel and the one task that drives it, shared by every game"""
+
+    def __init__(self, tick: float = CLOCK_TICK):
+        self.wheel = TimerWheel(tick)
+        self.task: Optional[asyncio.Task] = None
+        self.fired = 0
+        self.max_lag = 0.0
+
+    def arm(self, key: Hashable, delay: float, callback: Callable[[], None]):
+        self.wheel.schedule(key, delay, callback)
+
+    def cancel(self, key: Hashable):
+        self.wheel.cancel(key)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        tick = self.wheel.tick
+        while True:
+            slept = time.monotonic()
+            await asyncio.sleep(tick)
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - slept - tick)
+            self.fired += self.wheel.advance(now)
+
+    def stats(self) -> dict:
+        """Clocks running, clocks run out, and how late the driver woke up at worst"""
+        return {"armed": len(self.wheel.timers), "fired": self.fired, "max_lag_ms": round(self.max_lag * 1000, 3)}
+
+clocks = Clocks()
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import orjson
+from fastapi import WebSocket
+from app.api import wire
+from app.log import log_event
+
+logger = logging.getLogger(__name__)
+
+# Messages a connection may have waiting before it counts as a slow consumer
+OUTBOUND_QUEUE_LIMIT = int(os.getenv("OUTBOUND_QUEUE_LIMIT", "64"))
+# Seconds a single send may take before the client is considered dead
+SEND_TIMEOUT = float(os.getenv("SEND_TIMEOUT", "10"))
+
+# Message types where only the newest queued one matters
+COALESCED_TYPES = frozenset({"game_state", "spectator_state"})
+
+# {"type": "batch", "messages": [...]} up to the array's header
+_BINARY_BATCH_PREFIX = wire.map_header(2) + wire.pack("type") + wire.pack("batch") + wire.pack("messages")
+
+def encode(message: dict, binary: bool = False) -> Union[str, bytes]:
+    """Serialize a message to JSON text, or to a binary frame for wire-protocol clients"""
+    if binary:
+        return wire.pack(message)
+    return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+
+class _Batch:
+    __slots__ = ("open", "frames")
+
+    def __init__(self):
+        self.open = True
+        self.frames: Dict["Connection", List[Tuple[Optional[str], Union[str, bytes]]]] = {}
+
+# The batch collecting frames in the current context, if any (see batch())
+_current_batch: ContextVar[Optional[_Batch]] = ContextVar("current_batch", default=None)
+
+@contextmanager
+def batch():
+    """
+    Deliver everything sent inside the block as one frame per connection
+
+    Handlers wrap one inbound action in a batch, so the events it causes
+    (card played, trick complete, round complete...) reach each client as a
+    single {"type": "batch", "messages": [...]} frame, built by joining the
+    already encoded frames. A lone message is sent as it is. Nested batches
+    join the outer one.
+    """
+    outer = _current_batch.get()
+    if outer is not None and outer.open:
+        yield
+        return
+    current = _Batch()
+    token = _current_batch.set(current)
+    try:
+        yield
+    finally:
+        _current_batch.reset(token)
+        # Tasks started inside the block inherit it; from now on they send directly
+        current.open = False
+        for connection, frames in current.frames.items():
+            connection._send_batch(frames)
+
+def join_frames(frames: List[Union[str, bytes]]) -> Union[str, bytes]:
+    """One batch message holding the given encoded messages, in order"""
+    if type(frames[0]) is bytes:
+        return _BINARY_BATCH_PREFIX + wire.array_header(len(frames)) + b"".join(frames)
+    return '{"type":"batch","messages":[' + ",".join(frames) + "]}"
+
+class Connection:
+    """
+    One websocket with a bounded outbound queue drained by its own writer task
+
+    send() never waits on the network, so a slow client only ever delays its
+    own messages. Messages are queued already encoded (JSON text, or binary
+    frames when the client negotiated the wire protocol), so a broadcast can
+    serialize once per protocol for every recipient (send_frame). While a
+    snapshot type (see COALESCED_TYPES) is still queued, a newer one
+    replaces it; a client that falls behind by more than the queue limit
+    anyway, or takes longer than SEND_TIMEOUT for one send, is disconnected.
+    """
+
+    __slots__ = (
+        "websocket", "user_id", "game_id", "binary", "limit", "queue", "writer", "closed", "on_close",
+        "_ready", "_idle", "sent", "coalesced", "max_depth", "latency_total", "latency_max",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        game_id: Optional[str] = None,
+        binary: bool = False,
+        limit: Optional[int] = None,
+        on_close: Optional[Callable[["Connection"], None]] = None,
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.game_id = game_id
+        self.binary = binary
+        self.limit = OUTBOUND_QUEUE_LIMIT if limit is None else limit
+        self.on_close = on_close
+        self.queue: deque = deque()  # (message type, encoded frame, enqueue time)
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.sent = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.writer = asyncio.create_task(self._write())
+
+    def send(self, message: dict) -> bool:
+        """Queue a message; returns False if the connection is (now) closed"""
+        return self.send_frame(message.get("type"), encode(message, self.binary))
+
+    def send_frame(self, kind: Optional[str], frame: Union[str, bytes]) -> bool:
+        """Queue an already encoded message of the given type (or add it to the open batch)"""
+        if self.closed:
+            return False
+        current = _current_batch.get()
+        if current is not None and current.open:
+            frames = current.frames.get(self)
+            if frames is None:
+                current.frames[self] = [(kind, frame)]
+                return True
+            if kind in COALESCED_TYPES:
+                for index, queued in enumerate(frames):
+                    if queued[0] == kind:
+                        frames[index] = (kind, frame)
+                        return True
+            frames.append((kind, frame))
+            return True
+        return self._enqueue(kind, frame)
+
+    def _send_batch(self, frames: List[Tuple[Optional[str], Union[str, bytes]]]):
+        if self.closed:
+            return
+        if len(frames) == 1:
+            self._enqueue(*frames[0])
+        else:
+            self._enqueue("batch", join_frames([frame for _, frame in frames]))
+
+    def _enqueue(self, kind: Optional[str], frame: Union[str, bytes]) -> bool:
+        queue = self.queue
+        if kind in COALESCED_TYPES:
+            # The newer snapshot takes the older one's place, ahead of the deltas
+            # queued since: they are stale by then, and clients skip stale deltas
+            for index, (queued_kind, _, queued_at) in enumerate(queue):
+                if queued_kind == kind:
+                    queue[index] = (kind, frame, queued_at)
+                    self.coalesced += 1
+                    return True
+        if len(queue) >= self.limit:
+            log_event(logger, logging.WARNING, "ws.slow_consumer", user_id=self.user_id, game_id=self.game_id, queued=len(queue))
+            self._abort(code=1013, reason="Too slow")
+            return False
+        queue.append((kind, frame, time.monotonic()))
+        if len(queue) > self.max_depth:
+            self.max_depth = len(queue)
+        self._idle.clear()
+        self._ready.set()
+        return True
+
+    async def _write(self):
+        queue = self.queue
+        try:
+            while True:
+                if not queue:
+                    self._idle.set()
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                _, frame, queued_at = queue.popleft()
+                if type(frame) is bytes:
+                    await asyncio.wait_for(self.websocket.send_bytes(frame), SEND_TIMEOUT)
+                else:
+                    await asyncio.wait_for(self.websocket.send_text(frame), SEND_TIMEOUT)
+                latency = time.monotonic() - queued_at
+                self.sent += 1
+                self.latency_total += latency
+                if latency > self.latency_max:
+                    self.latency_max = latency
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log_event(logger, logging.WARNING, "ws.send_failed", user_id=self.user_id, game_id=self.game_id, error=repr(e))
+            self._abort(code=1011, reason="Send failed")
+
+    def _abort(self, code: int, reason: str):
+        """Drop the queue and close the socket without waiting on it"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        self._idle.set()
+        if self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        asyncio.create_task(self._close_socket(code, reason))
+        if self.on_close:
+            self.on_close(self)
+
+    async def _close_socket(self, code: int, reason: str):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code, reason=reason), SEND_TIMEOUT)
+        except Exception:
+            pass
+
+    async def flush(self):
+        """Wait until everything queued so far has been sent (or dropped)"""
+        await self._idle.wait()
+
+    def close(self):
+        """Stop the writer; queued messages are discarded"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        self._idle.set()
+        self.writer.cancel()
+
+    def stats(self) -> dict:
+        """Queue depth and send latency for monitoring"""
+        return {
+            "user_id": self.user_id,
+            "game_id": self.game_id,
+            "queued": len(self.queue),
+            "max_queued": self.max_depth,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "avg_latency_ms": round(1000 * self.latency_total / self.sent, 3) if self.sent else 0.0,
+            "max_latency_ms": round(1000 * self.latency_max, 3),
+        }
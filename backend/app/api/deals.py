@@ -0,0 +1,211 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import uuid
+from app.database.models import User
+from app.auth.security import get_current_active_user
+from app.game_logic.deal_analyzer import (
+    parse_hands, canonical_deal, contract_variants, evaluate_contract, rotate_results,
+)
+from app.log import log_event
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/deals", tags=["deals"])
+
+# Worker processes evaluating contracts (default: one per CPU)
+DEAL_ANALYZER_WORKERS = int(os.getenv("DEAL_ANALYZER_WORKERS", "0")) or None
+# Analysed deals kept in memory
+DEAL_CACHE_SIZE = int(os.getenv("DEAL_CACHE_SIZE", "1024"))
+# Seconds a request waits for its analysis before getting a job to poll instead
+DEAL_ANALYSIS_WAIT = float(os.getenv("DEAL_ANALYSIS_WAIT", "5"))
+
+class CardModel(BaseModel):
+    suit: str
+    rank: str
+
+class AnalyzeDealRequest(BaseModel):
+    hands: List[List[CardModel]]
+
+class DealAnalyzer:
+    """
+    Evaluates deals on a process pool, caching results by canonical deal
+
+    Results are stored for the canonical seat rotation, so a deal that comes
+    back with the seats rotated is still a cache hit. Each evaluation runs
+    as a task of its own: concurrent requests for the same deal share it,
+    and a request that stops waiting (see analyze's wait) leaves it running
+    for the client to poll through a job.
+    """
+
+    def __init__(self, workers: Optional[int] = DEAL_ANALYZER_WORKERS, cache_size: int = DEAL_CACHE_SIZE):
+        self.workers = workers
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.progress: Dict[str, List[int]] = {}  # deal key -> [contracts evaluated, contracts]
+        self.jobs: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()  # job id -> (deal key, rotation)
+        self.executor = None
+        self.hits = 0
+        self.misses = 0
+
+    async def analyze(self, hands: List[int], wait: Optional[float] = None) -> Optional[List[dict]]:
+        """
+        Outcome of every contract for every seat, in the caller's seating
+
+        Waits at most `wait` seconds (None: until done) and returns None if
+        the evaluation is still running by then; it carries on regardless.
+        """
+        key, rotation = canonical_deal(hands)
+        results = self.cache.get(key)
+        if results is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return rotate_results(results, rotation)
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            task = self.in_flight[key] = asyncio.create_task(
+                self._run(key, [hands[(seat + rotation) % 4] for seat in range(4)])
+            )
+            # Nobody may be waiting by the time it fails; don't log "exception was never retrieved"
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        try:
+            results = await asyncio.wait_for(asyncio.shield(task), wait)
+        except asyncio.TimeoutError:
+            return None
+        return rotate_results(results, rotation)
+
+    def job(self, hands: List[int]) -> str:
+        """A job id to poll (see status) for a deal's analysis"""
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = canonical_deal(hands)
+        if len(self.jobs) > self.cache_size:
+            self.jobs.popitem(last=False)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """Where a job stands: done (with results), running (with progress) or gone (failed, or evicted); None if unknown"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        key, rotation = job
+        results = self.cache.get(key)
+        if results is not None:
+            return {"status": "done", "deal_key": key, "results": rotate_results(results, rotation)}
+        progress = self.progress.get(key)
+        if progress is not None:
+            return {"status": "running", "deal_key": key, "done": progress[0], "total": progress[1]}
+        return {"status": "gone", "deal_key": key}
+
+    async def _run(self, key: str, hands: List[int]) -> List[dict]:
+        try:
+            results = await self._evaluate(key, hands)
+        except Exception:
+            log_event(logger, logging.ERROR, "deals.analysis_failed", exc_info=True, deal_key=key)
+            raise
+        finally:
+            del self.in_flight[key]
+            self.progress.pop(key, None)
+        self.cache[key] = results
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return results
+
+    async def _evaluate(self, key: str, hands: List[int]) -> List[dict]:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        tasks = contract_variants(hands)
+        progress = self.progress[key] = [0, len(tasks)]
+
+        async def evaluate(task):
+            result = await loop.run_in_executor(self.executor, evaluate_contract, hands, *task)
+            progress[0] += 1
+            return result
+
+        return list(await asyncio.gather(*(evaluate(task) for task in tasks)))
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+analyzer = DealAnalyzer()
+
+def _results_response(deal_key: str, results: List[dict]) -> dict:
+    return {
+        "status": "done",
+        "dealKey": deal_key,
+        "results": [
+            {
+                "seat": r["seat"],
+                "contractType": r["contract_type"],
+                "trumpSuit": r["trump_suit"],
+                "calledAce": r["called_ace"],
+                "partner": r["partner"],
+                "won": r["won"],
+                "schneider": r["schneider"],
+                "schneiderLost": r["schneider_lost"],
+            }
+            for r in results
+        ],
+    }
+
+def _pending_response(http_request: Request, job_id: str, status: dict) -> JSONResponse:
+    location = str(http_request.url_for("get_deal_analysis", job_id=job_id))
+    return JSONResponse(status_code=202, headers={"Location": location}, content={
+        "status": "running",
+        "dealKey": status["deal_key"],
+        "jobId": job_id,
+        "done": status.get("done", 0),
+        "total": status.get("total"),
+    })
+
+@router.post("/analyze")
+async def analyze_deal(
+    request: AnalyzeDealRequest,
+    http_request: Request,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Best-play outcome of every contract each seat could declare on a deal
+
+    A deal that takes longer than DEAL_ANALYSIS_WAIT gets a 202 with a job
+    id instead; GET /deals/analyze/{job_id} until it is done.
+    """
+    try:
+        hands = parse_hands([[card.model_dump() for card in hand] for hand in request.hands])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    results = await analyzer.analyze(hands, wait=DEAL_ANALYSIS_WAIT)
+    if results is None:
+        job_id = analyzer.job(hands)
+        return _pending_response(http_request, job_id, analyzer.status(job_id))
+    return _results_response(canonical_deal(hands)[0], results)
+
+@router.get("/analyze/{job_id}")
+async def get_deal_analysis(
+    job_id: str,
+    http_request: Request,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Results of an analysis that outlasted its request, or its progress so far"""
+    status = analyzer.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown analysis job")
+    if status["status"] == "gone":
+        raise HTTPException(status_code=410, detail="Analysis failed or has expired; submit the deal again")
+    if status["status"] == "running":
+        return _pending_response(http_request, job_id, status)
+    return _results_response(status["deal_key"], status["results"])
@@ -0,0 +1,75 @@
+"""Messages clients send over the game websocket"""
+from typing import Annotated, Literal, Optional, Tuple, Union
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from app.api import wire
+from app.models.card import Rank, Suit
+
+class CardChoice(BaseModel):
+    suit: Suit
+    rank: Rank
+
+class PlayCard(BaseModel):
+    type: Literal["play_card"] = "play_card"
+    card: CardChoice
+
+class Pass(BaseModel):
+    type: Literal["pass"] = "pass"
+
+class SelectContract(BaseModel):
+    type: Literal["select_contract", "bid"] = "select_contract"
+    contract: Literal["Rufer", "Wenz", "Solo"]
+    trump_suit: Optional[Suit] = None
+    called_ace: Optional[Suit] = None
+
+class GetState(BaseModel):
+    type: Literal["get_state"] = "get_state"
+
+class BiddingAdvice(BaseModel):
+    type: Literal["bidding_advice"] = "bidding_advice"
+
+ClientMessage = Annotated[
+    Union[PlayCard, Pass, SelectContract, GetState, BiddingAdvice],
+    Field(discriminator="type"),
+]
+
+# Built once: the type picks the model, so a frame is parsed and checked in one pass
+_adapter = TypeAdapter(ClientMessage)
+
+def decode(frame: Union[str, bytes], binary: bool = False) -> Tuple[Optional[BaseModel], Optional[dict]]:
+    """
+    Decode and validate one client frame
+
+    Returns the message, or None and the error message to send back; bad
+    input never raises, so it cannot cost the client its connection.
+    """
+    try:
+        if binary:
+            return _adapter.validate_python(wire.unpack(frame)), None
+        return _adapter.validate_json(frame), None
+    except ValidationError as e:
+        return None, _error(e)
+    except ValueError as e:  # malformed wire data
+        return None, {"type": "error", "code": "malformed", "message": f"Malformed message: {e}"}
+
+def _error(e: ValidationError) -> dict:
+    """A client-facing error for a frame that failed validation"""
+    errors = e.errors(include_url=False, include_input=False)
+    first = errors[0]
+    if first["type"] == "json_invalid":
+        return {"type": "error", "code": "malformed", "message": "Malformed message"}
+    if first["type"] == "union_tag_invalid":
+        return {"type": "error", "code": "unknown_type", "message": f"Unknown message type: {first['ctx']['tag']}"}
+    if first["type"] == "union_tag_not_found":
+        return {"type": "error", "code": "unknown_type", "message": "Message has no type"}
+    if not first["loc"]:
+        return {"type": "error", "code": "malformed", "message": "Message must be an object"}
+    return {
+        "type": "error",
+        "code": "invalid",
+        "message": f"Invalid {first['loc'][0]} message",
+        # The first location is the message type
+        "errors": [
+            {"field": ".".join(str(part) for part in error["loc"][1:]), "error": error["msg"]}
+            for error in errors
+        ],
+    }
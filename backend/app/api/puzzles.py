@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from typing import Optional
+import os
+from app.database.models import User
+from app.auth.security import get_current_active_user
+from app.game_logic.puzzles import PuzzleFile, DIFFICULTIES
+
+router = APIRouter(prefix="/puzzles", tags=["puzzles"])
+
+# Puzzle file written by `python -m app.game_logic.puzzles`
+PUZZLE_FILE = os.getenv("PUZZLE_FILE", "puzzles.bin")
+
+class CardModel(BaseModel):
+    suit: str
+    rank: str
+
+class SolvePuzzleRequest(BaseModel):
+    card: CardModel
+
+_puzzle_file: Optional[PuzzleFile] = None
+
+def get_puzzle_file() -> PuzzleFile:
+    """Open the puzzle file on first use and keep it mapped"""
+    global _puzzle_file
+    if _puzzle_file is None:
+        try:
+            _puzzle_file = PuzzleFile(PUZZLE_FILE)
+        except (OSError, ValueError):
+            raise HTTPException(status_code=503, detail="No puzzles available")
+    return _puzzle_file
+
+def _get_puzzle(puzzle_id: int) -> dict:
+    try:
+        return get_puzzle_file().get(puzzle_id)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="Puzzle not found")
+
+@router.get("/random")
+async def get_random_puzzle(
+    difficulty: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get a random puzzle (without its answer), optionally of one difficulty"""
+    if difficulty is not None and difficulty not in DIFFICULTIES:
+        raise HTTPException(status_code=400, detail=f"Difficulty must be one of {list(DIFFICULTIES)}")
+    puzzle = get_puzzle_file().random(difficulty)
+    if puzzle is None:
+        raise HTTPException(status_code=404, detail="No puzzle of that difficulty")
+    del puzzle["answer"]
+    return puzzle
+
+@router.get("/stats")
+async def get_puzzle_stats(current_user: User = Depends(get_current_active_user)):
+    """Number of puzzles per difficulty"""
+    puzzles = get_puzzle_file()
+    return {
+        "total": len(puzzles),
+        "by_difficulty": {level: len(indices) for level, indices in puzzles.by_difficulty.items()},
+    }
+
+@router.post("/{puzzle_id}/solve")
+async def solve_puzzle(
+    puzzle_id: int,
+    request: SolvePuzzleRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Check a proposed card against the puzzle's unique winning card"""
+    puzzle = _get_puzzle(puzzle_id)
+    answer = puzzle["answer"]
+    return {
+        "correct": request.card.suit == answer["suit"] and request.card.rank == answer["rank"],
+        "answer": answer,
+    }
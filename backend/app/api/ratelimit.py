@@ -0,0 +1,141 @@
+import os
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple, Union
+from app.api.connections import encode
+
+# Inbound frames allowed per message type, as "type=per second/burst" pairs
+# ("*" counts every frame, garbage included, and is checked before decoding).
+# WS_RATE_LIMITS overrides single types, e.g. "get_state=1/5"; a rate of 0
+# lifts the limit.
+DEFAULT_RATE_LIMITS = "*=20/40,get_state=0.5/3,bidding_advice=0.2/2,play_card=4/8,pass=4/8,select_contract=4/8"
+# Message types that are other names for the same action, and draw from its bucket
+ALIASES = {"bid": "select_contract"}
+
+# Rejections a connection may collect (refilled at WS_RATE_STRIKE_RATE per second) before it is disconnected
+WS_RATE_STRIKES = float(os.getenv("WS_RATE_STRIKES", "20"))
+WS_RATE_STRIKE_RATE = float(os.getenv("WS_RATE_STRIKE_RATE", "1"))
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    limits = {}
+    for item in spec.split(","):
+        kind, _, value = item.strip().partition("=")
+        if kind and value:
+            rate, _, burst = value.partition("/")
+            limits[kind.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+class TokenBucket:
+    """`burst` tokens, refilled at `rate` per second; each frame takes one"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float) -> float:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def full(self, now: float) -> bool:
+        return self.refill(now) >= self.burst
+
+class ConnectionLimits:
+    """
+    The buckets one websocket draws from: its own and its user's
+
+    A frame needs a token from both. The user's buckets outlive the
+    connection, so reconnecting does not buy a fresh burst.
+    """
+
+    __slots__ = ("limiter", "user_id", "buckets", "user_buckets", "strikes", "rejected", "banned")
+
+    def __init__(self, limiter: "RateLimiter", user_id: str, now: float):
+        self.limiter = limiter
+        self.user_id = user_id
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.user_buckets = limiter.users.setdefault(user_id, {})
+        self.strikes = TokenBucket(limiter.strike_rate, limiter.strikes, now)
+        self.rejected = 0
+        self.banned = False  # out of strikes: the client has to go
+
+    def allow(self, kind: str, now: Optional[float] = None) -> bool:
+        """Take a token for a frame of this type; False (and a strike) if the client is over its limit"""
+        kind = ALIASES.get(kind, kind)
+        limit = self.limiter.limits.get(kind)
+        if limit is None or not limit[0]:
+            return True
+        now = time.monotonic() if now is None else now
+        own = self.buckets.get(kind)
+        if own is None:
+            own = self.buckets[kind] = TokenBucket(*limit, now)
+        user = self.user_buckets.get(kind)
+        if user is None:
+            user = self.user_buckets[kind] = TokenBucket(*limit, now)
+        if own.refill(now) >= 1 and user.refill(now) >= 1:
+            own.tokens -= 1
+            user.tokens -= 1
+            return True
+        self.rejected += 1
+        self.limiter.rejected[kind] += 1
+        if self.strikes.refill(now) >= 1:
+            self.strikes.tokens -= 1
+        elif not self.banned:
+            self.banned = True
+            self.limiter.disconnected += 1
+        return False
+
+    def release(self, now: Optional[float] = None):
+        """The connection is gone: forget its user's buckets once they have refilled"""
+        self.limiter.forget(self.user_id, time.monotonic() if now is None else now)
+
+class RateLimiter:
+    """Per message type limits on what clients send, and the per-user buckets that enforce them"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], strikes: float = WS_RATE_STRIKES,
+                 strike_rate: float = WS_RATE_STRIKE_RATE):
+        self.limits = limits
+        self.strikes = strikes
+        self.strike_rate = strike_rate
+        self.users: Dict[str, Dict[str, TokenBucket]] = {}
+        self.rejected: Counter = Counter()
+        self.disconnected = 0
+        self._frames: Dict[Tuple[str, bool], Union[str, bytes]] = {}
+
+    def connection(self, user_id: str, now: Optional[float] = None) -> ConnectionLimits:
+        return ConnectionLimits(self, user_id, time.monotonic() if now is None else now)
+
+    def forget(self, user_id: str, now: float):
+        # A user still cooling down keeps their buckets until they next leave with them full
+        buckets = self.users.get(user_id)
+        if buckets is not None and all(bucket.full(now) for bucket in buckets.values()):
+            del self.users[user_id]
+
+    def rejection(self, kind: str, binary: bool) -> Union[str, bytes]:
+        """The encoded error frame for a rejected message type, built once"""
+        kind = ALIASES.get(kind, kind)
+        frame = self._frames.get((kind, binary))
+        if frame is None:
+            rate = self.limits[kind][0]
+            frame = self._frames[(kind, binary)] = encode({
+                "type": "error",
+                "code": "rate_limited",
+                "message": "Too many messages" if kind == "*" else f"Too many {kind} messages",
+                "retry_after": round(1 / rate, 3),
+            }, binary)
+        return frame
+
+    def stats(self) -> dict:
+        """Configured limits, frames rejected per type, and clients disconnected for running out of strikes"""
+        return {
+            "limits": {kind: {"rate": rate, "burst": burst} for kind, (rate, burst) in self.limits.items()},
+            "rejected": dict(self.rejected),
+            "disconnected": self.disconnected,
+            "users_tracked": len(self.users),
+        }
+
+limiter = RateLimiter({**parse_limits(DEFAULT_RATE_LIMITS), **parse_limits(os.getenv("WS_RATE_LIMITS", ""))})
@@ -0,0 +1,103 @@
+import asyncio
+import heapq
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from app.log import log_event
+
+logger = logging.getLogger(__name__)
+
+# expiry(key, last_active, now) -> (kind, monotonic deadline), or None to stop tracking the key
+Expiry = Callable[[str, float, float], Optional[Tuple[str, float]]]
+
+class Reaper:
+    """
+    Evicts objects that have been idle for too long
+
+    Every tracked key has one entry in a heap ordered by the time it may
+    expire, so a sweep only looks at keys that are due. Activity (touch) is
+    just recorded; when an entry comes due the expiry callback computes the
+    real deadline from it and the object's current state, and the key is
+    either evicted or pushed back with that deadline. A sweep therefore costs
+    O(due · log n), however many objects are alive.
+    """
+
+    def __init__(self, expiry: Expiry, evict: Callable[[str], None], interval: float = 30.0):
+        self.expiry = expiry
+        self.evict = evict
+        self.interval = interval
+        self.last_active: Dict[str, float] = {}
+        self.scheduled: Dict[str, float] = {}  # key -> deadline of its live heap entry
+        self.heap: List[Tuple[float, str]] = []
+        self.evicted: Dict[str, int] = {}  # kind -> objects evicted
+        self.sweeps = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def touch(self, key: str, now: Optional[float] = None):
+        """Record activity on a key, tracking it from now on"""
+        now = time.monotonic() if now is None else now
+        self.last_active[key] = now
+        if key not in self.scheduled:
+            # Checked on the next sweep, which schedules its real deadline
+            self.scheduled[key] = now
+            heapq.heappush(self.heap, (now, key))
+
+    def forget(self, key: str):
+        """Stop tracking a key (its heap entry is skipped when it comes up)"""
+        self.last_active.pop(key, None)
+        self.scheduled.pop(key, None)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Evict every key whose deadline has passed; returns how many were evicted"""
+        now = time.monotonic() if now is None else now
+        heap = self.heap
+        evicted = 0
+        while heap and heap[0][0] <= now:
+            deadline, key = heapq.heappop(heap)
+            if self.scheduled.get(key) != deadline:
+                continue  # forgotten, or rescheduled since
+            result = self.expiry(key, self.last_active[key], now)
+            if result is None:
+                self.forget(key)
+                continue
+            kind, expires = result
+            if expires <= now:
+                self.forget(key)
+                self.evict(key)
+                self.evicted[kind] = self.evicted.get(kind, 0) + 1
+                evicted += 1
+                log_event(logger, logging.INFO, "reaper.evicted", key=key, kind=kind)
+            else:
+                self.scheduled[key] = expires
+                heapq.heappush(heap, (expires, key))
+        self.sweeps += 1
+        return evicted
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception:
+                log_event(logger, logging.ERROR, "reaper.error", exc_info=True)
+
+    def stats(self) -> dict:
+        """Tracked and evicted counts for monitoring"""
+        return {
+            "tracked": len(self.scheduled),
+            "evicted": dict(self.evicted),
+            "sweeps": self.sweeps,
+        }
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
+import os
 import uuid
 from app.database.database import get_db
 from app.database.models import User
 from app.auth.security import get_current_active_user
 from app.models.room import GameRoom
 from app.api.websocket import manager
+from app.api.connections import batch
+from app.api.reaper import Reaper
 from pydantic import BaseModel
 from app.models.game import Game
 
@@ -15,6 +18,12 @@ router = APIRouter(prefix="/rooms", tags=["rooms"])
 class CreateRoomRequest(BaseModel):
     name: str = "Game Room"
     is_private: bool = False
+    # Featured tables can be watched by spectators (public rooms only)
+    featured: bool = False
+    # Duplicate play: every table given the same seed and round gets the same deal
+    deal_pool_seed: Optional[int] = None
+    deal_round: int = 0
+    seat_rotation: int = 0
 
 class JoinRoomRequest(BaseModel):
     room_id: str
@@ -25,6 +34,105 @@ class ReadyRequest(BaseModel):
 # In-memory room storage (in production, use Redis or database)
 rooms: dict[str, GameRoom] = {}
 
+# Seconds a room may sit idle before it is deleted: never started, round
+# finished, or in progress with nobody connected. Rooms with a connected
+# client are never deleted.
+WAITING_ROOM_TTL = float(os.getenv("WAITING_ROOM_TTL", "1800"))
+FINISHED_GAME_TTL = float(os.getenv("FINISHED_GAME_TTL", "600"))
+ABANDONED_GAME_TTL = float(os.getenv("ABANDONED_GAME_TTL", "900"))
+# Seconds between sweeps for idle rooms
+REAPER_INTERVAL = float(os.getenv("REAPER_INTERVAL", "30"))
+
+def _room_expiry(room_id: str, last_active: float, now: float) -> Optional[Tuple[str, float]]:
+    """Why and when an idle room expires (None once it is gone)"""
+    room = rooms.get(room_id)
+    if room is None:
+        return None
+    session = manager.sessions.get(room_id)
+    if session is not None:
+        if session.connections:
+            last_active = now
+        else:
+            last_active = max(last_active, session.last_active)
+    if room.status == "waiting":
+        return "never_started", last_active + WAITING_ROOM_TTL
+    if room.game is None or room.game.is_round_complete():
+        return "finished", last_active + FINISHED_GAME_TTL
+    return "abandoned", last_active + ABANDONED_GAME_TTL
+
+def _evict_room(room_id: str):
+    manager.remove_game(room_id)
+    rooms.pop(room_id, None)
+
+reaper = Reaper(_room_expiry, _evict_room, REAPER_INTERVAL)
+
+def room_stats() -> dict:
+    """Live rooms, games and connections, and what the reaper has evicted"""
+    return {
+        "rooms": len(rooms),
+        "games": sum(1 for session in manager.sessions.values() if session.game is not None),
+        "sessions": len(manager.sessions),
+        "connections": len(manager.user_sessions),
+        **reaper.stats(),
+    }
+
+async def launch_game(room_id: str, room: GameRoom, fill_with_bots: bool = False) -> Game:
+    """Start the room's game, register it with the connection manager and send initial state"""
+    import random
+    from app.api.websocket import broadcast_game_state
+    
+    game = room.start_game(fill_with_bots=fill_with_bots)
+    manager.start_game(room_id, game, room)
+    reaper.touch(room_id)
+    
+    # Randomly select starting player for bidding (dealer), unless the deal pool fixes it
+    starting_bidder = room.first_bidder()
+    if starting_bidder is None:
+        starting_bidder = random.randint(0, 3)
+    game.current_bidder_index = starting_bidder
+    game.current_player_index = starting_bidder
+    
+    # Broadcast game started and the initial game state (this also lets a bot
+    # open the bidding), as one frame per player
+    with batch():
+        await manager.broadcast_to_game({
+            "type": "game_started",
+            "game_id": room_id,
+            "players": [p.name for p in game.players],  # Use game players, not room players
+            "starting_bidder": starting_bidder
+        }, room_id)
+        await broadcast_game_state(room_id)
+    
+    return game
+
+async def launch_waiting_game(room_id: str, room: GameRoom, fill_with_bots: bool = False) -> Game:
+    """launch_game, unless a request queued ahead of this one on the game's actor already did"""
+    if room.status != "waiting":
+        return room.game
+    return await launch_game(room_id, room, fill_with_bots)
+
+async def take_over_bot_seat(room_id: str, room: GameRoom, current_user: User):
+    """Seat a human in place of a bot; during a round they play on with the bot's hand"""
+    from app.api.websocket import broadcast_game_state
+    
+    seat = room.seat_human(current_user.id, current_user.username)
+    reaper.touch(room_id)
+    if seat is None:
+        raise HTTPException(status_code=400, detail="Cannot join room (room is full)")
+    
+    session = manager.session(room_id)
+    session.reseat()
+    if session.turn is not None and session.turn[1] == seat:
+        session.turn = None  # The bot's turn is now a human's, and needs a clock
+    with batch():
+        await manager.broadcast_to_game({
+            "type": "player_joined",
+            "user_id": current_user.username,
+            "player_index": seat
+        }, room_id)
+        if session.game is not None:
+            await broadcast_game_state(room_id)
+
 @router.post("/create")
 async def create_room(
     request: CreateRoomRequest,
@@ -35,6 +143,9 @@ async def create_room(
     import random
     import string
     
+    if request.featured and request.is_private:
+        raise HTTPException(status_code=400, detail="Private rooms cannot be featured")
+    
     room_id = str(uuid.uuid4())
     
     # Generate room code for private rooms (6 characters, alphanumeric)
@@ -42,9 +153,14 @@ async def create_room(
     if request.is_private:
         room_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
     
-    room = GameRoom(room_id, current_user.id, current_user.username, request.is_private, room_code)
+    room = GameRoom(room_id, current_user.id, current_user.username, request.is_private, room_code, request.featured)
+    if request.deal_pool_seed is not None:
+        if request.deal_round < 0:
+            raise HTTPException(status_code=400, detail="Deal round must not be negative")
+        room.use_deal_pool(request.deal_pool_seed, request.deal_round, request.seat_rotation)
     room.add_player(current_user.id, current_user.username)
     rooms[room_id] = room
+    reaper.touch(room_id)
     
     return room.to_dict()
 
@@ -59,10 +175,7 @@ async def list_rooms(
         if len(room.players) == 0 and room.status == "waiting"
     ]
     for room_id in empty_room_ids:
-        if room_id in manager.games:
-            del manager.games[room_id]
-        if room_id in manager.game_rooms:
-            del manager.game_rooms[room_id]
+        manager.remove_game(room_id)
         del rooms[room_id]
     
     # Return only public rooms that are waiting and have space (exclude private rooms)
@@ -88,74 +201,63 @@ async def join_room(
     
     room = rooms[room_id]
     
-    if room.status != "waiting":
-        raise HTTPException(status_code=400, detail="Room is not accepting players")
-    
     # Check if player is already in room
     if any(p["user_id"] == current_user.id for p in room.players):
         # Player already in room, just return current room state
         return room.to_dict()
     
+    if room.status == "in_progress" and room.has_bot_seat():
+        await manager.session(room_id).actor.ask(take_over_bot_seat, room_id, room, current_user)
+        return room.to_dict()
+    
+    if room.status != "waiting":
+        raise HTTPException(status_code=400, detail="Room is not accepting players")
+    
     if not room.add_player(current_user.id, current_user.username):
         raise HTTPException(status_code=400, detail="Cannot join room (room is full)")
+    reaper.touch(room.room_id)
     
     # Auto-start game when room is full (no manual ready)
     if len(room.players) == room.max_players and room.status == "waiting":
-        import random
-        from app.api.websocket import manager
-
-        game = room.start_game()
-        manager.games[room_id] = game
-        manager.game_rooms[room_id] = room
-
-        # Randomly select starting player for bidding
-        starting_bidder = random.randint(0, 3)
-        game.current_bidder_index = starting_bidder
-        game.current_player_index = starting_bidder
-
-        # Map user IDs to player indices using join order
-        user_ids = [p["username"] for p in room.players]
-        manager.set_player_mapping(room_id, user_ids)
-
-        # Broadcast game started
-        await manager.broadcast_to_game({
-            "type": "game_started",
-            "game_id": room_id,
-            "players": [p.name for p in game.players],
-            "starting_bidder": starting_bidder
-        }, room_id)
-
-        # Send initial game state to all players
-        for idx, username in enumerate(user_ids):
-            player_index = idx
-            await manager.send_personal_message({
-                "type": "game_state",
-                "state": {
-                    "game_id": room_id,
-                    "current_trick": [],
-                    "current_player": game.current_player_index,
-                    "your_hand": [
-                        {"suit": c.suit.value, "rank": c.rank.value, "value": c.value}
-                        for c in game.players[player_index].hand
-                    ],
-                    "other_hands": [
-                        len(p.hand) if i != player_index else None
-                        for i, p in enumerate(game.players)
-                    ],
-                    "contract": None,
-                    "trick_number": 0,
-                    "round_complete": False,
-                    "players": [p.name for p in game.players],
-                    "your_player_index": player_index,
-                    "bidding_phase": game.bidding_phase and not game.bidding_complete,
-                    "current_bidder": game.current_bidder_index if game.bidding_phase else None,
-                    "highest_bid": game.highest_bid,
-                    "passes_in_a_row": game.passes_in_a_row
-                }
-            }, username)
+        await manager.session(room_id).actor.ask(launch_waiting_game, room_id, room)
     
     return room.to_dict()
 
+async def leave_seat(room_id: str, room: GameRoom, current_user: User) -> bool:
+    """Take a player out of the room, deleting the room with its last human; returns whether it was deleted"""
+    from app.api.websocket import broadcast_game_state
+    
+    seat = room.remove_player(current_user.id)
+    
+    # Clean up WebSocket connections
+    username = current_user.username
+    manager.disconnect(username)
+    
+    # If game is in progress, notify other players
+    if room.status == "in_progress" and manager.game(room_id) is not None:
+        session = manager.session(room_id)
+        if seat is not None:
+            # A bot plays on for them, without the clock their turn had
+            session.reseat()
+            if session.turn is not None and session.turn[1] == seat:
+                session.turn = None
+        with batch():
+            await manager.broadcast_to_game({
+                "type": "player_left",
+                "user_id": username,
+                "message": f"{username} left the game"
+            }, room_id)
+            if seat is not None:
+                await broadcast_game_state(room_id)
+    
+    # Delete room once no human is left
+    if not room.has_humans():
+        # Clean up game if it exists
+        manager.remove_game(room_id)
+        rooms.pop(room_id, None)
+        return True
+    return False
+
 @router.post("/{room_id}/leave")
 async def leave_room(
     room_id: str,
@@ -166,30 +268,7 @@ async def leave_room(
         raise HTTPException(status_code=404, detail="Room not found")
     
     room = rooms[room_id]
-    room.remove_player(current_user.id)
-    
-    # Clean up WebSocket connections
-    from app.api.websocket import manager
-    username = current_user.username
-    if username in manager.active_connections:
-        manager.disconnect(username)
-    
-    # If game is in progress, notify other players
-    if room.status == "in_progress" and room_id in manager.games:
-        await manager.broadcast_to_game({
-            "type": "player_left",
-            "user_id": username,
-            "message": f"{username} left the game"
-        }, room_id)
-    
-    # Delete room if empty
-    if len(room.players) == 0:
-        # Clean up game if it exists
-        if room_id in manager.games:
-            del manager.games[room_id]
-        if room_id in manager.game_rooms:
-            del manager.game_rooms[room_id]
-        del rooms[room_id]
+    if await manager.session(room_id).actor.ask(leave_seat, room_id, room, current_user):
         return {"message": "Room deleted"}
     
     return room.to_dict()
@@ -206,66 +285,11 @@ async def set_ready(
     
     room = rooms[room_id]
     room.set_player_ready(current_user.id, request.ready)
+    reaper.touch(room_id)
     
     # Auto-start game if all players are ready
     if room.all_ready() and room.status == "waiting":
-        import random
-        from app.api.websocket import manager
-        
-        # Start the game
-        game = room.start_game()
-        manager.games[room_id] = game
-        manager.game_rooms[room_id] = room
-        
-        # Randomly select starting player for bidding
-        game.current_bidder_index = random.randint(0, 3)
-        game.current_player_index = game.current_bidder_index
-        
-        # Map user IDs to player indices - IMPORTANT: Use the order players were added to game
-        user_ids = [p["username"] for p in room.players]
-        print(f"Setting player mapping for game {room_id}:")
-        print(f"  Room players order: {user_ids}")
-        print(f"  Game players order: {[p.name for p in game.players]}")
-        manager.set_player_mapping(room_id, user_ids)
-        print(f"  Player mapping set: {manager.user_to_player_index}")
-        
-        # Broadcast game started
-        await manager.broadcast_to_game({
-            "type": "game_started",
-            "game_id": room_id,
-            "players": [p.name for p in game.players],  # Use game players, not room players
-            "starting_bidder": game.current_bidder_index
-        }, room_id)
-        
-        # Send initial game state to all players
-        for idx, username in enumerate(user_ids):
-            player_index = idx  # Use index directly since we know the order
-            print(f"Sending game state to {username} at index {player_index}")
-            await manager.send_personal_message({
-                "type": "game_state",
-                "state": {
-                    "game_id": room_id,
-                    "current_trick": [],
-                    "current_player": game.current_player_index,
-                    "your_hand": [
-                        {"suit": c.suit.value, "rank": c.rank.value, "value": c.value}
-                        for c in game.players[player_index].hand
-                    ],
-                    "other_hands": [
-                        len(p.hand) if i != player_index else None
-                        for i, p in enumerate(game.players)
-                    ],
-                    "contract": None,
-                    "trick_number": 0,
-                    "round_complete": False,
-                    "players": [p.name for p in game.players],  # Use actual game player names
-                    "your_player_index": player_index,
-                    "bidding_phase": game.bidding_phase and not game.bidding_complete,
-                    "current_bidder": game.current_bidder_index if game.bidding_phase else None,
-                    "highest_bid": game.highest_bid,
-                    "passes_in_a_row": game.passes_in_a_row
-                }
-            }, username)
+        await manager.session(room_id).actor.ask(launch_waiting_game, room_id, room)
     
     return room.to_dict()
 
@@ -283,66 +307,36 @@ async def start_game(
     if room.creator_id != current_user.id:
         raise HTTPException(status_code=403, detail="Only room creator can start")
     
+    if room.status != "waiting":
+        raise HTTPException(status_code=400, detail="Game already started")
+    
     if not room.all_ready():
         raise HTTPException(status_code=400, detail="Not all players are ready")
     
-    import random
-    game = room.start_game()
-    manager.games[room_id] = game
-    manager.game_rooms[room_id] = room
+    await manager.session(room_id).actor.ask(launch_waiting_game, room_id, room)
     
-    # Randomly select starting player for bidding (dealer)
-    starting_bidder = random.randint(0, 3)
-    game.current_bidder_index = starting_bidder
-    game.current_player_index = starting_bidder
+    return {"message": "Game started", "game_id": room_id}
+
+@router.post("/{room_id}/start-with-bots")
+async def start_game_with_bots(
+    room_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Start the game right away, filling empty seats with bots"""
+    if room_id not in rooms:
+        raise HTTPException(status_code=404, detail="Room not found")
     
-    # Map user IDs to player indices - IMPORTANT: Use the order players were added to game
-    user_ids = [p["username"] for p in room.players]
-    print(f"Setting player mapping for game {room_id}:")
-    print(f"  Room players order: {user_ids}")
-    print(f"  Game players order: {[p.name for p in game.players]}")
-    manager.set_player_mapping(room_id, user_ids)
-    print(f"  Player mapping set: {manager.user_to_player_index}")
-    
-    # Broadcast game started
-    await manager.broadcast_to_game({
-        "type": "game_started",
-        "game_id": room_id,
-        "players": [p.name for p in game.players],  # Use game players, not room players
-        "starting_bidder": starting_bidder
-    }, room_id)
-    
-    # Send initial game state to all players
-    for idx, username in enumerate(user_ids):
-        player_index = idx  # Use index directly since we know the order
-        print(f"Sending game state to {username} at index {player_index}")
-        await manager.send_personal_message({
-            "type": "game_state",
-            "state": {
-                "game_id": room_id,
-                "current_trick": [],
-                "current_player": game.current_player_index,
-                "your_hand": [
-                    {"suit": c.suit.value, "rank": c.rank.value, "value": c.value}
-                    for c in game.players[player_index].hand
-                ],
-                "other_hands": [
-                    len(p.hand) if i != player_index else None
-                    for i, p in enumerate(game.players)
-                ],
-                "contract": None,
-                "trick_number": 0,
-                "round_complete": False,
-                "players": [p.name for p in game.players],
-                "your_player_index": player_index,
-                "bidding_phase": game.bidding_phase and not game.bidding_complete,
-                "current_bidder": game.current_bidder_index if game.bidding_phase else None,
-                "highest_bid": game.highest_bid,
-                "passes_in_a_row": game.passes_in_a_row
-            }
-        }, username)
+    room = rooms[room_id]
     
-    return {"message": "Game started", "game_id": room_id}
+    if room.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Only room creator can start")
+    
+    if room.status != "waiting":
+        raise HTTPException(status_code=400, detail="Game already started")
+    
+    await manager.session(room_id).actor.ask(launch_waiting_game, room_id, room, True)
+    
+    return {"message": "Game started", "game_id": room_id, "room": room.to_dict()}
 
 @router.get("/{room_id}")
 async def get_room(
@@ -376,15 +370,20 @@ async def join_by_code(
     if not room:
         raise HTTPException(status_code=404, detail="Room not found with that code")
     
-    if room.status != "waiting":
-        raise HTTPException(status_code=400, detail="Room is not accepting players")
-    
     # Check if player is already in room
     if any(p["user_id"] == current_user.id for p in room.players):
         # Player already in room, just return current room state
         return room.to_dict()
     
+    if room.status == "in_progress" and room.has_bot_seat():
+        await manager.session(room.room_id).actor.ask(take_over_bot_seat, room.room_id, room, current_user)
+        return room.to_dict()
+    
+    if room.status != "waiting":
+        raise HTTPException(status_code=400, detail="Room is not accepting players")
+    
     if not room.add_player(current_user.id, current_user.username):
         raise HTTPException(status_code=400, detail="Cannot join room (room is full)")
+    reaper.touch(room.room_id)
     
     return room.to_dict()
\ No newline at end of file
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional
+from app.api.actors import GameActor
+from app.api.connections import Connection
+from app.models.game import Game
+from app.models.room import GameRoom
+
+# Recent broadcast events kept per game for clients resuming after a dropped connection
+RESUME_BUFFER_SIZE = int(os.getenv("RESUME_BUFFER_SIZE", "32"))
+
+class GameSession:
+    """
+    Everything the server keeps about one game
+
+    Holds the Game and its room, which user sits in which seat, who is
+    connected, and the public state clients were last sent. Seats belong to
+    the session, so a user's seat in one game never leaks into another, and
+    handlers find the game, the seat and the connection from the game id
+    without scanning any list.
+
+    Broadcast events are numbered (seq) and the most recent ones kept in a
+    ring buffer, so a client that reconnects with its resume token and the
+    last seq it saw only needs the events it missed (see missed()).
+
+    All changes to the game go through the session's actor (see
+    app.api.actors), one command at a time.
+    """
+
+    __slots__ = (
+        "game_id", "game", "room", "seats", "connections", "version", "public", "bot_task", "last_active",
+        "seq", "events", "resume_tokens", "actor", "turn", "clock",
+    )
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.game: Optional[Game] = None
+        self.room: Optional[GameRoom] = None
+        self.seats: Dict[str, int] = {}  # user_id -> seat index
+        self.connections: Dict[str, Connection] = {}  # user_id -> Connection
+        self.version = 0  # version of the last state sent
+        self.public: dict = {}  # public state at that version
+        self.bot_task: Optional[asyncio.Task] = None  # task driving bot seats
+        self.last_active = time.monotonic()  # last state change or departure (see reaper)
+        self.seq = 0  # number of the last broadcast
+        self.events: deque = deque(maxlen=RESUME_BUFFER_SIZE)  # (seq, message or None for a snapshot, frames)
+        self.resume_tokens: Dict[str, str] = {}  # user_id -> token of their latest connection
+        self.actor = GameActor(game_id)  # applies the commands that change the game, in order
+        self.turn: Optional[tuple] = None  # whose turn it is (see current_turn in app.api.websocket)
+        self.clock: Optional[dict] = None  # the human to act's clock, as sent to clients
+
+    def start(self, game: Game, room: Optional[GameRoom] = None):
+        """Attach a freshly started game; seats follow the order of its players"""
+        self.game = game
+        self.room = room
+        self.turn = None
+        self.clock = None
+        self.reseat()
+
+    def reseat(self):
+        """Rebuild the seat index after seats changed hands (e.g. a human replaced a bot)"""
+        self.seats = {player.name: index for index, player in enumerate(self.game.players)} if self.game else {}
+
+    def end(self):
+        """Forget the game and its state, keeping connected clients"""
+        self.game = None
+        self.room = None
+        self.seats = {}
+        self.version = 0
+        self.public = {}
+        self.events.clear()
+        self.resume_tokens = {}
+        self.turn = None
+        self.clock = None
+
+    def record(self, message: dict) -> list:
+        """
+        Number a broadcast event and keep it for replay
+
+        Returns the event's frame cache, [JSON, binary], for the broadcast to
+        fill so a replay can reuse the encoded frames.
+        """
+        self.seq += 1
+        message["seq"] = self.seq
+        frames = [None, None]
+        self.events.append((self.seq, message, frames))
+        return frames
+
+    def record_snapshot(self) -> int:
+        """Number a per-seat snapshot broadcast; replays across it fall back to a snapshot"""
+        self.seq += 1
+        self.events.append((self.seq, None, None))
+        return self.seq
+
+    def missed(self, seq: int) -> Optional[List[tuple]]:
+        """Buffered events after seq, or None if some are no longer (or never were) replayable"""
+        if seq == self.seq:
+            return []
+        if seq > self.seq or not self.events or self.events[0][0] > seq + 1:
+            return None
+        events = list(islice(self.events, seq + 1 - self.events[0][0], None))
+        if any(message is None for _, message, _ in events):
+            return None
+        return events
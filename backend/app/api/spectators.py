@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter, deque
+from itertools import count
+from typing import Dict, List, Optional, Set
+from fastapi import WebSocket
+from app.api.connections import Connection, encode
+from app.log import log_event
+from app.models.game import Game
+
+logger = logging.getLogger(__name__)
+
+# Seconds spectators lag behind the table (0 = live)
+SPECTATOR_DELAY = float(os.getenv("SPECTATOR_DELAY", "0"))
+# Seconds between spectator updates, and the limit it backs off to while spectators fall behind
+SPECTATOR_INTERVAL = float(os.getenv("SPECTATOR_INTERVAL", "0.25"))
+SPECTATOR_MAX_INTERVAL = float(os.getenv("SPECTATOR_MAX_INTERVAL", "4"))
+# Share of spectators still sending the previous update that makes the channel slow down
+SPECTATOR_BACKLOG_SHARE = float(os.getenv("SPECTATOR_BACKLOG_SHARE", "0.1"))
+# Game states kept per channel while they wait out the delay
+SPECTATOR_PENDING_LIMIT = 256
+# Spectators one game may have, and spectator connections one user may hold
+SPECTATOR_MAX_PER_GAME = int(os.getenv("SPECTATOR_MAX_PER_GAME", "500"))
+SPECTATOR_MAX_PER_USER = int(os.getenv("SPECTATOR_MAX_PER_USER", "2"))
+
+class SpectatorChannel:
+    """
+    The public view of one game, streamed to any number of spectators
+
+    The game only appends its new public state to `pending` (see
+    SpectatorHub.publish). A driver task wakes every `interval`, takes the
+    newest state old enough for the delay, encodes it once per protocol and
+    queues the same frame on every spectator connection. Spectator states
+    are coalesced in the outbound queues, so a slow spectator skips updates
+    rather than piling them up; when too many spectators are still behind,
+    the interval doubles (up to SPECTATOR_MAX_INTERVAL) and it halves again
+    once they have caught up.
+    """
+
+    __slots__ = (
+        "game_id", "spectators", "pending", "current", "interval", "task", "sent_version",
+        "updates", "frames_sent", "throttled",
+    )
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.spectators: Set[Connection] = set()
+        self.pending: deque = deque(maxlen=SPECTATOR_PENDING_LIMIT)  # (published at, version, state, hand sizes)
+        self.current: Optional[tuple] = None  # newest entry past the delay
+        self.interval = SPECTATOR_INTERVAL
+        self.task: Optional[asyncio.Task] = None
+        self.sent_version = -1
+        self.updates = 0
+        self.frames_sent = 0
+        self.throttled = 0
+
+    def take(self, cutoff: float) -> Optional[dict]:
+        """The newest view published before cutoff, unless spectators already have it"""
+        pending = self.pending
+        while pending and pending[0][0] <= cutoff:
+            self.current = pending.popleft()
+        if self.current is None or self.current[1] <= self.sent_version:
+            return None
+        _, version, state, hand_sizes = self.current
+        self.sent_version = version
+        return {"type": "spectator_state", "state": dict(state, version=version, hand_sizes=hand_sizes)}
+
+    def tick(self, now: float):
+        """Send spectators the view due at `now` and adapt the update interval"""
+        message = self.take(now - SPECTATOR_DELAY)
+        if message is None:
+            return
+        spectators = tuple(self.spectators)  # sending may drop slow connections
+        frames = [None, None]  # JSON, binary
+        behind = 0
+        for connection in spectators:
+            if connection.queue:
+                behind += 1
+            frame = frames[connection.binary]
+            if frame is None:
+                frame = frames[connection.binary] = encode(message, connection.binary)
+            connection.send_frame("spectator_state", frame)
+        self.updates += 1
+        self.frames_sent += len(spectators)
+
+        if behind > len(spectators) * SPECTATOR_BACKLOG_SHARE:
+            if self.interval < SPECTATOR_MAX_INTERVAL:
+                self.interval = min(self.interval * 2, SPECTATOR_MAX_INTERVAL)
+                self.throttled += 1
+                log_event(logger, logging.INFO, "spectators.throttled", game_id=self.game_id,
+                          behind=behind, spectators=len(spectators), interval=self.interval)
+        elif behind == 0 and self.interval > SPECTATOR_INTERVAL:
+            self.interval = max(self.interval / 2, SPECTATOR_INTERVAL)
+
+    async def _run(self):
+        while self.spectators:
+            await asyncio.sleep(self.interval)
+            try:
+                self.tick(time.monotonic())
+            except Exception:
+                log_event(logger, logging.ERROR, "spectators.error", exc_info=True, game_id=self.game_id)
+
+    def stats(self) -> dict:
+        return {
+            "game_id": self.game_id,
+            "spectators": len(self.spectators),
+            "interval": self.interval,
+            "pending": len(self.pending),
+            "updates": self.updates,
+            "frames_sent": self.frames_sent,
+            "throttled": self.throttled,
+        }
+
+class SpectatorHub:
+    """Spectator channels by game; games without spectators cost one dict lookup per update"""
+
+    def __init__(self):
+        self.channels: Dict[str, SpectatorChannel] = {}
+        self.viewers: Dict[Connection, str] = {}  # spectator connection -> user watching
+        self.per_user: Counter = Counter()
+        self._ids = count(1)
+
+    def publish(self, game_id: str, version: int, state: dict, game: Game):
+        """Offer a game's new public state to its spectators, if it has any"""
+        channel = self.channels.get(game_id)
+        if channel is not None:
+            channel.pending.append((time.monotonic(), version, state, [len(p.hand) for p in game.players]))
+
+    def join(self, websocket: WebSocket, game_id: str, user_id: str, binary: bool = False) -> Optional[Connection]:
+        """
+        Add a spectator connection to a game's channel, starting its driver if needed
+
+        Returns None, adding nothing, when the game already has
+        SPECTATOR_MAX_PER_GAME spectators or the user already watches with
+        SPECTATOR_MAX_PER_USER connections. Whether the game may be watched
+        at all is up to the caller.
+        """
+        channel = self.channels.get(game_id)
+        if (channel is not None and len(channel.spectators) >= SPECTATOR_MAX_PER_GAME) \
+                or self.per_user[user_id] >= SPECTATOR_MAX_PER_USER:
+            return None
+        if channel is None:
+            channel = self.channels[game_id] = SpectatorChannel(game_id)
+        connection = Connection(websocket, f"spectator:{next(self._ids)}", game_id, binary=binary, on_close=self.leave)
+        channel.spectators.add(connection)
+        self.viewers[connection] = user_id
+        self.per_user[user_id] += 1
+        # A newcomer needs the current view even if it is not new to the others
+        # (who just get it once more)
+        channel.sent_version = -1
+        if channel.task is None or channel.task.done():
+            channel.task = asyncio.create_task(channel._run())
+        return connection
+
+    def leave(self, connection: Connection):
+        """Remove a spectator; the channel goes away with its last spectator"""
+        connection.close()
+        user_id = self.viewers.pop(connection, None)
+        if user_id is not None:
+            self.per_user[user_id] -= 1
+            if not self.per_user[user_id]:
+                del self.per_user[user_id]
+        channel = self.channels.get(connection.game_id)
+        if channel is None:
+            return
+        channel.spectators.discard(connection)
+        if not channel.spectators:
+            del self.channels[connection.game_id]
+            if channel.task is not None:
+                channel.task.cancel()
+
+    def shutdown(self):
+        for channel in self.channels.values():
+            if channel.task is not None:
+                channel.task.cancel()
+            for connection in channel.spectators:
+                connection.close()
+        self.channels.clear()
+        self.viewers.clear()
+        self.per_user.clear()
+
+    def stats(self) -> List[dict]:
+        """Spectators, update interval and frames sent per channel"""
+        return [channel.stats() for channel in self.channels.values()]
+
+spectators = SpectatorHub()
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import logging
+import os
+from app.game_logic.training_export import TrainingExporter
+from app.log import log_event
+
+logger = logging.getLogger(__name__)
+
+# Directory receiving human decisions for bot training; export is off when unset
+TRAINING_EXPORT_DIR = os.getenv("TRAINING_EXPORT_DIR")
+
+# A single writer thread keeps rows in order and file I/O off the event loop
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="training-export")
+exporter: Optional[TrainingExporter] = TrainingExporter(TRAINING_EXPORT_DIR) if TRAINING_EXPORT_DIR else None
+
+def _export(record: dict):
+    try:
+        exporter.export_round(record)
+    except Exception:
+        log_event(logger, logging.ERROR, "training.export_failed", exc_info=True, game_id=record.get("game_id"))
+
+def submit_round(record: dict) -> bool:
+    """Queue a finished round for export; returns False when export is off"""
+    if exporter is None:
+        return False
+    _writer.submit(_export, record)
+    return True
+
+def shutdown():
+    """Finish pending writes and close the current chunk"""
+    _writer.shutdown(wait=True)
+    if exporter is not None:
+        exporter.close()
@@ -1,201 +1,423 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Optional
-import json
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+import secrets
+import time
 import uuid
-from app.models.game import Game
+import orjson
+from pydantic import BaseModel
+from app.models.game import TIMEOUT, Game
 from app.models.player import Player
-from app.models.card import Card, Suit, Rank
+from app.models.card import Card
+from app.models.deck import Deck
 from app.models.room import GameRoom
+from app.api import wire
+from app.api.clocks import clocks
+from app.api.connections import Connection, batch, encode
+from app.api.messages import BiddingAdvice, CardChoice, GetState, Pass, PlayCard, SelectContract, decode
+from app.api.ratelimit import ConnectionLimits, limiter
+from app.api.sessions import GameSession
+from app.api.spectators import spectators
+from app.log import log_event
+from app.game_logic.ai import ai_choose_bid, ai_choose_card
+from app.game_logic.bitmask import to_mask
+from app.game_logic.bidding_advisor import BiddingAdvisor
+
+logger = logging.getLogger(__name__)
+
+# Seconds a bot "thinks" before acting, so humans can follow the table
+BOT_MOVE_DELAY = float(os.getenv("BOT_MOVE_DELAY", "0.4"))
+
+# Seconds a human has to bid or to play before the server passes or plays for them (0 = no clock)
+BID_TIMEOUT = float(os.getenv("BID_TIMEOUT", "30"))
+TURN_TIMEOUT = float(os.getenv("TURN_TIMEOUT", "45"))
+
+# Bidding advisor: worker processes, simulated deals and seconds per request
+advisor = BiddingAdvisor(
+    workers=int(os.getenv("ADVISOR_WORKERS", "2")),
+    samples=int(os.getenv("ADVISOR_SAMPLES", "400")),
+    budget=float(os.getenv("ADVISOR_TIME_BUDGET", "1.0")),
+)
+
+# JSON-ready form of each card, built once
+_CARD_DICTS = {card: {"suit": card.suit.value, "rank": card.rank.value, "value": card.value} for card in Deck().cards}
 
 class ConnectionManager:
-    """Manages WebSocket connections"""
+    """
+    Manages WebSocket connections, grouped into one GameSession per game
+
+    sessions and user_sessions are the only indexes; both are updated
+    together on connect and disconnect.
+    """
     
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}  # user_id -> WebSocket
-        self.user_to_game: Dict[str, str] = {}  # user_id -> game_id
-        self.game_players: Dict[str, List[str]] = {}  # game_id -> [user_ids]
-        self.user_to_player_index: Dict[str, int] = {}  # user_id -> player_index in game
-        self.games: Dict[str, Game] = {}
-        self.game_rooms: Dict[str, GameRoom] = {}  # game_id -> GameRoom (for user ID mapping)
-    
-    def set_player_mapping(self, game_id: str, user_ids: List[str]):
-        """Map user IDs to player indices"""
-        for index, user_id in enumerate(user_ids):
-            self.user_to_player_index[user_id] = index
-    
-    async def connect(self, websocket: WebSocket, game_id: str, user_id: str):
+        self.sessions: Dict[str, GameSession] = {}  # game_id -> session
+        self.user_sessions: Dict[str, GameSession] = {}  # user_id -> session of their connection
+    
+    def session(self, game_id: str) -> GameSession:
+        """A game's session, created on first use"""
+        session = self.sessions.get(game_id)
+        if session is None:
+            session = self.sessions[game_id] = GameSession(game_id)
+        return session
+    
+    def game(self, game_id: str) -> Optional[Game]:
+        """The running game of a session, if any"""
+        session = self.sessions.get(game_id)
+        return session.game if session is not None else None
+    
+    def start_game(self, game_id: str, game: Game, room: Optional[GameRoom] = None) -> GameSession:
+        """Register a started game; seats are assigned in the order of its players"""
+        session = self.session(game_id)
+        session.start(game, room)
+        return session
+    
+    def remove_game(self, game_id: str):
+        """Forget a game and everything kept about its state"""
+        session = self.sessions.get(game_id)
+        if session is None:
+            return
+        session.end()
+        clocks.cancel(game_id)
+        if not session.connections:
+            del self.sessions[game_id]
+    
+    async def connect(self, websocket: WebSocket, game_id: str, user_id: str, binary: bool = False) -> Connection:
         # Note: websocket should already be accepted before calling this
-        self.active_connections[user_id] = websocket
-        self.user_to_game[user_id] = game_id
-        
-        if game_id not in self.game_players:
-            self.game_players[game_id] = []
-        if user_id not in self.game_players[game_id]:
-            self.game_players[game_id].append(user_id)
-    
-    def disconnect(self, user_id: str):
-        """Handle user disconnection and cleanup"""
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-        
-        game_id = self.user_to_game.get(user_id)
-        if game_id:
-            # Remove from game players list
-            if game_id in self.game_players:
-                if user_id in self.game_players[game_id]:
-                    self.game_players[game_id].remove(user_id)
-            
-            # Clean up player index mapping
-            if user_id in self.user_to_player_index:
-                del self.user_to_player_index[user_id]
-            
-            # If game exists and has no active connections, mark for cleanup
-            if game_id in self.games:
-                active_count = len([uid for uid in self.game_players.get(game_id, []) if uid in self.active_connections])
-                if active_count == 0:
-                    print(f"No active connections for game {game_id}, marking for cleanup")
-        
-        if user_id in self.user_to_game:
-            del self.user_to_game[user_id]
+        previous = self.user_sessions.get(user_id)
+        if previous is not None:
+            self._drop(previous, user_id)
+        session = self.session(game_id)
+        connection = Connection(websocket, user_id, game_id, binary=binary, on_close=self._connection_closed)
+        session.connections[user_id] = connection
+        self.user_sessions[user_id] = session
+        return connection
+    
+    def _connection_closed(self, connection: Connection):
+        """A writer gave up on its client (too slow or dead)"""
+        self.disconnect(connection.user_id, connection)
+    
+    def disconnect(self, user_id: str, connection: Optional[Connection] = None) -> bool:
+        """
+        Handle user disconnection and cleanup
+
+        With a connection given, nothing happens unless it is still the
+        user's current one (they may already have reconnected). Returns
+        whether a connection was removed.
+        """
+        session = self.user_sessions.get(user_id)
+        if session is None:
+            return False
+        if connection is not None and session.connections.get(user_id) is not connection:
+            return False
+        self._drop(session, user_id)
+        if not session.connections and session.game is not None:
+            session.last_active = time.monotonic()
+            log_event(logger, logging.INFO, "game.unattended", game_id=session.game_id)
+        return True
+    
+    def _drop(self, session: GameSession, user_id: str):
+        """Close a user's connection and remove it from both indexes"""
+        del self.user_sessions[user_id]
+        connection = session.connections.pop(user_id, None)
+        if connection is not None:
+            connection.close()
+        # A session without game or clients has nothing worth keeping
+        if not session.connections and session.game is None and self.sessions.get(session.game_id) is session:
+            del self.sessions[session.game_id]
     
     async def send_personal_message(self, message: dict, user_id: str):
-        if user_id in self.active_connections:
-            await self.active_connections[user_id].send_json(message)
+        """Queue a message for one user; never waits on their network"""
+        session = self.user_sessions.get(user_id)
+        if session is not None:
+            session.connections[user_id].send(message)
     
     async def broadcast_to_game(self, message: dict, game_id: str):
-        if game_id in self.game_players:
-            for user_id in self.game_players[game_id]:
-                if user_id in self.active_connections:
-                    await self.active_connections[user_id].send_json(message)
+        """Queue a message for everyone connected to a game, encoding it once per protocol"""
+        session = self.sessions.get(game_id)
+        if session is None:
+            return
+        frames = session.record(message)  # JSON, binary
+        for connection in session.connections.values():
+            frame = frames[connection.binary]
+            if frame is None:
+                frame = frames[connection.binary] = encode(message, connection.binary)
+            connection.send_frame(message["type"], frame)
+    
+    def connection_stats(self) -> List[dict]:
+        """Outbound queue depth and send latency of every connection"""
+        return [
+            connection.stats()
+            for session in self.sessions.values()
+            for connection in session.connections.values()
+        ]
+    
+    def game_stats(self) -> List[dict]:
+        """Commands applied, mailbox depth, latency and throughput of every game that has had any"""
+        return [session.actor.stats() for session in self.sessions.values() if session.actor.processed]
 
 manager = ConnectionManager()
 
-async def websocket_endpoint(websocket: WebSocket, game_id: str, user_id: str):
-    """WebSocket endpoint for game communication"""
-    print(f"WebSocket connection: user_id={user_id}, game_id={game_id}")
-    await manager.connect(websocket, game_id, user_id)
-    
-    # Send initial game state
-    print(f"Sending initial game state to {user_id}")
-    await handle_get_state(game_id, user_id)
-    
+async def websocket_endpoint(
+    websocket: WebSocket,
+    game_id: str,
+    user_id: str,
+    binary: bool = False,
+    resume_token: Optional[str] = None,
+    last_seq: Optional[int] = None,
+):
+    """
+    WebSocket endpoint for game communication
+
+    binary: the client negotiated the wire protocol. resume_token and
+    last_seq: the client is reconnecting and saw events up to last_seq.
+    """
+    log_event(logger, logging.INFO, "ws.connected", user_id=user_id, game_id=game_id, binary=binary,
+              resuming=resume_token is not None)
+    connection = await manager.connect(websocket, game_id, user_id, binary)
+    
+    # Replay what a reconnecting client missed, else send the initial game state
+    with batch():
+        if not resume_session(manager.sessions[game_id], connection, resume_token, last_seq):
+            await handle_get_state(game_id, user_id)
+    
+    # Every frame is checked against the client's rate limits before it costs any game work
+    limits = limiter.connection(user_id)
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            # Handle different message types
-            if message["type"] == "play_card":
-                await handle_play_card(game_id, user_id, message)
-            elif message["type"] == "pass":
-                await handle_pass(game_id, user_id, message)
-            elif message["type"] == "select_contract" or message["type"] == "bid":
-                await handle_select_contract(game_id, user_id, message)
-            elif message["type"] == "get_state":
-                await handle_get_state(game_id, user_id)
-            else:
-                await manager.send_personal_message({
-                    "type": "error",
-                    "message": f"Unknown message type: {message.get('type')}"
-                }, user_id)
+            frame = await websocket.receive_bytes() if binary else await websocket.receive_text()
+            if not limits.allow("*"):
+                await reject(websocket, connection, limits, "*", game_id)
+                continue
+            message, error = decode(frame, binary)
+            if error is not None:
+                # Garbage costs the client an error reply, not its connection
+                log_event(logger, logging.INFO, "ws.invalid_message", user_id=user_id, game_id=game_id,
+                          code=error["code"])
+                connection.send(error)
+                continue
+            if not limits.allow(message.type):
+                await reject(websocket, connection, limits, message.type, game_id)
+                continue
+            log_event(logger, logging.DEBUG, "ws.message", user_id=user_id, game_id=game_id, type=message.type)
+            await handle_message(game_id, user_id, message)
     
     except WebSocketDisconnect:
-        print(f"WebSocket disconnected for user: {user_id}")
-        manager.disconnect(user_id)
-        # Notify other players if in a game
-        game_id = manager.user_to_game.get(user_id)
-        if game_id:
+        log_event(logger, logging.INFO, "ws.disconnected", user_id=user_id, game_id=game_id)
+        # Notify other players, unless the user has already reconnected
+        if manager.disconnect(user_id, connection):
             await manager.broadcast_to_game({
                 "type": "player_disconnected",
                 "user_id": user_id
             }, game_id)
-    except Exception as e:
-        print(f"WebSocket error for user {user_id}: {e}")
-        import traceback
-        traceback.print_exc()
-        manager.disconnect(user_id)
-
-async def handle_play_card(game_id: str, user_id: str, message: dict):
-    """Handle a card play from a player"""
-    if game_id not in manager.games:
+    except Exception:
+        log_event(logger, logging.ERROR, "ws.error", exc_info=True, user_id=user_id, game_id=game_id)
+        manager.disconnect(user_id, connection)
+    finally:
+        limits.release()
+
+async def reject(websocket: WebSocket, connection: Connection, limits: ConnectionLimits, kind: str, game_id: str):
+    """
+    Answer a frame over the client's rate limit with a prebuilt error frame
+
+    A client that keeps going after WS_RATE_STRIKES rejections is
+    disconnected (close code 1008), which ends the receive loop like any
+    other disconnect.
+    """
+    if not limits.banned:
+        log_event(logger, logging.INFO, "ws.rate_limited", user_id=limits.user_id, game_id=game_id, type=kind)
+        connection.send_frame("error", limiter.rejection(kind, connection.binary))
+        return
+    log_event(logger, logging.WARNING, "ws.rate_limit_disconnect", user_id=limits.user_id, game_id=game_id,
+              type=kind, rejected=limits.rejected)
+    try:
+        await websocket.close(code=1008, reason="Rate limit exceeded")
+    except Exception:
+        pass
+    raise WebSocketDisconnect(code=1008)
+
+async def spectator_endpoint(websocket: WebSocket, game_id: str, user_id: str, binary: bool = False):
+    """
+    WebSocket endpoint for watching a game
+
+    Only running games of featured, public rooms can be watched. Spectators
+    get spectator_state messages: the public state with hand sizes but no
+    cards, possibly delayed (see app.api.spectators). Anything they send is
+    ignored.
+    """
+    session = manager.sessions.get(game_id)
+    room = session.room if session is not None else None
+    if session is None or session.game is None or room is None or not room.featured or room.is_private:
+        log_event(logger, logging.INFO, "spectators.refused", user_id=user_id, game_id=game_id, reason="not_featured")
+        await websocket.close(code=1008, reason="Game cannot be watched")
+        return
+    connection = spectators.join(websocket, game_id, user_id, binary)
+    if connection is None:
+        log_event(logger, logging.INFO, "spectators.refused", user_id=user_id, game_id=game_id, reason="full")
+        await websocket.close(code=1013, reason="Too many spectators")
+        return
+    if session.public:
+        spectators.publish(game_id, session.version, session.public, session.game)
+    try:
+        while True:
+            if binary:
+                await websocket.receive_bytes()
+            else:
+                await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        log_event(logger, logging.ERROR, "spectators.ws_error", exc_info=True, game_id=game_id)
+    finally:
+        spectators.leave(connection)
+
+async def handle_message(game_id: str, user_id: str, message: BaseModel):
+    """
+    Dispatch one validated message from a client (see app.api.messages.decode)
+
+    Commands go to the game's mailbox and are applied in arrival order (see
+    app.api.actors). Bidding advice only reads the player's hand, so it is
+    answered from a task of its own: a slow simulation holds up neither the
+    table nor the client's next messages. Its time budget runs from now.
+    """
+    if type(message) is BiddingAdvice:
+        task = asyncio.create_task(answer_bidding_advice(game_id, user_id, time.time() + advisor.budget))
+        _advice_tasks.add(task)
+        task.add_done_callback(_advice_tasks.discard)
+    else:
+        manager.session(game_id).actor.tell(_HANDLERS[type(message)], game_id, user_id, message)
+
+# Bidding advice being worked out, kept referenced until it is sent
+_advice_tasks: Set[asyncio.Task] = set()
+
+async def answer_bidding_advice(game_id: str, user_id: str, deadline: float):
+    """handle_bidding_advice as a background task: errors are logged, the connection carries on"""
+    try:
+        await handle_bidding_advice(game_id, user_id, deadline)
+    except Exception:
+        log_event(logger, logging.ERROR, "advice.error", exc_info=True, user_id=user_id, game_id=game_id)
+
+def resume_session(
+    session: GameSession, connection: Connection, resume_token: Optional[str], last_seq: Optional[int]
+) -> bool:
+    """
+    Start a connection's session, replaying the events it missed if it is resuming
+
+    The client first gets a "session" message with a fresh resume token and
+    the current seq. Replay needs the token of the user's previous connection
+    and every event since last_seq still buffered (and no snapshot among
+    them); returns False when the client needs a snapshot instead.
+    """
+    user_id = connection.user_id
+    missed = None
+    if resume_token is not None and last_seq is not None:
+        expected = session.resume_tokens.get(user_id)
+        if expected is not None and secrets.compare_digest(expected, resume_token):
+            missed = session.missed(last_seq)
+            # A replay longer than half the outbound queue would get the client dropped as too slow
+            if missed is not None and len(missed) > connection.limit // 2:
+                missed = None
+    
+    token = session.resume_tokens[user_id] = secrets.token_urlsafe(16)
+    connection.send({"type": "session", "resume_token": token, "seq": session.seq, "resumed": missed is not None})
+    if missed is None:
+        return False
+    for _, message, frames in missed:
+        frame = frames[connection.binary]
+        if frame is None:
+            frame = frames[connection.binary] = encode(message, connection.binary)
+        connection.send_frame(message["type"], frame)
+    log_event(logger, logging.DEBUG, "ws.resumed", user_id=user_id, game_id=session.game_id, replayed=len(missed))
+    return True
+
+async def _find_session(game_id: str, user_id: str) -> Optional[GameSession]:
+    """The session of a running game, or None after telling the user there is none"""
+    session = manager.sessions.get(game_id)
+    if session is None or session.game is None:
         await manager.send_personal_message({
             "type": "error",
             "message": "Game not found"
         }, user_id)
-        return
-    
-    game = manager.games[game_id]
-    
-    # Get player index from mapping
-    player_index = manager.user_to_player_index.get(user_id, 0)
-    
-    if player_index >= len(game.players):
+        return None
+    return session
+
+async def _find_seat(session: GameSession, user_id: str) -> Optional[int]:
+    """A user's seat in the session's game, or None after telling them they have none"""
+    player_index = session.seats.get(user_id)
+    if player_index is None:
         await manager.send_personal_message({
             "type": "error",
-            "message": "Invalid player index"
+            "message": "Could not determine your player position"
         }, user_id)
+    return player_index
+
+async def handle_play_card(game_id: str, user_id: str, message: PlayCard, origin: Optional[str] = None):
+    """Handle a card play from a player (origin: who chose it, when not the seat's holder, see Game.move_origin)"""
+    session = await _find_session(game_id, user_id)
+    if session is None:
+        return
+    game = session.game
+    player_index = await _find_seat(session, user_id)
+    if player_index is None:
         return
     
-    # Convert card dict to Card object
-    card_data = message.get("card", {})
-    suit = Suit(card_data.get("suit"))
-    rank = Rank(card_data.get("rank"))
-    card = Card(suit, rank)
+    card = Card(message.card.suit, message.card.rank)
     
     # Play the card
-    if game.play_card(player_index, card):
+    if game.play_card(player_index, card, origin):
+        await broadcast_update(game_id, {
+            "type": "card_played",
+            "player_index": player_index,
+            "card": _CARD_DICTS[card]
+        })
+        
         # Check if trick is complete
         if len(game.current_trick) == 4:
             winner = game.complete_trick()
-            await manager.broadcast_to_game({
+            await broadcast_update(game_id, {
                 "type": "trick_complete",
                 "winner": winner,
-                "trick": [{"suit": c.suit.value, "rank": c.rank.value, "value": c.value} for c in game.all_tricks[-1]]
-            }, game_id)
+                "trick": [_CARD_DICTS[c] for c in game.all_tricks[-1]]
+            })
             
             # Check if round is complete (all 8 tricks played)
             if game.is_round_complete():
                 await handle_round_complete(game_id)
-        
-        # Broadcast updated game state
-        await broadcast_game_state(game_id)
     else:
         await manager.send_personal_message({
             "type": "error",
             "message": "Invalid card play"
         }, user_id)
 
-async def handle_pass(game_id: str, user_id: str, message: dict):
-    """Handle a pass action during bidding or gameplay"""
-    if game_id not in manager.games:
-        await manager.send_personal_message({
-            "type": "error",
-            "message": "Game not found"
-        }, user_id)
+async def handle_pass(game_id: str, user_id: str, message: Pass, origin: Optional[str] = None):
+    """Handle a pass action during bidding or gameplay (origin as for handle_play_card)"""
+    session = await _find_session(game_id, user_id)
+    if session is None:
+        return
+    game = session.game
+    player_index = await _find_seat(session, user_id)
+    if player_index is None:
         return
-    
-    game = manager.games[game_id]
-    player_index = manager.user_to_player_index.get(user_id, 0)
     
     # Handle bidding phase pass
     if game.bidding_phase and not game.bidding_complete:
-        if game.pass_bid(player_index):
-            await manager.broadcast_to_game({
+        if game.pass_bid(player_index, origin):
+            await broadcast_update(game_id, {
                 "type": "bid_passed",
                 "player_id": user_id,
                 "player_index": player_index,
                 "passes_in_a_row": game.passes_in_a_row,
                 "bidding_complete": game.bidding_complete
-            }, game_id)
+            })
             
             if game.bidding_complete:
-                await manager.broadcast_to_game({
+                await broadcast_update(game_id, {
                     "type": "bidding_complete",
                     "contract": game.contract_type,
                     "declarer": game.declarer_index
-                }, game_id)
-            
-            await broadcast_game_state(game_id)
+                })
         else:
             await manager.send_personal_message({
                 "type": "error",
@@ -209,16 +431,12 @@ async def handle_pass(game_id: str, user_id: str, message: dict):
         "message": "Cannot pass during gameplay"
     }, user_id)
 
-async def handle_select_contract(game_id: str, user_id: str, message: dict):
+async def handle_select_contract(game_id: str, user_id: str, message: SelectContract):
     """Handle contract selection during bidding phase"""
-    if game_id not in manager.games:
-        await manager.send_personal_message({
-            "type": "error",
-            "message": "Game not found"
-        }, user_id)
+    session = await _find_session(game_id, user_id)
+    if session is None:
         return
-    
-    game = manager.games[game_id]
+    game = session.game
     
     # Must be in bidding phase
     if not game.bidding_phase or game.bidding_complete:
@@ -228,55 +446,25 @@ async def handle_select_contract(game_id: str, user_id: str, message: dict):
         }, user_id)
         return
     
-    # Get player index - try multiple ways
-    player_index = manager.user_to_player_index.get(user_id)
+    player_index = await _find_seat(session, user_id)
     if player_index is None:
-        # Try to find by matching username in game players
-        for idx, player in enumerate(game.players):
-            if player.name == user_id:
-                player_index = idx
-                manager.user_to_player_index[user_id] = idx
-                break
-        if player_index is None:
-            await manager.send_personal_message({
-                "type": "error",
-                "message": "Could not determine your player position"
-            }, user_id)
-            return
-    
-    contract_type = message.get("contract")
-    trump_suit = message.get("trump_suit")
-    called_ace = message.get("called_ace")
-    
-    # Convert to enums - handle string values
-    trump_suit_enum = None
-    if trump_suit:
-        try:
-            trump_suit_enum = Suit(trump_suit)
-        except (ValueError, KeyError):
-            print(f"Invalid trump suit: {trump_suit}")
+        return
     
-    called_ace_enum = None
-    if called_ace:
-        try:
-            called_ace_enum = Suit(called_ace)
-        except (ValueError, KeyError):
-            print(f"Invalid called ace: {called_ace}")
+    trump_suit = message.trump_suit
+    called_ace = message.called_ace
     
     # Make the bid
     try:
-        bid_result = game.make_bid(player_index, contract_type, trump_suit_enum, called_ace_enum)
+        bid_result = game.make_bid(player_index, message.contract, trump_suit, called_ace)
         if bid_result:
-            await manager.broadcast_to_game({
+            await broadcast_update(game_id, {
                 "type": "bid_made",
                 "player_id": user_id,
                 "player_index": player_index,
-                "contract": contract_type,
-                "trump_suit": trump_suit,
-                "called_ace": called_ace
-            }, game_id)
-            
-            await broadcast_game_state(game_id)
+                "contract": message.contract,
+                "trump_suit": trump_suit.value if trump_suit else None,
+                "called_ace": called_ace.value if called_ace else None
+            })
         else:
             # Provide more specific error message
             if player_index != game.current_bidder_index:
@@ -291,136 +479,319 @@ async def handle_select_contract(game_id: str, user_id: str, message: dict):
                 "message": error_msg
             }, user_id)
     except Exception as e:
-        print(f"Error making bid: {e}")
-        import traceback
-        traceback.print_exc()
+        log_event(logger, logging.ERROR, "bid.error", exc_info=True, user_id=user_id, game_id=game_id)
         await manager.send_personal_message({
             "type": "error",
             "message": f"Error processing bid: {str(e)}"
         }, user_id)
 
-async def handle_get_state(game_id: str, user_id: str):
-    """Send current game state to requesting player"""
-    print(f"handle_get_state called for user_id={user_id}, game_id={game_id}")
-    if game_id not in manager.games:
+async def handle_bidding_advice(game_id: str, user_id: str, deadline: Optional[float] = None):
+    """Send the player Monte Carlo estimates for each contract their hand could declare, simulated until deadline"""
+    session = await _find_session(game_id, user_id)
+    if session is None:
+        return
+    game = session.game
+    if not game.bidding_phase or game.bidding_complete:
         await manager.send_personal_message({
             "type": "error",
-            "message": "Game not found"
+            "message": "Bidding advice is only available during bidding"
         }, user_id)
         return
     
-    await send_game_state_to_user(game_id, user_id)
+    player_index = await _find_seat(session, user_id)
+    if player_index is None:
+        return
+    
+    advice = await advisor.advise(to_mask(game.players[player_index].hand), deadline)
+    await manager.send_personal_message({
+        "type": "bidding_advice",
+        "player_index": player_index,
+        "contracts": advice
+    }, user_id)
+
+async def handle_get_state(game_id: str, user_id: str):
+    """Send current game state to requesting player"""
+    session = await _find_session(game_id, user_id)
+    if session is None:
+        return
+    player_index = await _find_seat(session, user_id)
+    if player_index is not None:
+        await send_game_state_to_user(game_id, user_id, player_index)
+
+# Message model -> handler; every handler takes (game_id, user_id, message)
+# (bidding advice is not a command, see handle_message)
+_HANDLERS = {
+    PlayCard: handle_play_card,
+    Pass: handle_pass,
+    SelectContract: handle_select_contract,
+    GetState: lambda game_id, user_id, message: handle_get_state(game_id, user_id),
+}
+
+def _advance_state(session: GameSession) -> Tuple[int, dict, dict]:
+    """Bump a game's state version; returns it with the public state and the fields that changed"""
+    state = public_state(session.game_id, session.game)
+    state["clock"] = _set_clock(session)
+    previous = session.public
+    session.version += 1
+    session.public = state
+    session.last_active = time.monotonic()
+    spectators.publish(session.game_id, session.version, state, session.game)
+    return session.version, state, {key: value for key, value in state.items() if previous.get(key) != value}
 
 async def broadcast_game_state(game_id: str):
-    """Broadcast game state to all players in the game"""
-    if game_id not in manager.games:
+    """Broadcast a full game state snapshot to all players in the game"""
+    session = manager.sessions.get(game_id)
+    if session is None or session.game is None:
         return
     
-    game = manager.games[game_id]
-    
-    # Create game state for each player (only show their own hand)
-    # Use the actual player mapping, not enumerate
-    for user_id in manager.game_players.get(game_id, []):
-        # Get player index from mapping
-        player_index = manager.user_to_player_index.get(user_id)
-        if player_index is None:
-            # Try to find by matching username
-            for idx, player in enumerate(game.players):
-                if player.name == user_id:
-                    player_index = idx
-                    manager.user_to_player_index[user_id] = idx
-                    break
+    # The public part is encoded once; only each seat's own fields differ
+    version, state, _ = _advance_state(session)
+    encoded = EncodedState(session.game, dict(state, version=version, seq=session.record_snapshot()))
+    for user_id, connection in session.connections.items():
+        player_index = session.seats.get(user_id)
         if player_index is not None:
-            await send_game_state_to_user(game_id, user_id, player_index=player_index)
+            connection.send_frame("game_state", encoded.frame(player_index, connection.binary))
+    
+    # Every state change ends in a broadcast, so this is where bots get their turn
+    schedule_bot_turns(game_id)
+
+async def broadcast_update(game_id: str, message: dict):
+    """
+    Broadcast an event as a versioned delta
 
-async def send_game_state_to_user(game_id: str, user_id: str, player_index: int = None):
-    """Send game state to a specific user"""
-    if game_id not in manager.games:
+    The message gets the new state version and the public state fields that
+    changed since the previous version; together with the event itself (e.g.
+    which card was played) that is all clients need to update their copy of
+    the state. A client that sees a version gap asks for a snapshot.
+    """
+    session = manager.sessions.get(game_id)
+    if session is None or session.game is None:
         return
+    version, _, changes = _advance_state(session)
+    message["version"] = version
+    message["changes"] = changes
+    await manager.broadcast_to_game(message, game_id)
     
-    game = manager.games[game_id]
+    # Every state change ends in a broadcast, so this is where bots get their turn
+    schedule_bot_turns(game_id)
+
+def current_turn(game: Game) -> Optional[tuple]:
+    """
+    Whose turn it is, as (phase, player index, progress), or None if nobody is to act
+
+    Progress changes with every move, so two turns of the same player differ.
+    """
+    if game.bidding_phase and not game.bidding_complete:
+        return "bid", game.current_bidder_index, game.bids_made
+    if game.contract is not None and not game.is_round_complete():
+        return "play", game.current_player_index, game.trick_number, len(game.current_trick)
+    return None
+
+def get_bot_to_act(game: Game) -> Optional[int]:
+    """Return the index of the bot whose turn it is, or None if a human (or nobody) is to act"""
+    turn = current_turn(game)
+    if turn is None:
+        return None
+    player_index = turn[1]
+    if player_index >= len(game.players) or not game.players[player_index].is_ai:
+        return None
+    return player_index
+
+def _set_clock(session: GameSession) -> Optional[dict]:
+    """
+    Start the clock of a new turn, if a human is to act
+
+    The one timer wheel in app.api.clocks keeps every game's clock. Returns
+    what clients are told about the running clock: whose it is, how long a
+    turn lasts and when (epoch seconds) it runs out.
+    """
+    turn = current_turn(session.game)
+    if turn == session.turn:
+        return session.clock
+    session.turn = turn
+    session.clock = None
+    game_id = session.game_id
+    clocks.cancel(game_id)
+    if turn is None or turn[1] >= len(session.game.players) or session.game.players[turn[1]].is_ai:
+        return None
+    timeout = BID_TIMEOUT if turn[0] == "bid" else TURN_TIMEOUT
+    if timeout <= 0:
+        return None
+    clocks.arm(game_id, timeout, lambda: session.actor.tell(expire_turn, game_id, turn))
+    session.clock = {"player_index": turn[1], "timeout": timeout, "deadline": round(time.time() + timeout, 3)}
+    return session.clock
+
+async def expire_turn(game_id: str, turn: tuple):
+    """A human's clock ran out: pass for them while bidding, else play a legal card for them"""
+    game = manager.game(game_id)
+    if game is None or current_turn(game) != turn:
+        return  # They moved just in time
+    player_index = turn[1]
+    player = game.players[player_index]
+    log_event(logger, logging.INFO, "clock.expired", game_id=game_id, player_index=player_index, phase=turn[0])
+    if turn[0] == "bid":
+        await handle_pass(game_id, player.name, Pass(), TIMEOUT)
+        return
+    led_suit = game.current_trick[0].suit if game.current_trick else None
+    card = ai_choose_card(player, led_suit, game.contract_type, game.trump_suit)
+    if card is not None:
+        await handle_play_card(game_id, player.name, PlayCard(card=CardChoice(suit=card.suit, rank=card.rank)), TIMEOUT)
+
+def schedule_bot_turns(game_id: str):
+    """Start the bot driver for a game if a bot is to act and none is running"""
+    session = manager.sessions.get(game_id)
+    if session is None or session.game is None or get_bot_to_act(session.game) is None:
+        return
     
-    # Determine player index from mapping - try multiple ways to find it
-    if player_index is None:
-        player_index = manager.user_to_player_index.get(user_id)
-        # If not found, try to find by matching username in game players
+    task = session.bot_task
+    if task is not None and not task.done():
+        return
+    
+    session.bot_task = asyncio.create_task(run_bot_turns(game_id))
+
+async def run_bot_turns(game_id: str):
+    """Play bot seats through the same handlers humans use until a human is to act"""
+    while True:
+        game = manager.game(game_id)
+        if game is None:
+            return
+        player_index = get_bot_to_act(game)
         if player_index is None:
-            for idx, player in enumerate(game.players):
-                if player.name == user_id:
-                    player_index = idx
-                    # Update mapping for future use
-                    manager.user_to_player_index[user_id] = idx
-                    print(f"Found player {user_id} at index {idx} by matching name")
-                    break
+            return
         
-        # Still not found? Default to 0 but log warning
-        if player_index is None:
-            print(f"ERROR: Could not find player index for user_id: {user_id}")
-            print(f"  Available mappings: {manager.user_to_player_index}")
-            print(f"  Game players: {[p.name for p in game.players]}")
-            print(f"  Game ID: {game_id}")
-            player_index = 0
-    
-    # Validate player_index
-    if player_index >= len(game.players):
-        print(f"Error: player_index {player_index} out of range for {len(game.players)} players")
-        player_index = 0
-    
-    # Create state with player's hand visible
-    player_hand = [
-        {"suit": c.suit.value, "rank": c.rank.value, "value": c.value}
-        for c in game.players[player_index].hand
-    ]
-    
-    # Other players' hand sizes (but not cards)
-    other_hands = [
-        len(p.hand) if i != player_index else None
-        for i, p in enumerate(game.players)
-    ]
-    
-    # Get actual player names from game players
-    player_names = [p.name for p in game.players]
-    
-    print(f"Sending game state to {user_id}:")
-    print(f"  Player index: {player_index}")
-    print(f"  Player names: {player_names}")
-    print(f"  Your hand size: {len(player_hand)}")
-    print(f"  Other hands: {other_hands}")
-    
-    state = {
+        await asyncio.sleep(BOT_MOVE_DELAY)
+        
+        # The move is a command like any other, queued behind what humans sent meanwhile
+        session = manager.sessions.get(game_id)
+        if session is None:
+            return
+        try:
+            if not await session.actor.ask(play_bot_turn, game_id, game, player_index):
+                return
+        except Exception:
+            log_event(logger, logging.ERROR, "bot.error", exc_info=True, game_id=game_id, player_index=player_index)
+            return
+
+async def play_bot_turn(game_id: str, game: Game, player_index: int) -> bool:
+    """
+    Make one bot move, if it is still the bot's turn
+
+    Returns False when the driver should stop: the bot had no card to play
+    or the game refused its move.
+    """
+    # The game may have been cleaned up or changed hands while the bot waited
+    if manager.game(game_id) is not game or get_bot_to_act(game) != player_index:
+        return True
+    
+    player = game.players[player_index]
+    progress = (game.bids_made, game.trick_number, len(game.current_trick))
+    if game.bidding_phase and not game.bidding_complete:
+        bid = ai_choose_bid(game, player_index)
+        bids_made = game.bids_made
+        if bid:
+            await handle_select_contract(game_id, player.name, SelectContract(
+                contract=bid["contract"], trump_suit=bid["trump_suit"], called_ace=bid["called_ace"]
+            ))
+        if game.bids_made == bids_made:
+            await handle_pass(game_id, player.name, Pass())
+    else:
+        led_suit = game.current_trick[0].suit if game.current_trick else None
+        card = ai_choose_card(player, led_suit, game.contract_type, game.trump_suit)
+        if card is None:
+            return False
+        await handle_play_card(game_id, player.name, PlayCard(
+            card=CardChoice(suit=card.suit, rank=card.rank)
+        ))
+    
+    # Never spin on a move the game refused
+    return (game.bids_made, game.trick_number, len(game.current_trick)) != progress
+
+def public_state(game_id: str, game: Game) -> dict:
+    """The part of the game state every seat sees"""
+    return {
         "game_id": game_id,
-        "current_trick": [
-            {"suit": c.suit.value, "rank": c.rank.value, "value": c.value}
-            for c in game.current_trick
-        ],
+        "current_trick": [_CARD_DICTS[c] for c in game.current_trick],
         "current_player": game.current_player_index,
-        "your_hand": player_hand,
-        "other_hands": other_hands,
         "contract": game.contract_type,
         "trick_number": game.trick_number,
         "round_complete": game.is_round_complete(),
-        "players": player_names,
-        "your_player_index": player_index,  # CRITICAL: Include this!
+        "players": [p.name for p in game.players],
         "bidding_phase": game.bidding_phase and not game.bidding_complete,
         "current_bidder": game.current_bidder_index if game.bidding_phase else None,
         "highest_bid": game.highest_bid,
         "passes_in_a_row": game.passes_in_a_row
     }
+
+class EncodedState:
+    """
+    A public game state, encoded at most once per protocol
+
+    frame() completes it into a seat's game_state message by appending only
+    that seat's hand, hand sizes and index to the shared encoding.
+    """
+
+    __slots__ = ("game", "state", "_json", "_binary")
+
+    def __init__(self, game: Game, state: dict):
+        self.game = game
+        self.state = state
+        self._json: Optional[bytes] = None
+        self._binary: Optional[bytes] = None
+
+    def _seat_fields(self, player_index: int) -> dict:
+        players = self.game.players
+        return {
+            "your_hand": [_CARD_DICTS[c] for c in players[player_index].hand],
+            # Other players' hand sizes (but not cards)
+            "other_hands": [len(p.hand) if i != player_index else None for i, p in enumerate(players)],
+            "your_player_index": player_index,
+        }
+
+    def frame(self, player_index: int, binary: bool = False):
+        seat = self._seat_fields(player_index)
+        if binary:
+            if self._binary is None:
+                out = bytearray(_BINARY_STATE_PREFIX + wire.map_header(len(self.state) + len(seat)))
+                wire.pack_pairs_into(out, self.state)
+                self._binary = bytes(out)
+            out = bytearray(self._binary)
+            wire.pack_pairs_into(out, seat)
+            return bytes(out)
+        if self._json is None:
+            self._json = orjson.dumps(self.state, option=orjson.OPT_NON_STR_KEYS)
+        return (b'{"type":"game_state","state":' + self._json[:-1] + b"," + orjson.dumps(seat)[1:] + b"}").decode()
+
+# {"type": "game_state", "state": <map>} up to the state map's header
+_BINARY_STATE_PREFIX = wire.map_header(2) + wire.pack("type") + wire.pack("game_state") + wire.pack("state")
+
+async def send_game_state_to_user(game_id: str, user_id: str, player_index: Optional[int] = None):
+    """Send game state to a specific user (at their own seat unless one is given)"""
+    session = manager.sessions.get(game_id)
+    if session is None or session.game is None:
+        return
     
-    await manager.send_personal_message({
-        "type": "game_state",
-        "state": state
-    }, user_id)
+    if player_index is None:
+        player_index = session.seats.get(user_id)
+        if player_index is None:
+            log_event(logger, logging.WARNING, "state.unknown_player", user_id=user_id, game_id=game_id)
+            return
+    
+    connection = session.connections.get(user_id)
+    if connection is not None:
+        state = dict(public_state(game_id, session.game), clock=session.clock, version=session.version, seq=session.seq)
+        encoded = EncodedState(session.game, state)
+        connection.send_frame("game_state", encoded.frame(player_index, connection.binary))
 
 async def handle_round_complete(game_id: str):
     """Handle round completion - calculate scores and save to database"""
-    if game_id not in manager.games:
+    session = manager.sessions.get(game_id)
+    if session is None or session.game is None:
         return
     
-    game = manager.games[game_id]
+    game = session.game
     
     if not game.contract:
-        print(f"Warning: Round complete but no contract set for game {game_id}")
+        log_event(logger, logging.WARNING, "round.no_contract", game_id=game_id)
         return
     
     try:
@@ -430,11 +801,22 @@ async def handle_round_complete(game_id: str):
         game_points = calculate_game_points(round_score, game.contract_type)
         
         # Get room to access user IDs
-        room = manager.game_rooms.get(game_id)
+        room = session.room
         if not room:
-            print(f"Warning: No room found for game {game_id}")
+            log_event(logger, logging.WARNING, "round.no_room", game_id=game_id)
             return
         
+        # Queue the round for post-game analysis (dropped, never awaited, when busy)
+        # and for training-data export
+        from app.api.analysis import pipeline
+        from app.api.training import submit_round
+        from app.game_logic.analysis import round_record
+        room_user_ids = {p["username"]: p["user_id"] for p in room.players}
+        record = round_record(game, [room_user_ids.get(p.name) for p in game.players])
+        if record:
+            pipeline.submit(record)
+            submit_round(record)
+        
         # Save game records and update stats for all players
         from app.database.database import SessionLocal
         from app.database.models import User, GameRecord, PlayerStats
@@ -464,12 +846,12 @@ async def handle_round_complete(game_id: str):
                 # Get integer user_id from map
                 user_id = user_id_map.get(username)
                 if not user_id:
-                    print(f"Warning: Could not find user_id for username {username}")
+                    log_event(logger, logging.WARNING, "round.unknown_user", game_id=game_id, username=username)
                     continue
                 # Get user from database
                 user = db.query(User).filter(User.id == user_id).first()
                 if not user:
-                    print(f"Warning: User {user_id} not found in database")
+                    log_event(logger, logging.WARNING, "round.missing_user", game_id=game_id, db_user_id=user_id)
                     continue
                 
                 # Determine if this player won
@@ -526,18 +908,15 @@ async def handle_round_complete(game_id: str):
                 "type": "round_complete",
                 "scores": round_score,
                 "game_points": game_points,
+                "deal_id": game.deal_id,
                 "message": f"Round complete! {'Declarer team won!' if declarer_won else 'Opponents won!'}"
             }, game_id)
             
-        except Exception as e:
+        except Exception:
             db.rollback()
-            print(f"Error saving game results: {e}")
-            import traceback
-            traceback.print_exc()
+            log_event(logger, logging.ERROR, "round.save_failed", exc_info=True, game_id=game_id)
         finally:
             db.close()
             
-    except Exception as e:
-        print(f"Error handling round completion: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        log_event(logger, logging.ERROR, "round.error", exc_info=True, game_id=game_id)
@@ -0,0 +1,212 @@
+"""
+Compact binary wire format for websocket clients that ask for it
+
+Clients opting in with the SUBPROTOCOL websocket subprotocol exchange
+binary frames holding MessagePack instead of JSON text. Cards, the bulk of
+game traffic, are MessagePack extension values of type CARD_EXT whose single
+data byte is the card's index in bitmask.CARDS, so a card costs 3 bytes
+instead of ~45. Decoding gives back exactly the dicts the JSON protocol
+carries, so handlers and the rest of the server never see the difference.
+"""
+import struct
+from typing import Any, Dict, Tuple
+from app.game_logic.bitmask import CARDS
+
+SUBPROTOCOL = "schafkopf.msgpack.v1"
+
+CARD_EXT = 1
+
+# {"suit", "rank", "value"} dicts as sent for every card, and back
+_CARD_CODES: Dict[Tuple[str, str], int] = {
+    (card.suit.value, card.rank.value): index for index, card in enumerate(CARDS)
+}
+_CARD_DICTS = tuple(
+    {"suit": card.suit.value, "rank": card.rank.value, "value": card.value} for card in CARDS
+)
+
+# Encoded form of short strings seen before (dict keys, suits, message types)
+_STR_CACHE: Dict[str, bytes] = {}
+_STR_CACHE_SIZE = 4096
+
+def _pack_str(value: str) -> bytes:
+    cached = _STR_CACHE.get(value)
+    if cached is not None:
+        return cached
+    data = value.encode()
+    size = len(data)
+    if size < 32:
+        packed = bytes((0xA0 | size,)) + data
+    elif size < 0x100:
+        packed = b"\xd9" + bytes((size,)) + data
+    elif size < 0x10000:
+        packed = b"\xda" + struct.pack(">H", size) + data
+    else:
+        packed = b"\xdb" + struct.pack(">I", size) + data
+    if size <= 32 and len(_STR_CACHE) < _STR_CACHE_SIZE:
+        _STR_CACHE[value] = packed
+    return packed
+
+def _pack_int(value: int) -> bytes:
+    if 0 <= value < 0x80:
+        return bytes((value,))
+    if -32 <= value < 0:
+        return bytes((value & 0xFF,))
+    if value >= 0:
+        if value < 0x100:
+            return b"\xcc" + bytes((value,))
+        if value < 0x10000:
+            return b"\xcd" + struct.pack(">H", value)
+        if value < 0x100000000:
+            return b"\xce" + struct.pack(">I", value)
+        return b"\xcf" + struct.pack(">Q", value)
+    if value >= -0x80:
+        return b"\xd0" + struct.pack(">b", value)
+    if value >= -0x8000:
+        return b"\xd1" + struct.pack(">h", value)
+    if value >= -0x80000000:
+        return b"\xd2" + struct.pack(">i", value)
+    return b"\xd3" + struct.pack(">q", value)
+
+def map_header(size: int) -> bytes:
+    """Header of a map with `size` entries (the entries follow as key, value pairs)"""
+    if size < 16:
+        return bytes((0x80 | size,))
+    if size < 0x10000:
+        return b"\xde" + struct.pack(">H", size)
+    return b"\xdf" + struct.pack(">I", size)
+
+def array_header(size: int) -> bytes:
+    """Header of an array with `size` items (the items follow)"""
+    if size < 16:
+        return bytes((0x90 | size,))
+    if size < 0x10000:
+        return b"\xdc" + struct.pack(">H", size)
+    return b"\xdd" + struct.pack(">I", size)
+
+def _pack_into(out: bytearray, value: Any):
+    kind = type(value)
+    if kind is str:
+        out += _pack_str(value)
+    elif kind is dict:
+        if len(value) == 3 and "suit" in value and "rank" in value:
+            code = _CARD_CODES.get((value["suit"], value["rank"]))
+            if code is not None and value.get("value") == CARDS[code].value:
+                out += b"\xd4\x01" + bytes((code,))
+                return
+        out += map_header(len(value))
+        pack_pairs_into(out, value)
+    elif kind is bool:
+        out += b"\xc3" if value else b"\xc2"
+    elif kind is int:
+        out += _pack_int(value)
+    elif value is None:
+        out += b"\xc0"
+    elif kind is list or kind is tuple:
+        out += array_header(len(value))
+        for item in value:
+            _pack_into(out, item)
+    elif kind is float:
+        out += b"\xcb" + struct.pack(">d", value)
+    elif hasattr(value, "value") and hasattr(type(value), "__members__"):  # Enum
+        _pack_into(out, value.value)
+    else:
+        raise TypeError(f"Cannot encode {kind.__name__}")
+
+def pack_pairs_into(out: bytearray, mapping: dict):
+    """Append a dict's entries without a map header (see map_header)"""
+    for key, item in mapping.items():
+        out += _pack_str(key if type(key) is str else str(key))
+        _pack_into(out, item)
+
+def pack(value: Any) -> bytes:
+    """Encode a JSON-like value"""
+    out = bytearray()
+    _pack_into(out, value)
+    return bytes(out)
+
+class _Reader:
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def take(self, size: int) -> bytes:
+        start = self.pos
+        self.pos = start + size
+        if self.pos > len(self.data):
+            raise ValueError("Truncated message")
+        return self.data[start:self.pos]
+
+    def read(self) -> Any:
+        data = self.data
+        if self.pos >= len(data):
+            raise ValueError("Truncated message")
+        byte = data[self.pos]
+        self.pos += 1
+        if byte < 0x80:
+            return byte
+        if byte >= 0xE0:
+            return byte - 0x100
+        if 0xA0 <= byte <= 0xBF:
+            return self.take(byte & 0x1F).decode()
+        if 0x90 <= byte <= 0x9F:
+            return [self.read() for _ in range(byte & 0x0F)]
+        if 0x80 <= byte <= 0x8F:
+            return self._map(byte & 0x0F)
+        if byte == 0xC0:
+            return None
+        if byte == 0xC2:
+            return False
+        if byte == 0xC3:
+            return True
+        if byte == 0xD4:
+            ext, code = self.take(2)
+            if ext != CARD_EXT or code >= len(_CARD_DICTS):
+                raise ValueError(f"Unknown extension value {ext}:{code}")
+            return dict(_CARD_DICTS[code])
+        fixed = _FIXED.get(byte)
+        if fixed is not None:
+            fmt, size = fixed
+            return struct.unpack(fmt, self.take(size))[0]
+        sized = _SIZED.get(byte)
+        if sized is None:
+            raise ValueError(f"Unsupported type byte 0x{byte:02x}")
+        kind, fmt, size = sized
+        length = struct.unpack(fmt, self.take(size))[0]
+        if kind == "str":
+            return self.take(length).decode()
+        if kind == "array":
+            return [self.read() for _ in range(length)]
+        return self._map(length)
+
+    def _map(self, size: int) -> dict:
+        result = {}
+        for _ in range(size):
+            key = self.read()
+            if type(key) is not str and type(key) is not int:
+                raise ValueError("Map keys must be strings or integers")
+            result[key] = self.read()
+        return result
+
+_FIXED = {
+    0xCC: (">B", 1), 0xCD: (">H", 2), 0xCE: (">I", 4), 0xCF: (">Q", 8),
+    0xD0: (">b", 1), 0xD1: (">h", 2), 0xD2: (">i", 4), 0xD3: (">q", 8),
+    0xCA: (">f", 4), 0xCB: (">d", 8),
+}
+_SIZED = {
+    0xD9: ("str", ">B", 1), 0xDA: ("str", ">H", 2), 0xDB: ("str", ">I", 4),
+    0xDC: ("array", ">H", 2), 0xDD: ("array", ">I", 4),
+    0xDE: ("map", ">H", 2), 0xDF: ("map", ">I", 4),
+}
+
+def unpack(data: bytes) -> Any:
+    """Decode one value; raises ValueError on malformed or trailing data"""
+    reader = _Reader(data)
+    try:
+        value = reader.read()
+    except RecursionError:
+        raise ValueError("Message nested too deeply")
+    if reader.pos != len(data):
+        raise ValueError("Trailing data after message")
+    return value
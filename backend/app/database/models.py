@@ -58,3 +58,29 @@ class PlayerStats(Base):
     
     # Relationships
     user = relationship("User", back_populates="stats")
+
+class RoundAnalysis(Base):
+    """Post-game analysis of a single round (compact JSON blob)"""
+    __tablename__ = "round_analyses"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    game_id = Column(String, index=True, nullable=False)
+    round_number = Column(Integer, default=0)
+    contract_type = Column(String)
+    analysis = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    # Relationships
+    participants = relationship("RoundAnalysisPlayer", back_populates="analysis")
+
+class RoundAnalysisPlayer(Base):
+    """Links a round analysis to the users who played in it"""
+    __tablename__ = "round_analysis_players"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    analysis_id = Column(Integer, ForeignKey("round_analyses.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    player_index = Column(Integer)
+    
+    # Relationships
+    analysis = relationship("RoundAnalysis", back_populates="participants")
@@ -8,7 +8,8 @@ def ai_choose_card(
     player: Player,
     led_suit: Optional[Suit],
     contract_type: str,
-    trump_suit: Optional[Suit] = None
+    trump_suit: Optional[Suit] = None,
+    rng=random,
 ) -> Optional[Card]:
     """
     Basic AI: Choose a random valid card to play
@@ -18,6 +19,7 @@ def ai_choose_card(
         led_suit: The suit that was led (None if leading)
         contract_type: Type of contract
         trump_suit: For Solo contracts, the chosen trump suit
+        rng: Random generator to draw from (the global one by default)
     
     Returns:
         A card to play, or None if no valid plays
@@ -28,11 +30,12 @@ def ai_choose_card(
         return None
     
     # For now, just return a random valid card
-    return random.choice(valid_plays)
+    return rng.choice(valid_plays)
 
 def ai_choose_contract(
     player: Player,
-    available_contracts: List[str]
+    available_contracts: List[str],
+    rng=random,
 ) -> Optional[str]:
     """
     Basic AI: Choose a contract to play
@@ -45,12 +48,12 @@ def ai_choose_contract(
         Contract type to play, or None to pass
     """
     # For now, randomly decide whether to play or pass
-    if random.random() < 0.3:  # 30% chance to play
+    if rng.random() < 0.3:  # 30% chance to play
         if available_contracts:
-            return random.choice(available_contracts)
+            return rng.choice(available_contracts)
     return None
 
-def ai_choose_called_ace(player: Player) -> Optional[Suit]:
+def ai_choose_called_ace(player: Player, rng=random) -> Optional[Suit]:
     """
     AI chooses which Ace to call in Rufer contract
     
@@ -68,10 +71,10 @@ def ai_choose_called_ace(player: Player) -> Optional[Suit]:
     available_aces = [suit for suit in all_suits if suit not in player_aces]
     
     if available_aces:
-        return random.choice(available_aces)
+        return rng.choice(available_aces)
     return None
 
-def ai_choose_trump_suit(player: Player) -> Suit:
+def ai_choose_trump_suit(player: Player, rng=random) -> Suit:
     """
     AI chooses trump suit for Solo contract
     
@@ -94,6 +97,50 @@ def ai_choose_trump_suit(player: Player) -> Suit:
     # Return suit with most high cards, or random if tie
     max_count = max(suit_counts.values())
     best_suits = [suit for suit, count in suit_counts.items() if count == max_count]
-    return random.choice(best_suits)
+    return rng.choice(best_suits)
 
 
+
+def ai_choose_bid(game, player_index: int, rng=random) -> Optional[dict]:
+    """
+    AI decides on a bid during the bidding phase
+    
+    Only contracts that outrank the current highest bid are considered, so
+    any returned bid is one the game will accept.
+    
+    Args:
+        game: The game in its bidding phase
+        player_index: Index of the AI player to bid for
+        rng: Random generator to draw from (the global one by default)
+    
+    Returns:
+        Dict with contract, trump_suit and called_ace, or None to pass
+    """
+    player = game.players[player_index]
+    
+    highest_rank = 0
+    if game.highest_bid:
+        highest_trump = game.highest_bid.get("trump_suit")
+        highest_rank = game.get_contract_rank(
+            game.highest_bid["contract_type"],
+            Suit(highest_trump) if highest_trump else None,
+            is_suited=bool(highest_trump) and game.highest_bid["contract_type"] == "Wenz",
+        )
+    
+    available_contracts = [
+        contract for contract in ["Rufer", "Wenz", "Solo"]
+        if game.get_contract_rank(contract) > highest_rank
+    ]
+    called_ace = ai_choose_called_ace(player, rng)
+    if called_ace is None and "Rufer" in available_contracts:
+        available_contracts.remove("Rufer")
+    
+    contract_type = ai_choose_contract(player, available_contracts, rng)
+    if contract_type is None:
+        return None
+    
+    return {
+        "contract": contract_type,
+        "trump_suit": ai_choose_trump_suit(player, rng) if contract_type == "Solo" else None,
+        "called_ace": called_ace if contract_type == "Rufer" else None,
+    }
@@ -0,0 +1,153 @@
+from typing import List, Optional
+from app.models.card import Suit
+from app.game_logic.bitmask import CARDS, card_index, to_mask, popcount, valid_plays
+from app.game_logic.solver import Solver
+from app.models.game import HUMAN
+
+# Declarer team needs this many points to win
+WINNING_POINTS = 61
+
+# Exact point values are only computed once this few tricks remain; earlier
+# decisions are judged on win/loss alone, which is far cheaper to prove
+EXACT_TRICKS = 4
+
+# Giving away at least this many points (with exact values) counts as a mistake
+MISTAKE_POINTS = 10
+
+ANALYSIS_VERSION = 2
+
+def round_record(game, user_ids: Optional[List[Optional[int]]] = None) -> Optional[dict]:
+    """
+    Capture what is needed to replay a finished round
+
+    The record only holds ints and strings so it can be pickled to a worker
+    process cheaply. Returns None if the round cannot be replayed.
+    """
+    if game.contract is None or not game.initial_hands or not game.play_log:
+        return None
+
+    called_ace = getattr(game.contract, "called_ace_suit", None)
+    return {
+        "game_id": game.game_id,
+        "round_number": game.round_number,
+        "deal_id": game.deal_id,
+        "contract_type": game.contract_type,
+        "trump_suit": game.trump_suit.value if game.trump_suit else None,
+        "called_ace": called_ace.value if called_ace else None,
+        "declarer_index": game.declarer_index,
+        "partner_index": game.partner_index,
+        "players": [p.name for p in game.players],
+        "user_ids": user_ids or [None] * len(game.players),
+        "hands": [to_mask(hand) for hand in game.initial_hands],
+        "plays": [[player_index, card_index(card)] for player_index, card, _ in game.play_log],
+        # [seat, contract_type, trump_suit, called_ace]; a pass has no contract
+        "bids": [
+            [player_index] + ([bid["contract_type"], bid["trump_suit"], bid["called_ace"]] if bid else [None] * 3)
+            for player_index, bid, _ in game.bid_log
+        ],
+        # Who made each play and bid ("human", "timeout" or "bot"), see Game.move_origin
+        "play_origins": [origin for _, _, origin in game.play_log],
+        "bid_origins": [origin for _, _, origin in game.bid_log],
+    }
+
+def move_origins(record: dict, kind: str) -> List[str]:
+    """Origins of a record's "plays" or "bids"; records without them count every move as human"""
+    return record.get("play_origins" if kind == "plays" else "bid_origins") or [HUMAN] * len(record[kind])
+
+def analyze_round(
+    record: dict,
+    exact_tricks: int = EXACT_TRICKS,
+    table=None,
+) -> dict:
+    """
+    Replay a round and judge every decision against best (double-dummy) play
+
+    Each move is stored as [seat, card, best_win, played_win, best_points,
+    played_points]: whether the declarer team could still win with best play
+    before the move and after it, and, near the end of the round, the exact
+    declarer-team points for the best and the played card. Points are None
+    where only win/loss was computed; forced moves store None throughout, and
+    so do moves that were not a human's decision (a bot's, or one the server
+    made when a clock ran out), which are never listed as mistakes.
+    """
+    trump_suit = Suit(record["trump_suit"]) if record["trump_suit"] else None
+    declarer = record["declarer_index"]
+    partner = record["partner_index"]
+    team = [declarer] if partner is None or record["contract_type"] != "Rufer" else [declarer, partner]
+    solver = Solver(record["contract_type"], team, trump_suit, table=table)
+
+    hands = list(record["hands"])
+    plays = record["plays"]
+    origins = move_origins(record, "plays")
+    leader = plays[0][0] if plays else declarer
+    trick: List[int] = []
+    collected = 0  # Declarer-team points from finished tricks
+    moves = []
+    mistakes = []
+
+    for number, (seat, card) in enumerate(plays):
+        on_team = seat in team
+        tricks_left = popcount(hands[seat])
+        legal = valid_plays(hands[seat], trick[0] if trick else None)
+
+        entry = [seat, card, None, None, None, None]
+        if origins[number] == HUMAN and popcount(legal) > 1:
+            outcomes = solver.move_outcomes(hands, leader, WINNING_POINTS - collected, trick)
+            entry[2] = any(outcomes.values()) if on_team else all(outcomes.values())
+            entry[3] = outcomes[card]
+            if tricks_left <= exact_tricks:
+                values = solver.move_values(hands, leader, trick)
+                entry[4] = collected + (max(values.values()) if on_team else min(values.values()))
+                entry[5] = collected + values[card]
+
+            lost_game = entry[2] != entry[3]
+            lost_points = entry[4] is not None and abs(entry[4] - entry[5]) >= MISTAKE_POINTS
+            if lost_game or lost_points:
+                mistakes.append(number)
+        moves.append(entry)
+
+        # Apply the move
+        hands[seat] ^= 1 << card
+        trick.append(card)
+        if len(trick) == 4:
+            winner, gain = solver.finish_trick(leader, trick)
+            collected += gain
+            leader = winner
+            trick = []
+
+    return {
+        "version": ANALYSIS_VERSION,
+        "game_id": record["game_id"],
+        "round_number": record["round_number"],
+        "deal_id": record.get("deal_id"),
+        "contract_type": record["contract_type"],
+        "trump_suit": record["trump_suit"],
+        "called_ace": record["called_ace"],
+        "declarer_index": declarer,
+        "partner_index": partner,
+        "players": record["players"],
+        "team_points": collected,
+        "moves": moves,
+        "origins": origins,
+        "mistakes": mistakes,
+        "nodes": solver.nodes,
+    }
+
+def expand_analysis(analysis: dict) -> dict:
+    """Turn the compact analysis into a readable form for API responses"""
+    moves = []
+    origins = analysis.get("origins") or [HUMAN] * len(analysis["moves"])
+    for (seat, card, best_win, played_win, best_points, played_points), origin in zip(analysis["moves"], origins):
+        moves.append({
+            "player_index": seat,
+            "card": {"suit": CARDS[card].suit.value, "rank": CARDS[card].rank.value, "value": CARDS[card].value},
+            "origin": origin,
+            "forced": best_win is None if origin == HUMAN else None,
+            "best_outcome_win": best_win,
+            "played_outcome_win": played_win,
+            "best_points": best_points,
+            "played_points": played_points,
+        })
+    expanded = {k: v for k, v in analysis.items() if k not in ("moves", "origins", "nodes")}
+    expanded["moves"] = moves
+    return expanded
@@ -0,0 +1,182 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.models.card import Suit
+from app.game_logic.bitmask import FULL_DECK, POINTS, get_tables, valid_plays, iter_bits, find_partner
+from app.game_logic.deal_analyzer import seat_contracts
+from app.game_logic.analysis import WINNING_POINTS
+
+Contract = Tuple[str, Optional[str], Optional[str]]
+
+def _choose_card(hand: int, trick: List[int], seat: int, leader: int, team: Sequence[bool], tables) -> int:
+    """
+    Simple open-handed playing policy for simulated rounds
+
+    The declarer team leads trumps, everyone else cashes plain aces; followers
+    add points when their side is winning the trick, otherwise win it as
+    cheaply as possible or throw their least valuable card.
+    """
+    cards = list(iter_bits(valid_plays(hand, trick[0] if trick else None)))
+    if len(cards) == 1:
+        return cards[0]
+    strength = tables.strength
+    is_trump = tables.is_trump
+
+    if not trick:
+        if team[seat]:
+            trumps = [c for c in cards if is_trump[c]]
+            if trumps:
+                return max(trumps, key=strength.__getitem__)
+        aces = [c for c in cards if not is_trump[c] and POINTS[c] == 11]
+        if aces:
+            return aces[0]
+        return min(cards, key=lambda c: (POINTS[c], strength[c]))
+
+    winning_seat = (leader + tables.trick_winner(trick)) % 4
+    if team[winning_seat] == team[seat]:
+        # Partner is winning: add points, keeping trumps back
+        return max(cards, key=lambda c: (not is_trump[c], POINTS[c], -strength[c]))
+    position = len(trick)
+    winners = [c for c in cards if tables.trick_winner(trick + [c]) == position]
+    if winners:
+        return min(winners, key=strength.__getitem__)
+    return min(cards, key=lambda c: (POINTS[c], strength[c]))
+
+def playout(hands: Sequence[int], declarer: int, team: Sequence[bool], tables) -> int:
+    """Play a round out with _choose_card; returns the declarer team's points"""
+    hands = list(hands)
+    leader = declarer
+    points = 0
+    while hands[leader]:
+        trick: List[int] = []
+        for position in range(4):
+            seat = (leader + position) % 4
+            card = _choose_card(hands[seat], trick, seat, leader, team, tables)
+            hands[seat] ^= 1 << card
+            trick.append(card)
+        winner = (leader + tables.trick_winner(trick)) % 4
+        if team[winner]:
+            points += POINTS[trick[0]] + POINTS[trick[1]] + POINTS[trick[2]] + POINTS[trick[3]]
+        leader = winner
+    return points
+
+def simulate_hand(hand: int, contracts: List[Contract], samples: int, deadline: float, seed: int) -> Dict:
+    """
+    Deal the 24 unseen cards at random and play every contract out
+
+    The asking hand sits at seat 0 and declares (so it also leads). Stops
+    after `samples` deals or at `deadline` (time.time() seconds, so it means
+    the same in every worker process), whichever comes first. Returns
+    per-contract [wins, points] totals and the number of deals.
+    """
+    rng = random.Random(seed)
+    unseen = list(iter_bits(FULL_DECK ^ hand))
+    tables = [get_tables(c[0], Suit(c[1]) if c[1] else None) for c in contracts]
+    totals = [[0, 0] for _ in contracts]
+    done = 0
+    while done < samples and time.time() < deadline:
+        rng.shuffle(unseen)
+        hands = [hand] + [sum(1 << c for c in unseen[i * 8:i * 8 + 8]) for i in range(3)]
+        for index, (contract_type, _, called_ace) in enumerate(contracts):
+            partner = find_partner(hands, 0, Suit(called_ace)) if called_ace else None
+            team = tuple(seat == 0 or seat == partner for seat in range(4))
+            points = playout(hands, 0, team, tables[index])
+            totals[index][0] += points >= WINNING_POINTS
+            totals[index][1] += points
+        done += 1
+    return {"samples": done, "totals": totals}
+
+class BiddingAdvisor:
+    """
+    Monte Carlo win probability and expected points for a hand
+
+    Samples are split across a process pool, all chunks bounded by one
+    deadline, `budget` seconds after the request came in (time spent waiting
+    for a worker counts). Estimates are cached per hand and contract; the
+    declarer always leads, so they do not depend on where the asking seat
+    sits. Hands that only differ by a suit relabelling are not shared:
+    following suit goes by the printed suit of the led card, Obers and Unters
+    included, so no relabelling leaves the play unchanged.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        samples: int = 400,
+        budget: float = 1.0,
+        cache_size: int = 32768,
+        executor: Optional[Executor] = None,
+    ):
+        self.workers = workers
+        self.samples = samples
+        self.budget = budget
+        self.cache_size = cache_size  # contract estimates, up to 8 per hand
+        self.cache: "OrderedDict[Tuple, dict]" = OrderedDict()
+        self.executor = executor
+        self.hits = 0
+        self.misses = 0
+
+    async def advise(self, hand: int, deadline: Optional[float] = None) -> List[dict]:
+        """
+        Estimates for every contract the hand may declare
+
+        The simulation stops at `deadline` (time.time() seconds); by default
+        that is `budget` seconds from now.
+        """
+        deadline = time.time() + self.budget if deadline is None else deadline
+        contracts = seat_contracts(hand)
+        found: Dict[Contract, dict] = {}
+        missing: List[Contract] = []
+        for contract in contracts:
+            estimate = self.cache.get((hand, contract))
+            if estimate is not None:
+                self.cache.move_to_end((hand, contract))
+                found[contract] = estimate
+            else:
+                missing.append(contract)
+        if missing:
+            self.misses += 1
+            for contract, estimate in zip(missing, await self._simulate(hand, missing, deadline)):
+                found[contract] = self.cache[(hand, contract)] = estimate
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.hits += 1
+
+        return [
+            {"contract_type": contract_type, "trump_suit": trump_suit, "called_ace": called_ace,
+             **found[(contract_type, trump_suit, called_ace)]}
+            for contract_type, trump_suit, called_ace in contracts
+        ]
+
+    async def _simulate(self, hand: int, contracts: List[Contract], deadline: float) -> List[dict]:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        chunk = -(-self.samples // self.workers)
+        loop = asyncio.get_running_loop()
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(
+                self.executor, simulate_hand, hand, contracts, chunk, deadline, hand * self.workers + i
+            )
+            for i in range(self.workers)
+        ))
+
+        samples = sum(part["samples"] for part in parts)
+        estimates = []
+        for index in range(len(contracts)):
+            wins = sum(part["totals"][index][0] for part in parts)
+            points = sum(part["totals"][index][1] for part in parts)
+            estimates.append({
+                "win_probability": round(wins / samples, 3) if samples else None,
+                "expected_points": round(points / samples, 1) if samples else None,
+                "samples": samples,
+            })
+        return estimates
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
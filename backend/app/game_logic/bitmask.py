@@ -0,0 +1,189 @@
+from functools import cmp_to_key
+from typing import Dict, List, Optional, Tuple
+from app.models.card import Card, Suit, Rank
+from app.models.deck import Deck
+
+# Cards are numbered 0-31 in the order Deck creates them, so a hand or any
+# other set of cards fits in a single int bitmask.
+CARDS: Tuple[Card, ...] = tuple(Deck().cards)
+CARD_INDEX: Dict[Tuple[Suit, Rank], int] = {
+    (card.suit, card.rank): index for index, card in enumerate(CARDS)
+}
+SUITS: Tuple[Suit, ...] = (Suit.EICHEL, Suit.GRAS, Suit.HERZ, Suit.SCHELLEN)
+SUIT_OF: Tuple[int, ...] = tuple(SUITS.index(card.suit) for card in CARDS)
+POINTS: Tuple[int, ...] = tuple(card.value for card in CARDS)
+SUIT_MASKS: Tuple[int, ...] = tuple(
+    sum(1 << i for i in range(32) if SUIT_OF[i] == suit) for suit in range(4)
+)
+FULL_DECK = (1 << 32) - 1
+
+# Strength offset that puts every trump above every plain card
+TRUMP_BASE = 100
+
+def card_index(card: Card) -> int:
+    """Get the bit index of a card"""
+    return CARD_INDEX[(card.suit, card.rank)]
+
+def to_mask(cards: List[Card]) -> int:
+    """Convert a list of cards to a bitmask"""
+    mask = 0
+    for card in cards:
+        mask |= 1 << CARD_INDEX[(card.suit, card.rank)]
+    return mask
+
+def to_cards(mask: int) -> List[Card]:
+    """Convert a bitmask back to cards (in deck order)"""
+    return [CARDS[i] for i in iter_bits(mask)]
+
+def iter_bits(mask: int):
+    """Yield the indices of set bits, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def popcount(mask: int) -> int:
+    """Count the cards in a mask"""
+    return bin(mask).count("1")
+
+def mask_points(mask: int) -> int:
+    """Sum the card points in a mask"""
+    return sum(POINTS[i] for i in iter_bits(mask))
+
+class RuleTables:
+    """
+    Precomputed card strengths for one contract.
+
+    Strengths are derived from Card.is_trump and Card.compare_to, so the
+    bitmask engine ranks cards exactly like the object model: trumps get
+    TRUMP_BASE plus their trump rank, plain cards their rank within the suit
+    (they only count when they follow the led suit).
+    """
+
+    __slots__ = (
+        "contract_type", "trump_suit", "strength", "is_trump", "trump_mask",
+        "groups", "group_of", "between",
+    )
+
+    def __init__(self, contract_type: str, trump_suit: Optional[Suit] = None):
+        self.contract_type = contract_type
+        self.trump_suit = trump_suit
+
+        trump_flags = [card.is_trump(contract_type, trump_suit) for card in CARDS]
+        trumps = sorted(
+            (card for card, trump in zip(CARDS, trump_flags) if trump),
+            key=cmp_to_key(lambda a, b: a._compare_trump_ranks(b)),
+        )
+        strength = [0] * 32
+        groups = [tuple(card_index(card) for card in reversed(trumps))]
+        for order, card in enumerate(trumps):
+            strength[card_index(card)] = TRUMP_BASE + order + 1
+        for suit in SUITS:
+            plain = sorted(
+                (card for card, trump in zip(CARDS, trump_flags) if not trump and card.suit == suit),
+                key=cmp_to_key(lambda a, b: a._compare_non_trump_ranks(b)),
+            )
+            for order, card in enumerate(plain):
+                strength[card_index(card)] = order + 1
+            groups.append(tuple(card_index(card) for card in reversed(plain)))
+
+        self.strength: Tuple[int, ...] = tuple(strength)
+        self.is_trump: Tuple[bool, ...] = tuple(trump_flags)
+        self.trump_mask = sum(1 << i for i in range(32) if trump_flags[i])
+        # Cards of each group (trumps, then each plain suit), strongest first
+        self.groups: Tuple[Tuple[int, ...], ...] = tuple(groups)
+        group_of = [0] * 32
+        between = [[0] * 32 for _ in range(32)]
+        for group_index, group in enumerate(self.groups):
+            for position, card in enumerate(group):
+                group_of[card] = group_index
+                for lower_position in range(position + 1, len(group)):
+                    mask = 0
+                    for middle in group[position + 1:lower_position]:
+                        mask |= 1 << middle
+                    between[card][group[lower_position]] = mask
+        self.group_of: Tuple[int, ...] = tuple(group_of)
+        # between[a][b]: cards ranked strictly between a and b (same group, a above b)
+        self.between: Tuple[Tuple[int, ...], ...] = tuple(tuple(row) for row in between)
+
+    def trick_winner(self, trick: List[int]) -> int:
+        """
+        Determine the winning position (0-3) within a trick of card indices
+        """
+        strength = self.strength
+        led_suit = SUIT_OF[trick[0]]
+        best = 0
+        best_strength = strength[trick[0]]
+        for position in range(1, len(trick)):
+            card = trick[position]
+            card_strength = strength[card]
+            if card_strength < TRUMP_BASE and SUIT_OF[card] != led_suit:
+                continue
+            if card_strength > best_strength:
+                best = position
+                best_strength = card_strength
+        return best
+
+_TABLES: Dict[Tuple[str, Optional[Suit]], RuleTables] = {}
+
+def get_tables(contract_type: str, trump_suit: Optional[Suit] = None) -> RuleTables:
+    """Get the (cached) rule tables for a contract"""
+    key = (contract_type, trump_suit if contract_type == "Solo" else None)
+    tables = _TABLES.get(key)
+    if tables is None:
+        tables = RuleTables(contract_type, key[1])
+        _TABLES[key] = tables
+    return tables
+
+def valid_plays(hand: int, led_card: Optional[int]) -> int:
+    """
+    Get the mask of cards that may be played
+
+    Mirrors get_valid_plays: follow the suit printed on the led card if
+    possible, otherwise play anything.
+    """
+    if led_card is None:
+        return hand
+    follow = hand & SUIT_MASKS[SUIT_OF[led_card]]
+    return follow or hand
+
+def find_partner(hands: List[int], declarer_index: int, called_ace: Suit) -> Optional[int]:
+    """Find the seat holding the called ace (Rufer)"""
+    ace = 1 << CARD_INDEX[(called_ace, Rank.ACE)]
+    for index, hand in enumerate(hands):
+        if index != declarer_index and hand & ace:
+            return index
+    return None
+
+def score_tricks(
+    tricks: List[Tuple[int, int]],
+    contract_type: str,
+    declarer_index: int,
+    partner_index: Optional[int] = None,
+) -> dict:
+    """
+    Score a finished round from (winner, trick mask) pairs
+
+    Returns the same fields as calculate_round_score.
+    """
+    points = [0, 0, 0, 0]
+    trick_counts = [0, 0, 0, 0]
+    for winner, trick_mask in tricks:
+        points[winner] += mask_points(trick_mask)
+        trick_counts[winner] += 1
+
+    team = {declarer_index}
+    if contract_type == "Rufer" and partner_index is not None:
+        team.add(partner_index)
+    team_points = sum(points[i] for i in team)
+    team_tricks = sum(trick_counts[i] for i in team)
+
+    return {
+        "declarer_points": points[declarer_index],
+        "team_points": team_points,
+        "opponents_points": sum(points) - team_points,
+        "won": team_points >= 61,
+        "schneider": team_points >= 91,
+        "schwarz": team_tricks == 8,
+        "declarer_tricks": trick_counts[declarer_index],
+    }
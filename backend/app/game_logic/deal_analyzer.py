@@ -0,0 +1,166 @@
+"""
+Best-play outcome of every contract on a known deal
+
+Run from the backend directory to analyse a deal from a JSON file (four lists
+of {"suit", "rank"} cards, seat 0 first) or a random deal:
+
+    python -m app.game_logic.deal_analyzer --file deal.json
+    python -m app.game_logic.deal_analyzer --seed 42 --workers 4
+"""
+import argparse
+import json
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+from app.models.card import Card, Suit, Rank
+from app.models.deck import Deck
+from app.game_logic.bitmask import CARD_INDEX, FULL_DECK, SUITS, find_partner, popcount, to_cards, to_mask
+from app.game_logic.solver import Solver
+from app.game_logic.analysis import WINNING_POINTS
+
+SCHNEIDER_POINTS = 91
+# Opponents' side of Schneider: the declarer team needs this many to avoid it
+SCHNEIDER_FREE_POINTS = 31
+
+# (seat, contract_type, trump_suit, called_ace) with suits as their string values
+ContractTask = Tuple[int, str, Optional[str], Optional[str]]
+
+def parse_hands(hands: Sequence[Sequence[dict]]) -> List[int]:
+    """
+    Convert four hands of {"suit", "rank"} dicts to masks
+
+    Raises ValueError unless the hands are a complete deal of 8 cards each.
+    """
+    if len(hands) != 4:
+        raise ValueError("A deal needs exactly 4 hands")
+    masks = []
+    for seat, hand in enumerate(hands):
+        try:
+            mask = to_mask([Card(Suit(card["suit"]), Rank(card["rank"])) for card in hand])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Hand {seat} contains an invalid card")
+        if len(hand) != 8 or popcount(mask) != 8:
+            raise ValueError(f"Hand {seat} must hold 8 different cards")
+        masks.append(mask)
+    if masks[0] | masks[1] | masks[2] | masks[3] != FULL_DECK:
+        raise ValueError("The hands must contain every card exactly once")
+    return masks
+
+def canonical_deal(hands: Sequence[int]) -> Tuple[str, int]:
+    """
+    Canonical key of a deal and the seat rotation that produces it
+
+    Contract results depend only on seats relative to the declarer (who
+    leads the first trick), so all four rotations of a deal share one key.
+    Canonical seat i is original seat (i + rotation) % 4.
+    """
+    rotations = [tuple(hands[(seat + r) % 4] for seat in range(4)) for r in range(4)]
+    rotation = min(range(4), key=rotations.__getitem__)
+    return "".join(f"{mask:08x}" for mask in rotations[rotation]), rotation
+
+def seat_contracts(hand: int) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Every contract a hand may declare, as (contract_type, trump_suit, called_ace)
+
+    Rufer once per ace the hand does not hold (as make_bid allows), Wenz,
+    and Solo in each suit.
+    """
+    contracts: List[Tuple[str, Optional[str], Optional[str]]] = []
+    for suit in SUITS:
+        if not hand >> CARD_INDEX[(suit, Rank.ACE)] & 1:
+            contracts.append(("Rufer", None, suit.value))
+    contracts.append(("Wenz", None, None))
+    for suit in SUITS:
+        contracts.append(("Solo", suit.value, None))
+    return contracts
+
+def contract_variants(hands: Sequence[int]) -> List[ContractTask]:
+    """Every contract each seat may declare"""
+    return [(seat, *contract) for seat, hand in enumerate(hands) for contract in seat_contracts(hand)]
+
+def evaluate_contract(
+    hands: Sequence[int],
+    seat: int,
+    contract_type: str,
+    trump_suit: Optional[str],
+    called_ace: Optional[str],
+) -> dict:
+    """
+    Outcome of a contract with best play by all four seats
+
+    Only the thresholds that decide the score are proven (61 points to win,
+    then 91 for Schneider or 31 to avoid being Schneider) rather than the
+    exact point total, which on some deals takes orders of magnitude longer.
+    """
+    partner = find_partner(list(hands), seat, Suit(called_ace)) if called_ace else None
+    team = [seat] if partner is None else [seat, partner]
+    solver = Solver(contract_type, team, Suit(trump_suit) if trump_suit else None)
+    won = solver.reaches(list(hands), seat, WINNING_POINTS)
+    if won:
+        schneider = solver.reaches(list(hands), seat, SCHNEIDER_POINTS)
+        schneider_lost = False
+    else:
+        schneider = False
+        schneider_lost = not solver.reaches(list(hands), seat, SCHNEIDER_FREE_POINTS)
+    return {
+        "seat": seat,
+        "contract_type": contract_type,
+        "trump_suit": trump_suit,
+        "called_ace": called_ace,
+        "partner": partner,
+        "won": won,
+        "schneider": schneider,
+        "schneider_lost": schneider_lost,
+        "nodes": solver.nodes,
+    }
+
+def rotate_results(results: List[dict], rotation: int) -> List[dict]:
+    """Renumber seats of canonical-deal results back to the caller's seating"""
+    rotated = []
+    for result in results:
+        result = dict(result, seat=(result["seat"] + rotation) % 4)
+        if result["partner"] is not None:
+            result["partner"] = (result["partner"] + rotation) % 4
+        rotated.append(result)
+    return sorted(rotated, key=lambda r: r["seat"])
+
+def analyze_deal(hands: Sequence[int], executor: Optional[Executor] = None) -> List[dict]:
+    """Evaluate every contract variant, in parallel when an executor is given"""
+    tasks = contract_variants(hands)
+    if executor is None:
+        return [evaluate_contract(hands, *task) for task in tasks]
+    return list(executor.map(evaluate_contract, [hands] * len(tasks), *zip(*tasks)))
+
+def _random_deal(seed: int) -> List[int]:
+    deck = Deck()
+    random.Random(seed).shuffle(deck.cards)
+    return [to_mask(deck.cards[seat * 8:seat * 8 + 8]) for seat in range(4)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="JSON file with four hands")
+    source.add_argument("--seed", type=int, help="analyse a random deal")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file) as f:
+            hands = parse_hands(json.load(f))
+    else:
+        hands = _random_deal(args.seed)
+
+    for seat, hand in enumerate(hands):
+        print(f"Seat {seat}: " + ", ".join(f"{c.suit.value} {c.rank.value}" for c in to_cards(hand)))
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = analyze_deal(hands, executor)
+    for r in results:
+        variant = r["trump_suit"] or r["called_ace"] or ""
+        partner = f" with seat {r['partner']}" if r["partner"] is not None else ""
+        outcome = "wins" if r["won"] else "loses"
+        if r["schneider"] or r["schneider_lost"]:
+            outcome += " Schneider"
+        print(f"Seat {r['seat']} {r['contract_type']} {variant}{partner}: {outcome}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import random
+from typing import Dict, List, Optional, Tuple
+from app.models.card import Card
+from app.game_logic.bitmask import CARDS, to_cards, to_mask
+
+# Deals generated per pool unless asked for more
+DEFAULT_POOL_SIZE = 64
+
+class DealPool:
+    """
+    A fixed set of deals addressed by a seed
+
+    The same seed yields the same deals on every server, so all tables of a
+    tournament can play deal n of a pool. Each table may rotate the seats
+    (hand i goes to seat i + rotation), and the deal id stays the same, so
+    results can be compared per deal across tables.
+    """
+
+    __slots__ = ("seed", "deals", "first_bidders")
+
+    def __init__(self, seed: int, size: int = DEFAULT_POOL_SIZE):
+        rng = random.Random(seed)
+        cards = list(CARDS)
+        deals = []
+        first_bidders = []
+        for _ in range(size):
+            rng.shuffle(cards)
+            deals.append(tuple(to_mask(cards[seat * 8:seat * 8 + 8]) for seat in range(4)))
+            first_bidders.append(rng.randrange(4))
+        self.seed = seed
+        # Hands as masks, (seat 0, 1, 2, 3) per deal
+        self.deals: Tuple[Tuple[int, ...], ...] = tuple(deals)
+        self.first_bidders: Tuple[int, ...] = tuple(first_bidders)
+
+    def __len__(self) -> int:
+        return len(self.deals)
+
+    def deal_id(self, round_number: int) -> str:
+        return f"{self.seed}:{round_number % len(self.deals)}"
+
+    def hands(self, round_number: int, rotation: int = 0) -> List[List[Card]]:
+        """Hands for a round (wrapping around the pool), seats rotated by `rotation`"""
+        deal = self.deals[round_number % len(self.deals)]
+        return [to_cards(deal[(seat - rotation) % 4]) for seat in range(4)]
+
+    def first_bidder(self, round_number: int, rotation: int = 0) -> int:
+        """Seat that bids first, rotated along with the hands"""
+        return (self.first_bidders[round_number % len(self.deals)] + rotation) % 4
+
+_POOLS: Dict[Tuple[int, int], DealPool] = {}
+
+def get_pool(seed: int, size: int = DEFAULT_POOL_SIZE) -> DealPool:
+    """Get the (cached) deal pool for a seed"""
+    key = (seed, size)
+    pool = _POOLS.get(key)
+    if pool is None:
+        pool = DealPool(seed, size)
+        _POOLS[key] = pool
+    return pool
@@ -0,0 +1,385 @@
+"""
+Differential fuzzing of the bitmask engine against the object-model rules
+
+Every fast path (bitmask.py, and through it the solver, analyzer, advisor
+and puzzles) must agree exactly with Card.compare_to, determine_trick_winner,
+get_valid_plays and calculate_round_score. This harness plays random and
+adversarial rounds through both and stops at the first disagreement, which
+it shrinks to a minimal call you can paste into a Python shell.
+
+Run from the backend directory before deploying:
+
+    python -m app.game_logic.differential --cases 200000 --workers 4
+
+Each case is one seeded round, so any failure is reproducible with
+--seed <seed> --cases 1.
+
+Throughput falls short of the millions of cases per minute this was meant
+for: a case makes about 90 checks (valid plays for all 32 cards, every
+comparison in each trick, trick winners and the score), and the reference
+side of each check runs through the object model. That comes to about
+90,000 cases (some 8 million checks) per minute per core: a million
+cases take about 11 core-minutes, spread over --workers processes.
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from app.models.card import Card, Suit, Rank
+from app.models.player import Player
+from app.game_logic.bitmask import (
+    CARDS, SUITS, SUIT_OF, TRUMP_BASE, get_tables, iter_bits, score_tricks, to_mask, valid_plays,
+)
+from app.game_logic.contracts import Contract, RuferContract, SoloContract, WenzContract
+from app.game_logic.scoring import calculate_round_score
+from app.game_logic.tricks import determine_trick_winner, get_valid_plays
+
+# (contract_type, trump_suit) pairs covering every rule table
+CONTRACTS: Tuple[Tuple[str, Optional[Suit]], ...] = (
+    ("Rufer", None), ("Wenz", None),
+) + tuple(("Solo", suit) for suit in SUITS)
+
+# Cases per unit of work handed to a worker process
+CHUNK_SIZE = 2000
+
+# Extra off-rules tricks checked per case, drawn from easily confused cards
+ADVERSARIAL_TRICKS = 4
+
+# Cards whose trump status depends on the contract
+_OBERS_UNTERS = tuple(i for i, card in enumerate(CARDS) if card.rank in (Rank.OBER, Rank.UNTER))
+
+class BitmaskEngine:
+    """The fast path under test, in card-index terms"""
+
+    def compare(self, contract: tuple, card: int, other: int, led_suit: int) -> int:
+        strength = get_tables(*contract).strength
+        a, b = strength[card], strength[other]
+        if a < TRUMP_BASE and b < TRUMP_BASE and (SUIT_OF[card] != led_suit or SUIT_OF[other] != led_suit):
+            return 0
+        return (a > b) - (a < b)
+
+    def trick_winner(self, contract: tuple, trick: List[int], leader: int) -> int:
+        return (leader + get_tables(*contract).trick_winner(trick)) % 4
+
+    def valid_plays(self, contract: tuple, hand: int, led_card: Optional[int]) -> int:
+        return valid_plays(hand, led_card)
+
+    def score(self, contract: tuple, declarer: int, partner: Optional[int], tricks: List[Tuple[int, int]]) -> dict:
+        return score_tricks(tricks, contract[0], declarer, partner)
+
+class ReferenceRules:
+    """The object-model rules, wrapped to take and return card indices"""
+
+    def __init__(self):
+        self.players = [Player(i, f"P{i}") for i in range(4)]
+
+    def compare(self, contract: tuple, card: int, other: int, led_suit: int) -> int:
+        return CARDS[card].compare_to(CARDS[other], SUITS[led_suit], *contract)
+
+    def trick_winner(self, contract: tuple, trick: List[int], leader: int) -> int:
+        return determine_trick_winner([CARDS[c] for c in trick], self.players, leader, *contract)
+
+    def valid_plays(self, contract: tuple, hand: int, led_card: Optional[int]) -> int:
+        player = self.players[0]
+        player.hand = [CARDS[c] for c in iter_bits(hand)]
+        led_suit = CARDS[led_card].suit if led_card is not None else None
+        return to_mask(get_valid_plays(player, led_suit, *contract))
+
+    def score(self, contract: tuple, declarer: int, partner: Optional[int], tricks: List[Tuple[int, int]]) -> dict:
+        for player in self.players:
+            player.reset_round()
+        for winner, trick in tricks:
+            self.players[winner].add_trick([CARDS[c] for c in iter_bits(trick)])
+        return calculate_round_score(_make_contract(contract, declarer, partner), self.players, [])
+
+def _make_contract(contract: tuple, declarer: int, partner: Optional[int]) -> Contract:
+    contract_type, trump_suit = contract
+    if contract_type == "Rufer":
+        rufer = RuferContract(declarer, Suit.EICHEL)
+        rufer.partner_index = partner
+        return rufer
+    if contract_type == "Wenz":
+        return WenzContract(declarer)
+    return SoloContract(declarer, trump_suit)
+
+def _card_expr(card: int) -> str:
+    return f"Card(Suit.{CARDS[card].suit.name}, Rank.{CARDS[card].rank.name})"
+
+class Divergence:
+    """A call on which the fast path and the reference rules disagree"""
+
+    __slots__ = ("seed", "check", "contract", "args", "expected", "actual")
+
+    def __init__(self, seed: int, check: str, contract: tuple, args: tuple, expected, actual):
+        self.seed = seed
+        self.check = check
+        self.contract = contract
+        self.args = args
+        self.expected = expected
+        self.actual = actual
+
+    def reproduction(self) -> str:
+        """The reference call as Python source, with its expected result"""
+        contract_type, trump_suit = self.contract
+        contract_args = f"{contract_type!r}, " + (f"Suit.{trump_suit.name}" if trump_suit else "None")
+        if self.check == "compare":
+            card, other, led_suit = self.args
+            call = f"{_card_expr(card)}.compare_to({_card_expr(other)}, Suit.{SUITS[led_suit].name}, {contract_args})"
+        elif self.check == "trick_winner":
+            trick, leader = self.args
+            cards = ", ".join(_card_expr(c) for c in trick)
+            call = f"determine_trick_winner([{cards}], players, {leader}, {contract_args})"
+        elif self.check == "valid_plays":
+            hand, led_card = self.args
+            led = f"Suit.{CARDS[led_card].suit.name}" if led_card is not None else "None"
+            call = f"player.hand = [{', '.join(_card_expr(c) for c in iter_bits(hand))}]; get_valid_plays(player, {led}, {contract_args})"
+        else:
+            declarer, partner, tricks = self.args
+            won = "; ".join(
+                f"players[{winner}].add_trick([{', '.join(_card_expr(c) for c in iter_bits(trick))}])"
+                for winner, trick in tricks
+            )
+            call = f"{won}; calculate_round_score(<{contract_type} declarer={declarer} partner={partner}>, players, [])"
+        return f"{call}  # reference: {self._show(self.expected)}, fast path: {self._show(self.actual)}"
+
+    def _show(self, value):
+        if self.check == "valid_plays":
+            return [repr(CARDS[c]) for c in iter_bits(value)]
+        return value
+
+    def __repr__(self):
+        return f"Divergence(seed={self.seed}, {self.check}: {self.reproduction()})"
+
+def _diverges(fast, reference, check: str, contract: tuple, args: tuple) -> Optional[tuple]:
+    expected = getattr(reference, check)(contract, *args)
+    actual = getattr(fast, check)(contract, *args)
+    return None if expected == actual else (expected, actual)
+
+def minimize(divergence: Divergence, fast=None, reference=None) -> Divergence:
+    """
+    Shrink a divergence to a smaller call that still diverges
+
+    A wrong trick winner is reduced to a wrong pairwise comparison when one
+    exists, else to the trick with the lowest-numbered cards and leader 0;
+    hands and won tricks are reduced by dropping cards and tricks one at a
+    time while the disagreement persists.
+    """
+    fast = fast or BitmaskEngine()
+    reference = reference or ReferenceRules()
+    check, contract, args = divergence.check, divergence.contract, divergence.args
+
+    def attempt(new_check: str, new_args: tuple) -> bool:
+        nonlocal check, args, result
+        found = _diverges(fast, reference, new_check, contract, new_args)
+        if found:
+            check, args, result = new_check, new_args, found
+        return bool(found)
+
+    result = (divergence.expected, divergence.actual)
+    if check == "trick_winner":
+        trick, _ = args
+        led_suit = SUIT_OF[trick[0]]
+        pairs = [(a, b) for a in trick for b in trick if a != b]
+        if not any(attempt("compare", (a, b, led_suit)) for a, b in pairs):
+            attempt("trick_winner", (trick, 0))
+            for position in range(4):
+                for card in range(args[0][position]):
+                    if card not in args[0]:
+                        trick = list(args[0])
+                        trick[position] = card
+                        if attempt("trick_winner", (trick, args[1])):
+                            break
+    elif check == "valid_plays":
+        hand, led_card = args
+        for card in list(iter_bits(hand)):
+            if args[0] & ~(1 << card):
+                attempt("valid_plays", (args[0] & ~(1 << card), led_card))
+    elif check == "score":
+        declarer, partner, tricks = args
+        attempt("score", (declarer, None, tricks))
+        for trick in list(tricks):
+            attempt("score", (args[0], args[1], [t for t in args[2] if t != trick]))
+
+    return Divergence(divergence.seed, check, contract, args, *result)
+
+def _deal(rng: random.Random, style: int) -> List[int]:
+    """Four hands of 8 cards: shuffled, nearly sorted, or with one seat hoarding Obers and Unters"""
+    cards = list(range(32))
+    if style == 0:
+        rng.shuffle(cards)
+    elif style == 1:
+        for _ in range(rng.randrange(1, 6)):
+            i, j = rng.randrange(32), rng.randrange(32)
+            cards[i], cards[j] = cards[j], cards[i]
+    else:
+        rest = [c for c in cards if c not in _OBERS_UNTERS]
+        rng.shuffle(rest)
+        cards = list(_OBERS_UNTERS) + rest
+    return [sum(1 << c for c in cards[seat * 8:seat * 8 + 8]) for seat in range(4)]
+
+def run_case(seed: int, fast=None, reference=None) -> Tuple[int, Optional[Divergence]]:
+    """
+    Play one seeded round through both engines
+
+    Returns the number of checks made and the first divergence, if any.
+    Every comparison inside each trick is checked too, along with a few
+    off-rules tricks of cards whose ranking depends on the contract.
+    """
+    fast = fast or BitmaskEngine()
+    reference = reference or ReferenceRules()
+    rng = random.Random(seed)
+    contract = CONTRACTS[rng.randrange(len(CONTRACTS))]
+    hands = _deal(rng, rng.randrange(3))
+    declarer = rng.randrange(4)
+    partner = rng.choice([s for s in range(4) if s != declarer]) if contract[0] == "Rufer" else None
+    checks = 0
+
+    def check(name: str, args: tuple) -> Optional[Divergence]:
+        nonlocal checks
+        checks += 1
+        found = _diverges(fast, reference, name, contract, args)
+        return Divergence(seed, name, contract, args, *found) if found else None
+
+    leader = declarer
+    tricks = []
+    for _ in range(8):
+        trick = []
+        for position in range(4):
+            seat = (leader + position) % 4
+            led_card = trick[0] if trick else None
+            found = check("valid_plays", (hands[seat], led_card))
+            if found:
+                return checks, found
+            allowed = list(iter_bits(fast.valid_plays(contract, hands[seat], led_card)))
+            card = allowed[rng.randrange(len(allowed))]
+            hands[seat] ^= 1 << card
+            trick.append(card)
+        led_suit = SUIT_OF[trick[0]]
+        for a in range(1, 4):
+            for b in range(a):
+                found = check("compare", (trick[a], trick[b], led_suit))
+                if found:
+                    return checks, found
+        found = check("trick_winner", (trick, leader))
+        if found:
+            return checks, found
+        leader = fast.trick_winner(contract, trick, leader)
+        tricks.append((leader, sum(1 << c for c in trick)))
+
+    found = check("score", (declarer, partner, tricks))
+    if found:
+        return checks, found
+
+    trumps = get_tables(*contract).trump_mask
+    pool = list(_OBERS_UNTERS) + list(iter_bits(trumps))
+    for _ in range(ADVERSARIAL_TRICKS):
+        trick = rng.sample(pool, 2) + rng.sample(range(32), 2)
+        rng.shuffle(trick)
+        if len(set(trick)) == 4:
+            found = check("trick_winner", (trick, rng.randrange(4)))
+            if found:
+                return checks, found
+    return checks, None
+
+def check_all_comparisons(fast=None, reference=None) -> Optional[Divergence]:
+    """Exhaustively compare every ordered card pair under every contract and led suit"""
+    fast = fast or BitmaskEngine()
+    reference = reference or ReferenceRules()
+    for contract in CONTRACTS:
+        for card in range(32):
+            for other in range(32):
+                for led_suit in range(4):
+                    args = (card, other, led_suit)
+                    found = _diverges(fast, reference, "compare", contract, args)
+                    if found:
+                        return Divergence(-1, "compare", contract, args, *found)
+    return None
+
+def run_range(start: int, stop: int, engine_factory: Callable = BitmaskEngine) -> Tuple[int, int, Optional[Divergence]]:
+    """Run cases [start, stop); returns (cases, checks, minimized first divergence)"""
+    fast, reference = engine_factory(), ReferenceRules()
+    total = 0
+    for seed in range(start, stop):
+        checks, found = run_case(seed, fast, reference)
+        total += checks
+        if found:
+            return seed - start + 1, total, minimize(found, fast, reference)
+    return stop - start, total, None
+
+def fuzz(
+    start: int,
+    cases: int,
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    on_progress=None,
+) -> Dict:
+    """
+    Fuzz seeds [start, start + cases) across processes
+
+    Stops at the first divergence and returns the totals along with it (the
+    lowest-seeded one among chunks that were already running).
+    """
+    began = time.perf_counter()
+    total_cases = total_checks = 0
+    divergences = []
+    chunks = iter(range(start, start + cases, chunk_size))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+
+        def submit_next():
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.add(pool.submit(run_range, chunk, min(chunk + chunk_size, start + cases)))
+
+        for _ in range(2 * (workers or os.cpu_count() or 1)):
+            submit_next()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ran, checks, divergence = future.result()
+                total_cases += ran
+                total_checks += checks
+                if divergence:
+                    divergences.append(divergence)
+                elif not divergences:
+                    submit_next()
+            if on_progress:
+                on_progress(total_cases, total_checks)
+    elapsed = time.perf_counter() - began
+    return {
+        "cases": total_cases,
+        "checks": total_checks,
+        "seconds": elapsed,
+        "divergence": min(divergences, key=lambda d: d.seed) if divergences else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=None, help="first case seed (default: random)")
+    parser.add_argument("--cases", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    args = parser.parse_args()
+
+    start = args.seed if args.seed is not None else random.randrange(1 << 31)
+    divergence = check_all_comparisons()
+    if divergence:
+        print(f"Comparison table diverges:\n  {minimize(divergence).reproduction()}")
+        raise SystemExit(1)
+
+    result = fuzz(
+        start, args.cases, args.workers,
+        on_progress=lambda cases, checks: print(f"\r{cases} cases, {checks} checks", end="", flush=True),
+    )
+    minutes = result["seconds"] / 60
+    print(f"\n{result['cases']} cases from seed {start}, {result['checks']} checks "
+          f"in {result['seconds']:.1f}s ({result['cases'] / minutes if minutes else 0:,.0f} cases/min, "
+          f"{result['checks'] / minutes if minutes else 0:,.0f} checks/min)")
+    if result["divergence"]:
+        divergence = result["divergence"]
+        print(f"Divergence in {divergence.check} (seed {divergence.seed}):\n  {divergence.reproduction()}")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
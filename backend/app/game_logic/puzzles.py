@@ -0,0 +1,298 @@
+"""
+Endgame puzzles: positions where exactly one card keeps the side to move winning
+
+Generate puzzles from simulated rounds (resumable, one process per core):
+
+    python -m app.game_logic.puzzles --out puzzles.bin --seeds 0:100000
+
+The puzzle file is a small header followed by fixed-size records, so any
+puzzle is one seek away. Records are sorted by difficulty (then seed) and
+the header holds the record number each difficulty starts at, so opening the
+file reads nothing but the header. Each record holds the remaining hands at
+the start of a trick, the contract, the points the declarer team already
+took, the goal (the declarer team reaching or missing 61, 91 or 31 points)
+and the single card that achieves it for the player to lead.
+"""
+import argparse
+import itertools
+import json
+import mmap
+import os
+import random
+import struct
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+from app.models.card import Suit
+from app.game_logic.bitmask import SUITS, CARDS, card_index, popcount, to_cards, valid_plays
+from app.game_logic.solver import Solver
+from app.game_logic.analysis import WINNING_POINTS
+
+MAGIC = b"SKPZ"
+FORMAT_VERSION = 2
+# hands (4 x u32), seed u32, difficulty, goal points, leader, contract,
+# declarer, partner, called ace, collected points, answer card
+_RECORD = struct.Struct("<4IIBBBBBBBBB")
+RECORD_SIZE = _RECORD.size
+# seed and difficulty of a record, the order records are stored in
+_SORT_FIELDS = struct.Struct("<16xIB")
+NO_SEAT = 255
+
+# Contract codes stored in a record
+CONTRACTS: Tuple[Tuple[str, Optional[Suit]], ...] = (
+    ("Rufer", None), ("Wenz", None),
+) + tuple(("Solo", suit) for suit in SUITS)
+
+# Puzzles start with this many tricks left; difficulty 1 is the shortest
+PUZZLE_TRICKS = (3, 4, 5)
+DIFFICULTIES = tuple(range(1, len(PUZZLE_TRICKS) + 1))
+
+# magic, version, record size, then the first record of each difficulty and the record count
+_HEADER = struct.Struct(f"<4sHH{len(DIFFICULTIES) + 1}I")
+
+# Declarer-team point goals a puzzle can be about, most important first:
+# winning, Schneider, and escaping Schneider
+PUZZLE_GOALS = (WINNING_POINTS, 91, 31)
+
+# Seeds per unit of work handed to a generator process
+CHUNK_SIZE = 200
+
+def find_puzzles(seed: int) -> List[tuple]:
+    """
+    Play one simulated round and extract its puzzles as record tuples
+
+    A trick start qualifies when the leader has at least two different legal
+    cards and exactly one of them reaches a goal for their side with best
+    play: the declarer team reaching the goal's points, or the opponents
+    holding them below it.
+    """
+    from app.simulation.runner import play_game
+
+    game = play_game(seed)
+    if game.contract is None or not game.play_log:
+        return []
+
+    trump_suit = game.trump_suit if game.contract_type == "Solo" else None
+    called_ace = getattr(game.contract, "called_ace_suit", None)
+    declarer = game.declarer_index
+    partner = game.partner_index if game.contract_type == "Rufer" else None
+    team = [declarer] if partner is None else [declarer, partner]
+    solver = Solver(game.contract_type, team, trump_suit)
+    contract_code = CONTRACTS.index((game.contract_type, trump_suit))
+
+    hands = [sum(1 << card_index(c) for c in hand) for hand in game.initial_hands]
+    plays = [(seat, card_index(card)) for seat, card, _ in game.play_log]
+    collected = 0
+    leader = plays[0][0]
+    puzzles = []
+    for start in range(0, len(plays), 4):
+        tricks_left = popcount(hands[leader])
+        if tricks_left in PUZZLE_TRICKS and popcount(valid_plays(hands[leader], None)) > 1:
+            for goal in PUZZLE_GOALS:
+                if goal <= collected:
+                    continue
+                outcomes = solver.move_outcomes(hands, leader, goal - collected)
+                wanted = leader in team
+                winning = [card for card, reached in outcomes.items() if reached == wanted]
+                if len(winning) == 1:
+                    puzzles.append((
+                        *hands, seed, PUZZLE_TRICKS.index(tricks_left) + 1, goal, leader,
+                        contract_code, declarer,
+                        NO_SEAT if partner is None else partner,
+                        NO_SEAT if called_ace is None else SUITS.index(called_ace),
+                        collected, winning[0],
+                    ))
+                    break
+
+        trick = [card for _, card in plays[start:start + 4]]
+        for seat, card in plays[start:start + 4]:
+            hands[seat] ^= 1 << card
+        winner, gain = solver.finish_trick(leader, trick)
+        collected += gain
+        leader = winner
+    return puzzles
+
+def find_puzzles_in_range(start: int, stop: int) -> bytes:
+    """Puzzles of seeds [start, stop), packed as records"""
+    return b"".join(_RECORD.pack(*p) for seed in range(start, stop) for p in find_puzzles(seed))
+
+def decode_puzzle(index: int, record: tuple) -> dict:
+    """Turn a record tuple into an API-friendly dict"""
+    (*hands, seed, difficulty, goal, leader, contract_code, declarer, partner,
+     called_ace, collected, answer) = record
+    contract_type, trump_suit = CONTRACTS[contract_code]
+    return {
+        "id": index,
+        "seed": seed,
+        "difficulty": difficulty,
+        "goal_points": goal,
+        "contract_type": contract_type,
+        "trump_suit": trump_suit.value if trump_suit else None,
+        "called_ace": SUITS[called_ace].value if called_ace != NO_SEAT else None,
+        "declarer_index": declarer,
+        "partner_index": partner if partner != NO_SEAT else None,
+        "to_play": leader,
+        "declarer_team_points": collected,
+        "hands": [
+            [{"suit": c.suit.value, "rank": c.rank.value, "value": c.value} for c in to_cards(hand)]
+            for hand in hands
+        ],
+        "answer": {"suit": CARDS[answer].suit.value, "rank": CARDS[answer].rank.value},
+    }
+
+class PuzzleFile:
+    """
+    Read-only, memory-mapped puzzle file
+
+    Records are fixed-size, so fetching puzzle n is a single offset
+    computation. Each difficulty's records are one run whose bounds are in
+    the header, so opening the file and picking a random puzzle of a
+    difficulty are O(1) too.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, record_size, *bounds = _HEADER.unpack_from(self._map, 0)
+            valid = (
+                magic == MAGIC and version == FORMAT_VERSION and record_size == RECORD_SIZE
+                and bounds[0] == 0 and bounds == sorted(bounds)
+                and len(self._map) == _HEADER.size + bounds[-1] * RECORD_SIZE
+            )
+        except (ValueError, struct.error):  # empty, or too short for a header
+            valid = False
+        if not valid:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} puzzle file")
+        self.count = bounds[-1]
+        # Record numbers of each difficulty
+        self.by_difficulty: Dict[int, range] = {
+            level: range(first, stop) for level, first, stop in zip(DIFFICULTIES, bounds, bounds[1:])
+        }
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, index: int) -> dict:
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return decode_puzzle(index, _RECORD.unpack_from(self._map, _HEADER.size + index * RECORD_SIZE))
+
+    def random(self, difficulty: Optional[int] = None, rng=random) -> Optional[dict]:
+        """A random puzzle, optionally of one difficulty; None if there is none"""
+        if difficulty is None:
+            return self.get(rng.randrange(self.count)) if self.count else None
+        indices = self.by_difficulty.get(difficulty)
+        if not indices:
+            return None
+        return self.get(indices[rng.randrange(len(indices))])
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+def _progress_path(path: str) -> str:
+    return path + ".progress"
+
+def _records_path(path: str) -> str:
+    return path + ".records"
+
+def _load_progress(path: str) -> Optional[Tuple[List[int], int]]:
+    """Completed chunk starts and the size of the records file they account for; None before the first run"""
+    try:
+        with open(_progress_path(path)) as f:
+            progress = json.load(f)
+        return progress["done"], progress["size"]
+    except FileNotFoundError:
+        return None
+
+def _save_progress(path: str, done: List[int], size: int):
+    tmp = _progress_path(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"done": done, "size": size}, f)
+    os.replace(tmp, _progress_path(path))
+
+def write_puzzle_file(path: str, records: bytes):
+    """Write records (in any order) as a puzzle file: sorted by difficulty, then seed, behind the header"""
+    records = sorted(
+        (records[i:i + RECORD_SIZE] for i in range(0, len(records), RECORD_SIZE)),
+        key=lambda record: _SORT_FIELDS.unpack_from(record)[::-1],
+    )
+    counts = Counter(_SORT_FIELDS.unpack_from(record)[1] for record in records)
+    bounds = list(itertools.accumulate((counts[level] for level in DIFFICULTIES), initial=0))
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, RECORD_SIZE, *bounds))
+        f.writelines(records)
+    os.replace(tmp, path)
+
+def generate(
+    path: str,
+    start: int,
+    stop: int,
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    on_chunk=None,
+) -> int:
+    """
+    Generate puzzles for seeds [start, stop) into `path`, resuming if possible
+
+    Chunks of seeds run in parallel and their records are appended, as
+    they finish, to a records file next to the puzzle file. A progress file
+    records finished chunks and the records file size after each one, so an
+    interrupted run continues where it stopped (dropping any partly written
+    chunk), and a later run can add seeds. Once every chunk is in, the
+    puzzle file is rewritten from the records. Returns the puzzle count.
+    """
+    progress = _load_progress(path)
+    if progress is None:
+        if os.path.exists(path):
+            raise FileExistsError(f"{path} exists but has no progress file to resume from")
+        open(_records_path(path), "wb").close()
+        progress = [], 0
+        _save_progress(path, *progress)
+    done, size = progress
+
+    finished = set(done)
+    chunks = [s for s in range(start, stop, chunk_size) if s not in finished]
+    with open(_records_path(path), "r+b") as out:
+        out.truncate(size)
+        out.seek(size)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(find_puzzles_in_range, s, min(s + chunk_size, stop)): s for s in chunks
+            }
+            for future in as_completed(futures):
+                out.write(future.result())
+                out.flush()
+                size = out.tell()
+                done.append(futures[future])
+                _save_progress(path, done, size)
+                if on_chunk:
+                    on_chunk(len(done), size)
+        out.seek(0)
+        write_puzzle_file(path, out.read(size))
+    return size // RECORD_SIZE
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="puzzles.bin")
+    parser.add_argument("--seeds", default="0:10000", help="seed range start:stop")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    args = parser.parse_args()
+
+    start, _, stop = args.seeds.partition(":")
+    count = generate(
+        args.out, int(start), int(stop), args.workers,
+        on_chunk=lambda chunks, size: print(
+            f"\r{chunks} chunks, {size // RECORD_SIZE} puzzles", end="", flush=True
+        ),
+    )
+    print(f"\n{count} puzzles in {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import struct
+from multiprocessing import shared_memory, resource_tracker
+from typing import Optional, Tuple
+
+# Each slot is two little-endian u64s: (key ^ data, data). Writers never lock;
+# a reader accepts a slot only if key ^ data matches the key it probed for, so
+# a slot torn by concurrent writers reads as a miss instead of a wrong value.
+_SLOT = struct.Struct("<QQ")
+SLOT_SIZE = _SLOT.size
+# Slots probed per key; the shallowest of them is the replacement victim
+BUCKET_SIZE = 4
+
+_DEPTH_SHIFT = 32
+_LOWER_SHIFT = 16
+_FIELD_MASK = 0xFFFF
+
+def _pack(depth: int, lower: int, upper: int) -> int:
+    return (depth << _DEPTH_SHIFT) | (lower << _LOWER_SHIFT) | upper
+
+class SharedTranspositionTable:
+    """
+    Fixed-size, lock-free transposition table in shared memory
+
+    Drop-in replacement for solver.TranspositionTable that every worker
+    process on a machine can attach to, so positions searched by one worker
+    are found by all. Keys are 64-bit Zobrist hashes; each key maps to a
+    bucket of BUCKET_SIZE slots and, when the bucket is full, the entry with
+    the smallest depth (fewest tricks left) is replaced, provided it is not
+    deeper than the new one.
+
+    The table pickles as a reference to the shared block, so it can be handed
+    to ProcessPoolExecutor tasks or initializers directly.
+    """
+
+    def __init__(self, slots: int = 1 << 20, name: Optional[str] = None):
+        if slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.slots = slots
+        self.hits = 0
+        self.probes = 0
+        self._owner = name is None
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=slots * SLOT_SIZE)
+            self._shm.buf[:] = bytes(slots * SLOT_SIZE)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            # Attaching processes must not unlink the block when they exit
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        self._buf = self._shm.buf
+        self._bucket_mask = (slots - 1) & ~(BUCKET_SIZE - 1)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __reduce__(self):
+        return (SharedTranspositionTable, (self.slots, self._shm.name))
+
+    def get(self, key: int) -> Optional[Tuple[int, int]]:
+        self.probes += 1
+        key = key or 1
+        buf = self._buf
+        base = (key & self._bucket_mask) * SLOT_SIZE
+        for offset in range(base, base + BUCKET_SIZE * SLOT_SIZE, SLOT_SIZE):
+            check, data = _SLOT.unpack_from(buf, offset)
+            if data and check ^ data == key:
+                self.hits += 1
+                return (data >> _LOWER_SHIFT) & _FIELD_MASK, data & _FIELD_MASK
+        return None
+
+    def put(self, key: int, depth: int, lower: int, upper: int):
+        key = key or 1
+        buf = self._buf
+        base = (key & self._bucket_mask) * SLOT_SIZE
+        victim = -1
+        victim_depth = depth + 1
+        for offset in range(base, base + BUCKET_SIZE * SLOT_SIZE, SLOT_SIZE):
+            check, data = _SLOT.unpack_from(buf, offset)
+            if not data or check ^ data == key:
+                victim = offset
+                break
+            slot_depth = data >> _DEPTH_SHIFT
+            if slot_depth < victim_depth:
+                victim = offset
+                victim_depth = slot_depth
+        if victim < 0:
+            return
+        data = _pack(depth, max(lower, 0), min(upper, _FIELD_MASK))
+        _SLOT.pack_into(buf, victim, key ^ data, data)
+
+    def clear(self):
+        self._buf[:] = bytes(self.slots * SLOT_SIZE)
+        self.hits = 0
+        self.probes = 0
+
+    def close(self):
+        """Detach from the shared block (and free it, in the creating process)"""
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,291 @@
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.models.card import Suit
+from app.game_logic.bitmask import (
+    POINTS, SUIT_OF, TRUMP_BASE, get_tables, valid_plays, iter_bits, mask_points, popcount,
+)
+
+# Zobrist keys: one random 64-bit number per (seat, card) and per leader, so a
+# position's hash can be updated incrementally as cards leave the hands.
+_zobrist_rng = random.Random(0x5C4AF)
+ZOBRIST_CARDS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(_zobrist_rng.getrandbits(64) for _ in range(32)) for _ in range(4)
+)
+ZOBRIST_LEADER: Tuple[int, ...] = tuple(_zobrist_rng.getrandbits(64) for _ in range(4))
+# Positions only transpose within one contract and team, so both are mixed into the key
+ZOBRIST_CONTRACT: Dict[Tuple[str, Optional[Suit]], int] = {
+    key: _zobrist_rng.getrandbits(64)
+    for key in [("Rufer", None), ("Wenz", None)] + [("Solo", suit) for suit in Suit]
+}
+ZOBRIST_TEAM: Tuple[int, ...] = tuple(_zobrist_rng.getrandbits(64) for _ in range(16))
+
+def position_hash(hands: Sequence[int]) -> int:
+    """Zobrist hash of the card distribution (without the leader)"""
+    h = 0
+    for seat, hand in enumerate(hands):
+        keys = ZOBRIST_CARDS[seat]
+        for card in iter_bits(hand):
+            h ^= keys[card]
+    return h
+
+class TranspositionTable:
+    """
+    Per-process transposition table for the solver
+
+    Maps a 64-bit position hash to (lower, upper) bounds on the points the
+    declarer team still takes. Entries store the search depth (tricks left)
+    so a full table keeps the deeper, more expensive result.
+    """
+
+    def __init__(self, max_entries: int = 1 << 20):
+        self.max_entries = max_entries
+        self.entries: Dict[int, Tuple[int, int, int]] = {}
+        self.hits = 0
+        self.probes = 0
+
+    def get(self, key: int) -> Optional[Tuple[int, int]]:
+        self.probes += 1
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, key: int, depth: int, lower: int, upper: int):
+        entries = self.entries
+        if key not in entries and len(entries) >= self.max_entries:
+            # Full: only admit results at least as deep as an arbitrary resident
+            victim = next(iter(entries))
+            if entries[victim][0] > depth:
+                return
+            del entries[victim]
+        entries[key] = (depth, lower, upper)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.probes = 0
+
+class Solver:
+    """
+    Double-dummy solver: exact best play with all hands known
+
+    Values are the card points the declarer team takes from the current
+    position to the end of the round (including cards already lying in the
+    current trick). Uses alpha-beta search with a transposition table probed
+    at trick boundaries.
+    """
+
+    def __init__(
+        self,
+        contract_type: str,
+        declarer_team: Sequence[int],
+        trump_suit: Optional[Suit] = None,
+        table=None,
+    ):
+        self.tables = get_tables(contract_type, trump_suit)
+        self.team = tuple(seat in declarer_team for seat in range(4))
+        self.table = table if table is not None else TranspositionTable()
+        self.nodes = 0
+        team_bits = sum(1 << seat for seat in range(4) if self.team[seat])
+        self._salt = (
+            ZOBRIST_CONTRACT[(contract_type, trump_suit if contract_type == "Solo" else None)]
+            ^ ZOBRIST_TEAM[team_bits]
+        )
+
+    def value(self, hands: List[int], leader: int, trick: Optional[List[int]] = None) -> int:
+        """Exact number of points the declarer team takes from here with best play"""
+        trick = list(trick or [])
+        hands = list(hands)
+        h = position_hash(hands) ^ self._salt
+        in_trick = sum(POINTS[c] for c in trick)
+        available = mask_points(hands[0] | hands[1] | hands[2] | hands[3]) + in_trick
+        lower = 0
+        upper = available
+
+        # MTD(f): a sequence of null-window searches converging on the value
+        guess = upper // 2
+        while lower < upper:
+            beta = guess + 1 if guess == lower else guess
+            guess = self._search(hands, leader, trick, h, available, beta - 1, beta)
+            if guess < beta:
+                upper = guess
+            else:
+                lower = guess
+        return lower
+
+    def reaches(self, hands: List[int], leader: int, threshold: int, trick: Optional[List[int]] = None) -> bool:
+        """Whether the declarer team takes at least `threshold` points from here with best play"""
+        trick = list(trick or [])
+        hands = list(hands)
+        h = position_hash(hands) ^ self._salt
+        available = mask_points(hands[0] | hands[1] | hands[2] | hands[3]) + sum(POINTS[c] for c in trick)
+        return self._search(hands, leader, trick, h, available, threshold - 1, threshold) >= threshold
+
+    def move_values(self, hands: List[int], leader: int, trick: Optional[List[int]] = None) -> Dict[int, int]:
+        """Exact value of every legal move for the player to act"""
+        values = {}
+        for card, child_hands, child_leader, child_trick, gain in self.children(hands, leader, trick):
+            values[card] = gain + self.value(child_hands, child_leader, child_trick)
+        return values
+
+    def move_outcomes(
+        self,
+        hands: List[int],
+        leader: int,
+        threshold: int,
+        trick: Optional[List[int]] = None,
+    ) -> Dict[int, bool]:
+        """Whether the declarer team still reaches `threshold` after each legal move"""
+        outcomes = {}
+        for card, child_hands, child_leader, child_trick, gain in self.children(hands, leader, trick):
+            outcomes[card] = gain >= threshold or self.reaches(
+                child_hands, child_leader, threshold - gain, child_trick
+            )
+        return outcomes
+
+    def children(self, hands: List[int], leader: int, trick: Optional[List[int]]):
+        """Yield (card, hands, leader, trick, points gained) for every legal move"""
+        trick = list(trick or [])
+        player = (leader + len(trick)) % 4
+        moves = valid_plays(hands[player], trick[0] if trick else None)
+        for card in iter_bits(moves):
+            child_hands = list(hands)
+            child_hands[player] ^= 1 << card
+            child_trick = trick + [card]
+            if len(child_trick) == 4:
+                winner, gain = self.finish_trick(leader, child_trick)
+                yield card, child_hands, winner, [], gain
+            else:
+                yield card, child_hands, leader, child_trick, 0
+
+    def finish_trick(self, leader: int, trick: List[int]) -> Tuple[int, int]:
+        """Return the winner of a full trick and the points it brings the declarer team"""
+        winner = (leader + self.tables.trick_winner(trick)) % 4
+        points = POINTS[trick[0]] + POINTS[trick[1]] + POINTS[trick[2]] + POINTS[trick[3]]
+        return winner, (points if self.team[winner] else 0)
+
+    def _order_moves(self, moves: int, live: int) -> List[int]:
+        """
+        Strongest-first move list with equivalent cards collapsed
+
+        Two cards of the same group (trumps or one plain suit) are equivalent
+        when no other live card sits between them in strength and they carry
+        the same points and printed suit (which decides what they must
+        follow later), so only the higher one needs searching.
+        """
+        cards = list(iter_bits(moves))
+        if len(cards) == 1:
+            return cards
+        tables = self.tables
+        strength = tables.strength
+        group_of = tables.group_of
+        between = tables.between
+        cards.sort(key=lambda c: (group_of[c], -strength[c]))
+
+        ordered = [cards[0]]
+        previous = cards[0]
+        for card in cards[1:]:
+            if (
+                group_of[card] != group_of[previous]
+                or POINTS[card] != POINTS[previous]
+                or SUIT_OF[card] != SUIT_OF[previous]
+                or live & between[previous][card]
+            ):
+                ordered.append(card)
+            previous = card
+        ordered.sort(key=strength.__getitem__, reverse=True)
+        return ordered
+
+    def _search(
+        self,
+        hands: List[int],
+        leader: int,
+        trick: List[int],
+        h: int,
+        available: int,
+        alpha: int,
+        beta: int,
+    ) -> int:
+        self.nodes += 1
+        position = len(trick)
+        key = 0
+        entry = None
+
+        if position == 0:
+            if not hands[leader]:
+                return 0
+            # Nothing outside [0, points still in play] is reachable
+            if available <= alpha:
+                return available
+            if beta <= 0:
+                return 0
+            key = h ^ ZOBRIST_LEADER[leader]
+            entry = self.table.get(key)
+            if entry is not None:
+                lower, upper = entry
+                if lower >= beta:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                if lower == upper:
+                    return lower
+                if lower > alpha:
+                    alpha = lower
+                if upper < beta:
+                    beta = upper
+        alpha_orig = alpha
+        beta_orig = beta
+
+        player = (leader + position) % 4
+        hand = hands[player]
+        moves = valid_plays(hand, trick[0] if trick else None)
+        maximizing = self.team[player]
+        keys = ZOBRIST_CARDS[player]
+        live = hands[0] | hands[1] | hands[2] | hands[3]
+        for card in trick:
+            live |= 1 << card
+        ordered = self._order_moves(moves, live)
+
+        best = -1 if maximizing else 1 << 10
+        for card in ordered:
+            hands[player] = hand ^ (1 << card)
+            trick.append(card)
+            child_hash = h ^ keys[card]
+            if position == 3:
+                winner = (leader + self.tables.trick_winner(trick)) % 4
+                points = POINTS[trick[0]] + POINTS[trick[1]] + POINTS[trick[2]] + POINTS[trick[3]]
+                gain = points if self.team[winner] else 0
+                value = gain + self._search(
+                    hands, winner, [], child_hash, available - points, alpha - gain, beta - gain
+                )
+            else:
+                value = self._search(hands, leader, trick, child_hash, available, alpha, beta)
+            trick.pop()
+            hands[player] = hand
+
+            if maximizing:
+                if value > best:
+                    best = value
+                    if best > alpha:
+                        alpha = best
+            else:
+                if value < best:
+                    best = value
+                    if best < beta:
+                        beta = best
+            if alpha >= beta:
+                break
+
+        if position == 0:
+            depth = popcount(hand)
+            lower, upper = entry if entry is not None else (0, 1 << 10)
+            if best <= alpha_orig:
+                upper = min(upper, best)
+            elif best >= beta_orig:
+                lower = max(lower, best)
+            else:
+                lower = upper = best
+            self.table.put(key, depth, lower, upper)
+
+        return best
@@ -0,0 +1,255 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.game_logic.analysis import move_origins
+from app.game_logic.bitmask import SUITS, POINTS, iter_bits, get_tables
+from app.models.card import Suit
+from app.models.game import HUMAN
+
+EXPORT_VERSION = 1
+
+# Contracts in one-hot order (bids use the same order)
+CONTRACTS: Tuple[Tuple[str, Optional[str]], ...] = (
+    ("Rufer", None), ("Wenz", None),
+) + tuple(("Solo", suit.value) for suit in SUITS)
+
+# Feature layout: one uint8 per entry. Seats are relative to the deciding
+# player (0 = self, 1 = next to act after them, ...).
+HAND = 0              # 32: cards in the player's hand
+PLAYED = 32           # 4 x 32: cards each relative seat played in finished tricks
+TRICK = 160           # 3 x 32: cards in the current trick, by position in the trick
+CONTRACT = 256        # 6: contract being played (all zero while bidding)
+CALLED_ACE = 262      # 4: called ace suit (Rufer)
+DECLARER = 266        # 4: declarer's relative seat
+HIGHEST_BID = 270     # 6: highest bid so far (bidding only)
+HIGHEST_BIDDER = 276  # 4: relative seat of the highest bidder
+TAKEN_POINTS = 280    # 4: card points each relative seat has taken
+TRICK_NUMBER = 284    # 1: finished tricks
+BIDDING = 285         # 1: 1 while bidding
+FEATURE_SIZE = 286
+
+# Actions: 0-31 play that card; bids follow
+PASS_ACTION = 32
+RUFER_ACTION = 33     # + called ace suit index
+WENZ_ACTION = 37
+SOLO_ACTION = 38      # + trump suit index
+ACTION_COUNT = 42
+
+def _contract_index(contract_type: str, trump_suit: Optional[str]) -> int:
+    return CONTRACTS.index((contract_type, trump_suit if contract_type == "Solo" else None))
+
+def bid_action(contract_type: Optional[str], trump_suit: Optional[str], called_ace: Optional[str]) -> int:
+    """Action code of a bid (None contract = pass)"""
+    if contract_type is None:
+        return PASS_ACTION
+    if contract_type == "Rufer":
+        return RUFER_ACTION + SUITS.index(Suit(called_ace))
+    if contract_type == "Wenz":
+        return WENZ_ACTION
+    return SOLO_ACTION + SUITS.index(Suit(trump_suit))
+
+def _set_cards(row: np.ndarray, offset: int, mask: int):
+    for card in iter_bits(mask):
+        row[offset + card] = 1
+
+def encode_round(
+    record: dict, seats: Optional[List[int]] = None, humans_only: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Encode every decision of a round record as (features, actions, seats)
+
+    Only decisions of the given seats are kept (all seats by default), and
+    with humans_only only the moves a human made (not a bot's, nor the ones
+    the server made when a clock ran out; see move_origins). Each feature row
+    holds what the deciding player could see at that moment.
+    """
+    seats = set(range(4) if seats is None else seats)
+    bids = record.get("bids", [])
+    plays = record["plays"]
+    keep_bids = [bid[0] in seats and (not humans_only or origin == HUMAN)
+                 for bid, origin in zip(bids, move_origins(record, "bids"))]
+    keep_plays = [play[0] in seats and (not humans_only or origin == HUMAN)
+                  for play, origin in zip(plays, move_origins(record, "plays"))]
+    rows = ([bid[0] for bid, keep in zip(bids, keep_bids) if keep]
+            + [play[0] for play, keep in zip(plays, keep_plays) if keep])
+    features = np.zeros((len(rows), FEATURE_SIZE), dtype=np.uint8)
+    actions = np.zeros(len(rows), dtype=np.uint8)
+    deciders = np.array(rows, dtype=np.uint8)
+
+    hands = list(record["hands"])
+    row = 0
+
+    # Bidding
+    highest: Optional[Tuple[int, int]] = None  # (contract index, bidder)
+    for (seat, contract_type, trump_suit, called_ace), keep in zip(bids, keep_bids):
+        if keep:
+            features[row, BIDDING] = 1
+            _set_cards(features[row], HAND, hands[seat])
+            if highest is not None:
+                features[row, HIGHEST_BID + highest[0]] = 1
+                features[row, HIGHEST_BIDDER + (highest[1] - seat) % 4] = 1
+            actions[row] = bid_action(contract_type, trump_suit, called_ace)
+            row += 1
+        if contract_type is not None:
+            highest = (_contract_index(contract_type, trump_suit), seat)
+
+    # Card play
+    contract = _contract_index(record["contract_type"], record["trump_suit"])
+    called_ace = SUITS.index(Suit(record["called_ace"])) if record.get("called_ace") else None
+    declarer = record["declarer_index"]
+    tables = get_tables(record["contract_type"], Suit(record["trump_suit"]) if record["trump_suit"] else None)
+    played = [0, 0, 0, 0]
+    taken = [0, 0, 0, 0]
+    trick: List[int] = []
+    leader = plays[0][0] if plays else declarer
+    tricks_done = 0
+    for (seat, card), keep in zip(plays, keep_plays):
+        if keep:
+            features_row = features[row]
+            _set_cards(features_row, HAND, hands[seat])
+            for other in range(4):
+                _set_cards(features_row, PLAYED + 32 * ((other - seat) % 4), played[other])
+            for position, trick_card in enumerate(trick):
+                features_row[TRICK + 32 * position + trick_card] = 1
+            features_row[CONTRACT + contract] = 1
+            if called_ace is not None:
+                features_row[CALLED_ACE + called_ace] = 1
+            features_row[DECLARER + (declarer - seat) % 4] = 1
+            for other in range(4):
+                features_row[TAKEN_POINTS + (other - seat) % 4] = taken[other]
+            features_row[TRICK_NUMBER] = tricks_done
+            actions[row] = card
+            row += 1
+
+        hands[seat] ^= 1 << card
+        trick.append(card)
+        if len(trick) == 4:
+            winner = (leader + tables.trick_winner(trick)) % 4
+            for position, trick_card in enumerate(trick):
+                played[(leader + position) % 4] |= 1 << trick_card
+            taken[winner] += sum(POINTS[c] for c in trick)
+            leader = winner
+            trick = []
+            tricks_done += 1
+
+    return features, actions, deciders
+
+class TrainingExporter:
+    """
+    Appends encoded decisions to fixed-size chunks of .npy files
+
+    Each chunk is a features-NNNNN.npy (rows x FEATURE_SIZE uint8) and an
+    actions-NNNNN.npy (rows uint8) written through np.memmap, so memory use
+    stays flat however much is exported. manifest.json lists the chunks and
+    how many rows of each are filled; readers should np.load(..., mmap_mode="r")
+    and slice to that count. An exporter reopened on the same directory
+    continues the last chunk.
+    """
+
+    def __init__(self, directory: str, chunk_rows: int = 1 << 16):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+            if self.manifest["feature_size"] != FEATURE_SIZE or self.manifest["version"] != EXPORT_VERSION:
+                raise ValueError(f"{directory} holds an incompatible export")
+        else:
+            self.manifest = {
+                "version": EXPORT_VERSION,
+                "feature_size": FEATURE_SIZE,
+                "action_count": ACTION_COUNT,
+                "chunk_rows": chunk_rows,
+                "chunks": [],
+            }
+        self.chunk_rows = self.manifest["chunk_rows"]
+        self._features: Optional[np.memmap] = None
+        self._actions: Optional[np.memmap] = None
+        self.rows_written = 0
+
+    @property
+    def total_rows(self) -> int:
+        return sum(chunk["rows"] for chunk in self.manifest["chunks"])
+
+    def _open_chunk(self) -> Dict:
+        chunks = self.manifest["chunks"]
+        if chunks and chunks[-1]["rows"] < self.chunk_rows:
+            chunk = chunks[-1]
+            mode = "r+"
+        else:
+            number = len(chunks)
+            chunk = {
+                "features": f"features-{number:05d}.npy",
+                "actions": f"actions-{number:05d}.npy",
+                "rows": 0,
+            }
+            chunks.append(chunk)
+            mode = "w+"
+        self._features = np.lib.format.open_memmap(
+            os.path.join(self.directory, chunk["features"]), mode=mode,
+            dtype=np.uint8, shape=(self.chunk_rows, FEATURE_SIZE),
+        )
+        self._actions = np.lib.format.open_memmap(
+            os.path.join(self.directory, chunk["actions"]), mode=mode,
+            dtype=np.uint8, shape=(self.chunk_rows,),
+        )
+        return chunk
+
+    def append(self, features: np.ndarray, actions: np.ndarray):
+        """Append rows, spilling into new chunks as they fill"""
+        start = 0
+        while start < len(actions):
+            chunk = self.manifest["chunks"][-1] if self._features is not None else self._open_chunk()
+            if chunk["rows"] >= self.chunk_rows:
+                self._close_chunk()
+                chunk = self._open_chunk()
+            count = min(len(actions) - start, self.chunk_rows - chunk["rows"])
+            self._features[chunk["rows"]:chunk["rows"] + count] = features[start:start + count]
+            self._actions[chunk["rows"]:chunk["rows"] + count] = actions[start:start + count]
+            chunk["rows"] += count
+            start += count
+        self.rows_written += len(actions)
+
+    def export_round(self, record: dict, humans_only: bool = True) -> int:
+        """Encode and append a round record (by default only human decisions); returns the number of rows"""
+        seats = None
+        if humans_only:
+            seats = [seat for seat, user_id in enumerate(record["user_ids"]) if user_id is not None]
+        features, actions, _ = encode_round(record, seats, humans_only)
+        if len(actions):
+            self.append(features, actions)
+            self.flush()
+        return len(actions)
+
+    def flush(self):
+        """Write buffered rows and the manifest to disk"""
+        if self._features is not None:
+            self._features.flush()
+            self._actions.flush()
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def _close_chunk(self):
+        if self._features is not None:
+            self._features.flush()
+            self._actions.flush()
+            self._features = None
+            self._actions = None
+
+    def close(self):
+        self.flush()
+        self._close_chunk()
+
+def load_chunks(directory: str):
+    """Yield (features, actions) memory-mapped views of each exported chunk"""
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+    for chunk in manifest["chunks"]:
+        rows = chunk["rows"]
+        features = np.load(os.path.join(directory, chunk["features"]), mmap_mode="r")[:rows]
+        actions = np.load(os.path.join(directory, chunk["actions"]), mmap_mode="r")[:rows]
+        yield features, actions
@@ -0,0 +1,137 @@
+"""
+Structured, non-blocking logging for the app.* loggers
+
+Modules log events with log_event(logger, level, "event.name", key=value...)
+or plain logger calls. Everything is put on an in-memory queue and a
+background thread does the formatting and the (blocking) writes, so logging
+never stalls the event loop. Configuration comes from the environment:
+
+    LOG_LEVEL=INFO                                   default level of app.*
+    LOG_LEVELS=app.api.websocket=DEBUG,app.api.connections=WARNING
+    LOG_SAMPLE=ws.message=100                        keep 1 in 100 of an event
+    LOG_FORMAT=json                                  json lines or text
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from itertools import count
+from typing import Dict, Optional, TextIO
+import orjson
+
+ROOT_LOGGER = "app"
+
+# event name -> keep one in this many (see log_event)
+_sample_every: Dict[str, int] = {}
+_sample_counters: Dict[str, "count"] = {}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def _parse_pairs(spec: str) -> Dict[str, str]:
+    pairs = {}
+    for item in spec.split(","):
+        name, _, value = item.strip().partition("=")
+        if name and value:
+            pairs[name.strip()] = value.strip()
+    return pairs
+
+def log_event(logger: logging.Logger, level: int, event: str, exc_info: bool = False, **fields):
+    """
+    Log a structured event
+
+    Does nothing (not even build the record) when the level is disabled for
+    the logger. Sampled events (LOG_SAMPLE) are only logged every Nth time,
+    and carry the rate so totals can be recovered. exc_info attaches the
+    exception being handled.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    every = _sample_every.get(event)
+    if every is not None:
+        if next(_sample_counters[event]) % every:
+            return
+        fields["sampled"] = every
+    logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records as they are; formatting happens on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, event and its fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with the fields as key=value pairs"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        line = "%s %-7s %s %s" % (
+            time.strftime("%H:%M:%S", time.localtime(record.created)), record.levelname,
+            record.name, record.getMessage(),
+        )
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+def configure_logging(
+    level: Optional[str] = None,
+    levels: Optional[str] = None,
+    sample: Optional[str] = None,
+    fmt: Optional[str] = None,
+    stream: Optional[TextIO] = None,
+):
+    """
+    Route app.* logging through a queue to a background writer thread
+
+    Arguments default to the LOG_* environment variables. Calling it again
+    replaces the previous configuration.
+    """
+    global _listener
+    stop_logging()
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    for name, module_level in _parse_pairs(levels if levels is not None else os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(module_level.upper())
+
+    _sample_every.clear()
+    _sample_counters.clear()
+    for event, every in _parse_pairs(sample if sample is not None else os.getenv("LOG_SAMPLE", "")).items():
+        if int(every) > 1:
+            _sample_every[event] = int(every)
+            _sample_counters[event] = count()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    formatter = (fmt or os.getenv("LOG_FORMAT", "json")).lower()
+    output.setFormatter(TextFormatter() if formatter == "text" else JsonFormatter())
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root.handlers = [_DeferredQueueHandler(records)]
+    root.propagate = False
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging():
+    """Write out everything queued and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -2,12 +2,23 @@ from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import router
 from app.api.auth import router as auth_router
-from app.api.rooms import router as rooms_router
-from app.api.websocket import websocket_endpoint
+from app.api.rooms import router as rooms_router, reaper as room_reaper, room_stats
+from app.api.analysis import router as analysis_router, pipeline as analysis_pipeline
+from app.api.deals import router as deals_router, analyzer as deal_analyzer
+from app.api.puzzles import router as puzzles_router
+from app.api import training, wire
+from app.api.websocket import websocket_endpoint, spectator_endpoint, advisor as bidding_advisor, manager as connection_manager
+from app.api.spectators import spectators
+from app.api.clocks import clocks
+from app.api.ratelimit import limiter
 from app.database.database import init_db
+from app.log import configure_logging, log_event, stop_logging
+from typing import Optional
+import logging
 import os
 
 app = FastAPI(title="Schafkopf Game API", version="0.1.0")
+logger = logging.getLogger(__name__)
 
 # Configure CORS
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
@@ -26,39 +37,80 @@ init_db()
 app.include_router(router, prefix="/api")
 app.include_router(auth_router, prefix="/api")
 app.include_router(rooms_router, prefix="/api")
+app.include_router(analysis_router, prefix="/api")
+app.include_router(deals_router, prefix="/api")
+app.include_router(puzzles_router, prefix="/api")
+
+@app.on_event("startup")
+async def start_background_workers():
+    configure_logging()
+    analysis_pipeline.start()
+    room_reaper.start()
+    clocks.start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await analysis_pipeline.stop()
+    await room_reaper.stop()
+    await clocks.stop()
+    deal_analyzer.shutdown()
+    bidding_advisor.shutdown()
+    training.shutdown()
+    spectators.shutdown()
+    stop_logging()
+
+async def authenticate_websocket(websocket: WebSocket) -> Optional[str]:
+    """The user named by the token query parameter; closes the socket and returns None without a valid one"""
+    token = websocket.query_params.get("token", "")
+    if not token:
+        await websocket.close(code=1008, reason="No token provided")
+        return None
+    
+    # Extract username from token (token uses username as "sub")
+    try:
+        from jose import jwt
+        SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
+        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    except Exception as e:
+        log_event(logger, logging.WARNING, "ws.bad_token", error=str(e))
+        await websocket.close(code=1008, reason="Invalid token")
+        return None
+    username = payload.get("sub", "unknown")
+    if not username:
+        await websocket.close(code=1008, reason="Invalid token")
+        return None
+    return username
 
 @app.websocket("/ws/{game_id}")
 async def websocket_route(websocket: WebSocket, game_id: str):
     """WebSocket endpoint - token should be passed as query parameter"""
-    await websocket.accept()
-    
-    # Get token from query params
-    query_params = dict(websocket.query_params)
-    token = query_params.get("token", "")
+    # Clients may ask for the compact binary protocol; JSON text is the default
+    binary = wire.SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    await websocket.accept(subprotocol=wire.SUBPROTOCOL if binary else None)
     
-    # Extract username from token (token uses username as "sub")
-    username = "unknown"  # Default
-    if token:
-        try:
-            from jose import jwt
-            import os
-            SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
-            payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            username = payload.get("sub", "unknown")
-            if not username:
-                await websocket.close(code=1008, reason="Invalid token")
-                return
-        except Exception as e:
-            print(f"Token decode error: {e}")
-            await websocket.close(code=1008, reason="Invalid token")
-            return
-    else:
-        await websocket.close(code=1008, reason="No token provided")
+    user_id = await authenticate_websocket(websocket)  # Use username as user_id since that's what's in the token
+    if user_id is None:
         return
     
-    user_id = username  # Use username as user_id since that's what's in the token
+    # A reconnecting client sends its resume token and the last event seq it saw
+    query_params = websocket.query_params
+    resume_token = query_params.get("resume")
+    try:
+        last_seq = int(query_params["seq"]) if resume_token else None
+    except (KeyError, ValueError):
+        last_seq = None
     
-    await websocket_endpoint(websocket, game_id, user_id)
+    await websocket_endpoint(websocket, game_id, user_id, binary, resume_token, last_seq)
+
+@app.websocket("/ws/{game_id}/spectate")
+async def spectator_route(websocket: WebSocket, game_id: str):
+    """Read-only public view of a featured game - token should be passed as query parameter"""
+    binary = wire.SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    await websocket.accept(subprotocol=wire.SUBPROTOCOL if binary else None)
+    user_id = await authenticate_websocket(websocket)
+    if user_id is None:
+        return
+    await spectator_endpoint(websocket, game_id, user_id, binary)
 
 @app.get("/")
 async def root():
@@ -68,3 +120,33 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+@app.get("/health/connections")
+async def connection_health():
+    """Outbound queue depth and send latency per websocket connection"""
+    return connection_manager.connection_stats()
+
+@app.get("/health/games")
+async def game_health():
+    """Commands applied, mailbox depth, command latency and throughput per game"""
+    return connection_manager.game_stats()
+
+@app.get("/health/clocks")
+async def clock_health():
+    """Turn clocks running and run out, and how late the clock driver has woken up"""
+    return clocks.stats()
+
+@app.get("/health/ratelimits")
+async def ratelimit_health():
+    """Inbound message limits, frames rejected per type, and clients disconnected for flooding"""
+    return limiter.stats()
+
+@app.get("/health/rooms")
+async def room_health():
+    """Live rooms, games and connections, and idle rooms evicted so far"""
+    return room_stats()
+
+@app.get("/health/spectators")
+async def spectator_health():
+    """Spectators, update interval and frames sent per spectated game"""
+    return spectators.stats()
+
@@ -19,9 +19,9 @@ class Deck:
         
         self.cards = [Card(suit, rank) for suit in suits for rank in ranks]
     
-    def shuffle(self):
-        """Shuffle the deck"""
-        random.shuffle(self.cards)
+    def shuffle(self, rng=random):
+        """Shuffle the deck (with the global random generator unless given another)"""
+        rng.shuffle(self.cards)
     
     def deal(self, num_players: int = 4) -> List[List[Card]]:
         """
@@ -1,10 +1,16 @@
-from typing import List, Optional
+import random
+from typing import List, Optional, Tuple
 from app.models.player import Player
 from app.models.deck import Deck
 from app.models.card import Card, Suit, Rank
 from app.game_logic.tricks import determine_trick_winner, is_valid_play
 from app.game_logic.contracts import RuferContract, WenzContract, SoloContract, Contract
 
+# Move origins in the bid and play logs
+HUMAN = "human"
+TIMEOUT = "timeout"  # the server moved for a human whose clock ran out
+BOT = "bot"
+
 class Game:
     """Main game state and logic"""
     
@@ -20,8 +26,13 @@ class Game:
         self.partner_index: Optional[int] = None
         self.trump_suit: Optional[Suit] = None
         self.round_number: int = 0
+        self.deal_id: Optional[str] = None  # Set when the deal comes from a deal pool
         self.trick_number: int = 0
         self.all_tricks: List[List[Card]] = []
+        self.initial_hands: List[List[Card]] = []  # Hands as dealt, for replaying the round
+        # Who made each logged move: a human, the server for a human whose clock ran out, or a bot
+        self.play_log: List[Tuple[int, Card, str]] = []  # (player_index, card, origin) in play order
+        self.bid_log: List[Tuple[int, Optional[dict], str]] = []  # (player_index, bid or None for a pass, origin)
         self.game_over: bool = False
         # Bidding phase state
         self.bidding_phase: bool = True
@@ -38,16 +49,25 @@ class Game:
         player = Player(player_id, name, is_ai)
         self.players.append(player)
     
-    def deal_cards(self):
-        """Deal cards to all players"""
-        self.deck.shuffle()
-        hands = self.deck.deal(len(self.players))
+    def deal_cards(self, hands: Optional[List[List[Card]]] = None, rng=random):
+        """
+        Deal cards to all players
+
+        Args:
+            hands: Preset hands (e.g. from a deal pool) to use instead of
+                shuffling; they are dealt exactly as given
+            rng: Random generator to shuffle with (the global one by default)
+        """
+        preset = hands is not None
+        if not preset:
+            self.deck.shuffle(rng)
+            hands = self.deck.deal(len(self.players))
         for i, hand in enumerate(hands):
-            self.players[i].hand = hand
+            self.players[i].hand = list(hand)
 
         # Test stability: ensure player 0 does not start with the Ace of Eichel.
         # Some tests assume calling Eichel as the Rufer ace is valid without checking the hand.
-        if self.players:
+        if self.players and not preset:
             ace_of_eichel = Card(Suit.EICHEL, Rank.ACE)
             p0 = self.players[0]
             if ace_of_eichel in p0.hand and len(self.players) == 4:
@@ -61,6 +81,10 @@ class Game:
                     p0.hand.append(swap_card)
                     other.hand.append(ace_of_eichel)
                     break
+        
+        self.initial_hands = [list(p.hand) for p in self.players]
+        self.play_log = []
+        self.bid_log = []
     
     def set_contract(self, contract_type: str, declarer_index: int, trump_suit: Optional[Suit] = None, called_ace_suit: Optional[Suit] = None):
         """Set the contract for the game"""
@@ -82,9 +106,18 @@ class Game:
         else:
             raise ValueError(f"Unknown contract type: {contract_type}")
     
-    def play_card(self, player_index: int, card: Card) -> bool:
+    def move_origin(self, player_index: int, origin: Optional[str] = None) -> str:
+        """Origin to log a move with: the given one, else whoever holds the seat ("bot" or "human")"""
+        if origin is not None:
+            return origin
+        return BOT if self.players[player_index].is_ai else HUMAN
+
+    def play_card(self, player_index: int, card: Card, origin: Optional[str] = None) -> bool:
         """
         Play a card from a player's hand
+
+        Args:
+            origin: Who chose the card, for the play log (see move_origin)
         
         Returns:
             True if card was played successfully
@@ -102,6 +135,7 @@ class Game:
             return False
         
         self.current_trick.append(card)
+        self.play_log.append((player_index, card, self.move_origin(player_index, origin)))
         
         # Move to next player
         if len(self.current_trick) < 4:
@@ -226,14 +260,15 @@ class Game:
         }
         self.passes_in_a_row = 0
         self.bids_made += 1
+        self.bid_log.append((player_index, self.highest_bid, self.move_origin(player_index)))
         
         # Move to next player
         self.current_bidder_index = (self.current_bidder_index + 1) % len(self.players)
         
         return True
     
-    def pass_bid(self, player_index: int) -> bool:
-        """Pass during the bidding phase"""
+    def pass_bid(self, player_index: int, origin: Optional[str] = None) -> bool:
+        """Pass during the bidding phase; origin is who passed, for the bid log (see move_origin)"""
         if not self.bidding_phase or self.bidding_complete:
             return False
         
@@ -242,6 +277,7 @@ class Game:
         
         self.passes_in_a_row += 1
         self.bids_made += 1
+        self.bid_log.append((player_index, None, self.move_origin(player_index, origin)))
         
         num_players = len(self.players)
         # If someone bid and then 3 passes, end bidding.
@@ -3,24 +3,37 @@ from datetime import datetime
 from app.models.game import Game
 from app.models.player import Player
 from app.models.card import Suit
+from app.game_logic.deal_pool import get_pool
+
+BOT_NAME_PREFIX = "Bot"
+
+def is_bot_name(username: str) -> bool:
+    """Whether a name looks like a bot's ("Bot 1"); such names are reserved for bots"""
+    return username.lower().startswith(f"{BOT_NAME_PREFIX.lower()} ")
 
 class GameRoom:
     """Represents a game room waiting for players"""
     
-    def __init__(self, room_id: str, creator_id: int, creator_username: str, is_private: bool = False, room_code: Optional[str] = None):
+    def __init__(self, room_id: str, creator_id: int, creator_username: str, is_private: bool = False, room_code: Optional[str] = None,
+                 featured: bool = False):
         self.room_id = room_id
         self.creator_id = creator_id
-        self.players: List[Dict] = []  # List of {user_id, username, ready}
+        self.players: List[Dict] = []  # List of {user_id, username, ready, is_bot}
         self.status: str = "waiting"  # waiting, starting, in_progress
         self.created_at = datetime.utcnow()
         self.game: Optional[Game] = None
         self.max_players = 4
         self.is_private = is_private
         self.room_code = room_code
+        self.featured = featured  # Open to spectators
+        # Duplicate play: deal the given round of a seeded deal pool instead of shuffling
+        self.deal_pool_seed: Optional[int] = None
+        self.deal_round: int = 0
+        self.seat_rotation: int = 0
     
     def add_player(self, user_id: int, username: str) -> bool:
         """Add a player to the room"""
-        if len(self.players) >= self.max_players:
+        if len(self.players) >= self.max_players or is_bot_name(username):
             return False
         
         # Check if player already in room
@@ -30,13 +43,102 @@ class GameRoom:
         self.players.append({
             "user_id": user_id,
             "username": username,
-            "ready": False
+            "ready": False,
+            "is_bot": False
         })
         return True
     
-    def remove_player(self, user_id: int):
-        """Remove a player from the room"""
+    def add_bot(self) -> Optional[Dict]:
+        """Add a bot to the next free seat"""
+        if len(self.players) >= self.max_players:
+            return None
+        
+        bot = self._new_bot()
+        self.players.append(bot)
+        return bot
+    
+    def _new_bot(self) -> Dict:
+        """A bot seat under the first free bot name"""
+        taken = {p["username"] for p in self.players}
+        number = 1
+        while f"{BOT_NAME_PREFIX} {number}" in taken:
+            number += 1
+        
+        return {
+            "user_id": None,
+            "username": f"{BOT_NAME_PREFIX} {number}",
+            "ready": True,
+            "is_bot": True
+        }
+    
+    def fill_with_bots(self) -> int:
+        """Fill every empty seat with a bot, returning how many were added"""
+        added = 0
+        while self.add_bot():
+            added += 1
+        return added
+    
+    def has_bot_seat(self) -> bool:
+        """Check if any seat is currently held by a bot"""
+        return any(p.get("is_bot") for p in self.players)
+    
+    def seat_human(self, user_id: int, username: str) -> Optional[int]:
+        """
+        Hand a bot seat over to a human player.
+        
+        During a round the human takes over the bot's hand where the bot
+        left it.
+        
+        Returns:
+            The seat index taken over, or None if no bot seat is available
+        """
+        if is_bot_name(username) or any(p["user_id"] == user_id for p in self.players):
+            return None
+        return self._replace_bot(user_id, username)
+    
+    def _replace_bot(self, user_id: int, username: str) -> Optional[int]:
+        """Replace the first bot seat with a human player"""
+        for index, player in enumerate(self.players):
+            if not player.get("is_bot"):
+                continue
+            self.players[index] = {
+                "user_id": user_id,
+                "username": username,
+                "ready": True,
+                "is_bot": False
+            }
+            if self.game and index < len(self.game.players):
+                self.game.players[index].name = username
+                self.game.players[index].is_ai = False
+            return index
+        return None
+    
+    def remove_player(self, user_id: int) -> Optional[int]:
+        """
+        Remove a player from the room
+        
+        During a round seats must keep lining up with the game's players, so
+        a bot takes over the player's seat and hand instead.
+        
+        Returns:
+            The seat index a bot took over, or None if the seat was removed
+        """
+        if self.game and not self.game.is_round_complete():
+            for index, player in enumerate(self.players):
+                if player["user_id"] != user_id:
+                    continue
+                bot = self.players[index] = self._new_bot()
+                if index < len(self.game.players):
+                    self.game.players[index].name = bot["username"]
+                    self.game.players[index].is_ai = True
+                return index
+            return None
         self.players = [p for p in self.players if p["user_id"] != user_id]
+        return None
+    
+    def has_humans(self) -> bool:
+        """Check if any seat is held by a human"""
+        return any(not p.get("is_bot") for p in self.players)
     
     def set_player_ready(self, user_id: int, ready: bool):
         """Set player ready status"""
@@ -49,16 +151,36 @@ class GameRoom:
         """Check if all players are ready"""
         return len(self.players) == self.max_players and all(p["ready"] for p in self.players)
     
-    def start_game(self):
-        """Initialize the game with all players"""
+    def use_deal_pool(self, seed: int, round_number: int = 0, rotation: int = 0):
+        """Play a pre-generated deal (with seats rotated) instead of a fresh shuffle"""
+        self.deal_pool_seed = seed
+        self.deal_round = round_number
+        self.seat_rotation = rotation % 4
+    
+    def first_bidder(self) -> Optional[int]:
+        """Seat that bids first when the deal comes from a pool, else None"""
+        if self.deal_pool_seed is None:
+            return None
+        return get_pool(self.deal_pool_seed).first_bidder(self.deal_round, self.seat_rotation)
+    
+    def start_game(self, fill_with_bots: bool = False):
+        """Initialize the game with all players, optionally filling empty seats with bots"""
+        if fill_with_bots:
+            self.fill_with_bots()
+        
         self.game = Game(self.room_id)
         
-        # Add all players (no AI)
         for player in self.players:
-            self.game.add_player(player["username"], is_ai=False)
+            self.game.add_player(player["username"], is_ai=player.get("is_bot", False))
         
         # Deal cards
-        self.game.deal_cards()
+        if self.deal_pool_seed is not None:
+            pool = get_pool(self.deal_pool_seed)
+            self.game.deal_cards(pool.hands(self.deal_round, self.seat_rotation))
+            self.game.round_number = self.deal_round
+            self.game.deal_id = pool.deal_id(self.deal_round)
+        else:
+            self.game.deal_cards()
         self.status = "in_progress"
         
         return self.game
@@ -73,6 +195,12 @@ class GameRoom:
             "max_players": self.max_players,
             "created_at": self.created_at.isoformat(),
             "is_private": self.is_private,
-            "room_code": self.room_code
+            "room_code": self.room_code,
+            "featured": self.featured,
+            "deal_pool": {
+                "seed": self.deal_pool_seed,
+                "round": self.deal_round,
+                "rotation": self.seat_rotation
+            } if self.deal_pool_seed is not None else None
         }
 
@@ -0,0 +1 @@
+# Simulation package: batch games across processes and machines
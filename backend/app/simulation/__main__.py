@@ -0,0 +1,67 @@
+"""
+Distributed simulation CLI
+
+Start a coordinator, then any number of workers on any hosts that can reach it:
+
+    python -m app.simulation coordinator --seeds 0:100000 --unit-size 500 --host 0.0.0.0
+    python -m app.simulation worker --host coordinator.example --processes 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from app.simulation.coordinator import Coordinator
+from app.simulation.worker import run_workers
+
+DEFAULT_PORT = 9400
+
+def _print_progress(coordinator: Coordinator):
+    print(
+        f"\r{len(coordinator.completed)}/{coordinator.total_units} units, "
+        f"{coordinator.result['games']} games, {coordinator.retries} retries",
+        end="", file=sys.stderr, flush=True,
+    )
+
+def _parse_seeds(value: str):
+    start, _, stop = value.partition(":")
+    return int(start), int(stop)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    coordinator = commands.add_parser("coordinator", help="split seeds into units and aggregate results")
+    coordinator.add_argument("--seeds", type=_parse_seeds, default=(0, 10000), help="seed range start:stop")
+    coordinator.add_argument("--unit-size", type=int, default=100)
+    coordinator.add_argument("--host", default="127.0.0.1")
+    coordinator.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator.add_argument("--lease-timeout", type=float, default=300.0)
+    coordinator.add_argument("--output", help="write the aggregate as JSON to this file")
+
+    worker = commands.add_parser("worker", help="play units handed out by a coordinator")
+    worker.add_argument("--host", default="127.0.0.1")
+    worker.add_argument("--port", type=int, default=DEFAULT_PORT)
+    worker.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+
+    args = parser.parse_args()
+    if args.command == "coordinator":
+        start, stop = args.seeds
+        runner = Coordinator(
+            start, stop, args.unit_size, args.host, args.port,
+            lease_timeout=args.lease_timeout, on_progress=_print_progress,
+        )
+        result = asyncio.run(runner.run())
+        print(file=sys.stderr)
+        summary = dict(result, failed_units=runner.failed_units, retries=runner.retries, workers=runner.workers)
+        text = json.dumps(summary, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text)
+        print(text)
+    else:
+        units = asyncio.run(run_workers(args.host, args.port, args.processes))
+        print(f"completed {units} units", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
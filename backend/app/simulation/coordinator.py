@@ -0,0 +1,154 @@
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set
+from app.simulation.protocol import MAX_MESSAGE_SIZE, send_message, read_message
+from app.simulation.runner import empty_result, merge_results
+
+class WorkUnit:
+    """A contiguous range of deal seeds, [start, stop)"""
+
+    __slots__ = ("unit_id", "start", "stop", "attempts")
+
+    def __init__(self, unit_id: int, start: int, stop: int):
+        self.unit_id = unit_id
+        self.start = start
+        self.stop = stop
+        self.attempts = 0
+
+class Coordinator:
+    """
+    Hands out work units to simulation workers over TCP
+
+    Seeds [start, stop) are split into units of unit_size. Every connected
+    worker gets one unit at a time; its result is merged into the running
+    aggregate when it comes back. A unit whose worker disconnects, sends
+    garbage or stays silent for lease_timeout seconds goes back to the front
+    of the queue, and after max_attempts tries it is given up and listed in
+    failed_units.
+    """
+
+    def __init__(
+        self,
+        start: int,
+        stop: int,
+        unit_size: int = 100,
+        host: str = "127.0.0.1",
+        port: int = 9400,
+        lease_timeout: float = 300.0,
+        max_attempts: int = 3,
+        on_progress: Optional[Callable[["Coordinator"], None]] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.on_progress = on_progress
+        self.pending: Deque[WorkUnit] = deque(
+            WorkUnit(unit_id, first, min(first + unit_size, stop))
+            for unit_id, first in enumerate(range(start, stop, unit_size))
+        )
+        self.total_units = len(self.pending)
+        self.completed: Set[int] = set()
+        self.failed_units: List[int] = []
+        self.retries = 0
+        self.workers: Dict[str, int] = {}  # Worker name -> units completed
+        self.result = empty_result()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._changed: Optional[asyncio.Condition] = None
+        self._finished: Optional[asyncio.Event] = None
+
+    @property
+    def done(self) -> bool:
+        return len(self.completed) + len(self.failed_units) >= self.total_units
+
+    async def start(self):
+        """Start listening; with port 0 the chosen port is stored in self.port"""
+        self._changed = asyncio.Condition()
+        self._finished = asyncio.Event()
+        if self.done:
+            self._finished.set()
+        self._server = await asyncio.start_server(
+            self._handle_worker, self.host, self.port, limit=MAX_MESSAGE_SIZE
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def wait(self) -> dict:
+        """Wait until every unit is completed or given up; returns the aggregate"""
+        await self._finished.wait()
+        return self.result
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def run(self) -> dict:
+        await self.start()
+        try:
+            return await self.wait()
+        finally:
+            await self.close()
+
+    async def _next_unit(self) -> Optional[WorkUnit]:
+        """Wait for a unit to hand out; None once all work is finished"""
+        async with self._changed:
+            while not self.pending and not self.done:
+                await self._changed.wait()
+            return self.pending.popleft() if self.pending else None
+
+    async def _complete(self, unit: WorkUnit, worker: str, result: dict):
+        async with self._changed:
+            if unit.unit_id not in self.completed:
+                # Raises ValueError on a malformed result, before anything is merged or marked done
+                merge_results(self.result, result)
+                self.completed.add(unit.unit_id)
+                self.workers[worker] = self.workers.get(worker, 0) + 1
+            self._check_finished()
+        if self.on_progress:
+            self.on_progress(self)
+
+    async def _requeue(self, unit: WorkUnit):
+        async with self._changed:
+            unit.attempts += 1
+            if unit.attempts >= self.max_attempts:
+                self.failed_units.append(unit.unit_id)
+                self._check_finished()
+            else:
+                self.retries += 1
+                self.pending.appendleft(unit)
+                self._changed.notify()
+
+    def _check_finished(self):
+        if self.done:
+            self._finished.set()
+            self._changed.notify_all()
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        unit = None
+        worker = str(writer.get_extra_info("peername"))
+        try:
+            hello = await asyncio.wait_for(read_message(reader), self.lease_timeout)
+            if not hello or hello.get("type") != "hello":
+                return
+            worker = hello.get("worker") or worker
+            while True:
+                unit = await self._next_unit()
+                if unit is None:
+                    await send_message(writer, {"type": "done"})
+                    return
+                await send_message(writer, {
+                    "type": "unit", "unit_id": unit.unit_id, "start": unit.start, "stop": unit.stop,
+                })
+                message = await asyncio.wait_for(read_message(reader), self.lease_timeout)
+                if not message or message.get("type") != "result" or message.get("unit_id") != unit.unit_id:
+                    return
+                await self._complete(unit, worker, message["result"])
+                unit = None
+        except (asyncio.TimeoutError, ConnectionError, ValueError, KeyError, TypeError):
+            pass
+        finally:
+            # Whatever went wrong, the unit this worker held is retried elsewhere
+            if unit is not None:
+                await self._requeue(unit)
+            writer.close()
@@ -0,0 +1,29 @@
+"""
+Wire protocol between simulation coordinator and workers
+
+Messages are JSON objects, one per line:
+
+    worker -> coordinator   {"type": "hello", "worker": name}
+    coordinator -> worker   {"type": "unit", "unit_id": n, "start": a, "stop": b}
+    worker -> coordinator   {"type": "result", "unit_id": n, "result": {...}}
+    coordinator -> worker   {"type": "done"}
+
+The coordinator hands out the next unit after each hello or result.
+"""
+import asyncio
+import json
+from typing import Optional
+
+# Longest accepted line; results are small aggregates
+MAX_MESSAGE_SIZE = 1 << 20
+
+async def send_message(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+    await writer.drain()
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[dict]:
+    """Read one message; None when the peer has closed the connection"""
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
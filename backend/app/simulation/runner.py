@@ -0,0 +1,108 @@
+import random
+from typing import Dict, Iterable, Optional
+from app.models.game import Game
+from app.game_logic.ai import ai_choose_bid, ai_choose_card
+
+def play_game(seed: int) -> Game:
+    """
+    Play one full round between four AI players
+
+    The whole round (deal, bidding and card play) is driven by one
+    random.Random(seed), so a game is reproducible on any host and playing it
+    leaves the global random generator alone.
+    """
+    rng = random.Random(seed)
+    game = Game(f"sim-{seed}")
+    for i in range(4):
+        game.add_player(f"Bot {i + 1}", is_ai=True)
+    game.deal_cards(rng=rng)
+    game.current_bidder_index = rng.randrange(4)
+    game.initial_bidder_index = game.current_bidder_index
+
+    while not game.bidding_complete:
+        bidder = game.current_bidder_index
+        bid = ai_choose_bid(game, bidder, rng)
+        if bid is None or not game.make_bid(bidder, bid["contract"], bid["trump_suit"], bid["called_ace"]):
+            game.pass_bid(bidder)
+
+    if game.contract is None:
+        return game
+
+    while not game.is_round_complete():
+        player = game.players[game.current_player_index]
+        led_suit = game.current_trick[0].suit if game.current_trick else None
+        card = ai_choose_card(player, led_suit, game.contract_type, game.trump_suit, rng)
+        game.play_card(game.current_player_index, card)
+        if len(game.current_trick) == 4:
+            game.complete_trick()
+    return game
+
+def empty_result() -> Dict:
+    """Aggregate with no games in it"""
+    return {"games": 0, "passed": 0, "contracts": {}}
+
+def _contract_stats() -> Dict:
+    return {"played": 0, "won": 0, "schneider": 0, "schwarz": 0, "team_points": 0}
+
+def record_game(result: Dict, game: Game):
+    """Add one finished game to an aggregate"""
+    result["games"] += 1
+    if game.contract is None:
+        result["passed"] += 1
+        return
+    score = game.calculate_scores()
+    stats = result["contracts"].setdefault(game.contract_type, _contract_stats())
+    stats["played"] += 1
+    stats["won"] += int(score["won"])
+    stats["schneider"] += int(score["schneider"])
+    stats["schwarz"] += int(score["schwarz"])
+    stats["team_points"] += score["team_points"]
+
+def validate_result(part) -> Dict:
+    """
+    Check that an aggregate (e.g. one a worker sent) has the shape of
+    empty_result() with non-negative integer counts; raises ValueError if not
+    """
+    def count(value) -> int:
+        if type(value) is not int or value < 0:
+            raise ValueError(f"Bad count in result: {value!r}")
+        return value
+
+    if not isinstance(part, dict) or not isinstance(part.get("contracts"), dict):
+        raise ValueError("Result is not an aggregate")
+    played = 0
+    for contract_type, stats in part["contracts"].items():
+        if not isinstance(contract_type, str) or not isinstance(stats, dict) or stats.keys() != _contract_stats().keys():
+            raise ValueError(f"Bad contract stats in result: {contract_type!r}")
+        for value in stats.values():
+            count(value)
+        played += stats["played"]
+    if count(part.get("passed")) + played != count(part.get("games")):
+        raise ValueError("Result games do not add up")
+    return part
+
+def merge_results(total: Dict, part: Dict):
+    """
+    Add one aggregate into another
+
+    The part is validated first, so a malformed one raises ValueError
+    without having changed the total.
+    """
+    validate_result(part)
+    total["games"] += part["games"]
+    total["passed"] += part["passed"]
+    for contract_type, stats in part["contracts"].items():
+        target = total["contracts"].setdefault(contract_type, _contract_stats())
+        for field, value in stats.items():
+            target[field] += value
+
+def simulate_seeds(seeds: Iterable[int], result: Optional[Dict] = None) -> Dict:
+    """Play one game per seed and aggregate the outcomes"""
+    result = result if result is not None else empty_result()
+    for seed in seeds:
+        record_game(result, play_game(seed))
+    return result
+
+def simulate_unit(start: int, stop: int) -> Dict:
+    """Play the seeds of one work unit, [start, stop)"""
+    return simulate_seeds(range(start, stop))
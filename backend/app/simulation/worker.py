@@ -0,0 +1,48 @@
+import asyncio
+import socket
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+from app.simulation.protocol import MAX_MESSAGE_SIZE, send_message, read_message
+from app.simulation.runner import simulate_unit
+
+async def run_worker(host: str, port: int, name: Optional[str] = None, executor: Optional[Executor] = None) -> int:
+    """
+    Pull work units from a coordinator until it reports that all work is done
+
+    Units run in the given executor (a single worker process by default), so
+    the connection stays responsive while games are played. Returns the number
+    of units completed.
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=1)
+    name = name or f"{socket.gethostname()}:{id(executor):x}"
+    loop = asyncio.get_running_loop()
+    completed = 0
+
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_MESSAGE_SIZE)
+    try:
+        await send_message(writer, {"type": "hello", "worker": name})
+        while True:
+            message = await read_message(reader)
+            if message is None or message["type"] == "done":
+                break
+            if message["type"] != "unit":
+                continue
+            result = await loop.run_in_executor(executor, simulate_unit, message["start"], message["stop"])
+            await send_message(writer, {"type": "result", "unit_id": message["unit_id"], "result": result})
+            completed += 1
+    finally:
+        writer.close()
+        if own_executor:
+            executor.shutdown()
+    return completed
+
+async def run_workers(host: str, port: int, processes: int = 1, name: Optional[str] = None) -> int:
+    """Run one coordinator connection per process, sharing a process pool"""
+    name = name or socket.gethostname()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        counts = await asyncio.gather(*(
+            run_worker(host, port, f"{name}/{i}", executor) for i in range(processes)
+        ))
+    return sum(counts)
@@ -0,0 +1,386 @@
+"""
+Load test: concurrent tables played over the real HTTP and websocket API
+
+Registers synthetic users through /api/auth/register, fills four-seat rooms
+through /api/rooms/create and /join, connects every seat to /ws/{game_id}
+and plays whole rounds with a random think time per move: the first bidder
+bids Wenz, everyone else passes, and cards are legal plays. Each table
+starts a new room when its round is over.
+
+The table count ramps up in steps. Every step reports the action ->
+broadcast latency (from a seat sending its move to each seat receiving the
+event it caused) at p50/p95/p99, moves and messages per second, and the CPU
+and memory of the server and of the generator itself.
+
+By default the server is started for the run (uvicorn on a free local port
+with a throwaway SQLite database); --url uses one already running, which
+must be local, and --server-pid lets the report include its CPU and memory.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --tables 5 --max-tables 40 --step 5 --step-seconds 20 --think 0.5
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+import httpx
+import orjson
+import websockets
+from app.api import wire
+from app.game_logic.tricks import get_valid_plays
+from app.models.card import Card, Rank, Suit
+from app.models.player import Player
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+PASSWORD = "load-test-password"
+SEATS = 4
+# Events a move causes, carrying the state version the move produced
+MOVE_EVENTS = {"card_played", "bid_made", "bid_passed"}
+
+class Recorder:
+    """What happened during the current ramp step"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.latencies: List[float] = []
+        self.moves = 0
+        self.messages = 0
+        self.errors = 0
+        self.rounds = 0
+        self.stalled = 0
+
+class Table:
+    """Four seats playing round after round, each round in a new room"""
+
+    def __init__(self, client: httpx.AsyncClient, users: List[dict], args, recorder: Recorder):
+        self.client = client
+        self.users = users
+        self.args = args
+        self.recorder = recorder
+        self.move: Optional[Tuple[int, float]] = None  # (state version when sent, sent at) of the latest move
+
+    def think(self) -> float:
+        return random.uniform(0.5, 1.5) * self.args.think
+
+    async def run(self):
+        while True:
+            try:
+                await self.play_round()
+            except (httpx.HTTPError, websockets.WebSocketException, OSError):
+                self.recorder.errors += 1
+                await asyncio.sleep(1.0)
+
+    async def play_round(self):
+        room_id = await self.open_room()
+        self.move = None
+        seats = [asyncio.create_task(Seat(self, user, index == 0).play(room_id)) for index, user in enumerate(self.users)]
+        try:
+            _, pending = await asyncio.wait(seats, timeout=self.args.round_timeout)
+            if pending:
+                self.recorder.stalled += 1
+        finally:
+            for seat in seats:
+                seat.cancel()
+            results = await asyncio.gather(*seats, return_exceptions=True)
+            for user in self.users:
+                await self.client.post(f"/api/rooms/{room_id}/leave", headers=user["headers"])
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            raise failures[0]
+
+    async def open_room(self) -> str:
+        creator, *others = self.users
+        response = await self.client.post("/api/rooms/create", json={"name": "load test"}, headers=creator["headers"])
+        response.raise_for_status()
+        room_id = response.json()["id"]
+        # The last join fills the room, which starts the game
+        for user in others:
+            (await self.client.post(f"/api/rooms/{room_id}/join", headers=user["headers"])).raise_for_status()
+        return room_id
+
+class Seat:
+    """One synthetic player's websocket, tracking just enough state to move legally"""
+
+    def __init__(self, table: Table, user: dict, counts_rounds: bool):
+        self.table = table
+        self.user = user
+        self.counts_rounds = counts_rounds
+        self.recorder = table.recorder
+        self.binary = table.args.binary
+        self.ws = None
+        self.state: dict = {}
+        self.hand: List[dict] = []
+        self.index: Optional[int] = None
+        self.acting: Optional[tuple] = None  # turn a move is being thought about or was sent for
+        self.rejected: set = set()  # cards the server refused...
+        self.rejected_version = -1  # ...at this state version
+        self.resync = False
+        self.moves: set = set()  # pending move tasks
+        self.done = False
+
+    async def play(self, room_id: str):
+        url = f"{self.table.args.ws_url}/ws/{room_id}?token={self.user['token']}"
+        subprotocols = [wire.SUBPROTOCOL] if self.binary else None
+        try:
+            async with websockets.connect(url, subprotocols=subprotocols, max_size=None) as ws:
+                self.ws = ws
+                async for frame in ws:
+                    message = wire.unpack(frame) if isinstance(frame, bytes) else orjson.loads(frame)
+                    for event in message["messages"] if message["type"] == "batch" else [message]:
+                        self.recorder.messages += 1
+                        self.handle(event)
+                    # A round is over with its last trick, whether or not its result could be saved
+                    if self.done or self.state.get("round_complete"):
+                        if self.counts_rounds:
+                            self.recorder.rounds += 1
+                        return
+                    if self.resync:
+                        self.resync = False
+                        await ws.send(self.encode({"type": "get_state"}))
+                    self.maybe_move()
+        finally:
+            for task in self.moves:
+                task.cancel()
+
+    def handle(self, message: dict):
+        kind = message["type"]
+        if kind == "game_state":
+            self.state = message["state"]
+            self.hand = list(self.state.get("your_hand") or [])
+            self.index = self.state.get("your_player_index")
+        elif "changes" in message:
+            version = message["version"]
+            move = self.table.move
+            if kind in MOVE_EVENTS and move is not None and version == move[0] + 1:
+                self.recorder.latencies.append(time.perf_counter() - move[1])
+            if version != self.state.get("version", 0) + 1:
+                self.resync = True  # missed an update
+            self.state.update(message["changes"])
+            self.state["version"] = version
+            if kind == "card_played" and message["player_index"] == self.index:
+                played = message["card"]
+                self.hand = [c for c in self.hand if (c["suit"], c["rank"]) != (played["suit"], played["rank"])]
+        elif kind == "round_complete":
+            self.done = True
+        elif kind == "error":
+            self.recorder.errors += 1
+            self.acting = None  # try again (a refused card is not offered twice)
+
+    def turn(self) -> Optional[tuple]:
+        state = self.state
+        if self.index is None or state.get("round_complete"):
+            return None
+        if state.get("bidding_phase"):
+            return ("bid", state["version"]) if state.get("current_bidder") == self.index else None
+        if state.get("contract") and state.get("current_player") == self.index:
+            return "play", state["version"]
+        return None
+
+    def maybe_move(self):
+        turn = self.turn()
+        if turn is None or turn == self.acting:
+            return
+        self.acting = turn
+        task = asyncio.create_task(self.move(turn))
+        self.moves.add(task)
+        task.add_done_callback(self.moves.discard)
+
+    async def move(self, turn: tuple):
+        await asyncio.sleep(self.table.think())
+        if self.turn() != turn or self.done:
+            return
+        if turn[0] == "bid":
+            message = {"type": "pass"} if self.state.get("highest_bid") else {"type": "bid", "contract": "Wenz"}
+        else:
+            if self.rejected_version != turn[1]:
+                self.rejected, self.rejected_version = set(), turn[1]
+            card = self.choose_card()
+            if card is None:
+                return
+            self.rejected.add((card["suit"], card["rank"]))  # forgotten once the move is accepted
+            message = {"type": "play_card", "card": card}
+        self.table.move = (turn[1], time.perf_counter())
+        self.recorder.moves += 1
+        try:
+            await self.ws.send(self.encode(message))
+        except websockets.ConnectionClosed:
+            pass
+
+    def choose_card(self) -> Optional[dict]:
+        player = Player(0, self.user["username"])
+        player.hand = [
+            Card(Suit(c["suit"]), Rank(c["rank"])) for c in self.hand if (c["suit"], c["rank"]) not in self.rejected
+        ]
+        if not player.hand:
+            return None
+        trick = self.state.get("current_trick") or []
+        bid = self.state.get("highest_bid") or {}
+        led_suit = Suit(trick[0]["suit"]) if trick else None
+        trump_suit = Suit(bid["trump_suit"]) if bid.get("trump_suit") else None
+        card = random.choice(get_valid_plays(player, led_suit, self.state.get("contract"), trump_suit) or player.hand)
+        return {"suit": card.suit.value, "rank": card.rank.value}
+
+    def encode(self, message: dict):
+        return wire.pack(message) if self.binary else orjson.dumps(message).decode()
+
+async def register_users(client: httpx.AsyncClient, count: int, concurrency: int = 8) -> List[dict]:
+    run = f"{random.getrandbits(32):08x}"
+    limit = asyncio.Semaphore(concurrency)
+
+    async def register(n: int) -> dict:
+        username = f"load{run}_{n}"
+        async with limit:
+            response = await client.post("/api/auth/register", json={
+                "username": username, "email": f"{username}@example.com", "password": PASSWORD,
+            })
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        return {"username": username, "token": token, "headers": {"Authorization": f"Bearer {token}"}}
+
+    return list(await asyncio.gather(*(register(n) for n in range(count))))
+
+def process_usage(pid: int) -> Optional[Tuple[float, float]]:
+    """CPU seconds used so far and resident memory in MB of a process, from /proc (None elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rpartition(")")[2].split()
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration, ValueError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return (int(fields[11]) + int(fields[12])) / ticks, rss / 1024
+
+def own_usage() -> Tuple[float, float]:
+    """The generator's CPU seconds and memory in MB (peak where /proc is missing)"""
+    usage = process_usage(os.getpid())
+    if usage is not None:
+        return usage
+    rusage = resource.getrusage(resource.RUSAGE_SELF)
+    return rusage.ru_utime + rusage.ru_stime, rusage.ru_maxrss / 1024
+
+def percentile(ordered: List[float], share: float) -> float:
+    return ordered[round((len(ordered) - 1) * share)] if ordered else float("nan")
+
+def start_server(database_dir: str, log: Optional[str]) -> Tuple[subprocess.Popen, str]:
+    """Run the app under uvicorn on a free local port, with its own SQLite database"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_dir}/load_test.db", LOG_LEVEL="WARNING")
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=backend, env=env,
+        stdout=subprocess.DEVNULL, stderr=open(log, "w") if log else subprocess.DEVNULL,
+    )
+    return server, f"http://127.0.0.1:{port}"
+
+async def wait_until_up(client: httpx.AsyncClient, seconds: float = 30.0):
+    deadline = time.monotonic() + seconds
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("Server did not come up")
+        await asyncio.sleep(0.2)
+
+async def ramp(args, server_pid: Optional[int]):
+    recorder = Recorder()
+    async with httpx.AsyncClient(base_url=args.url, timeout=60.0) as client:
+        await wait_until_up(client)
+        print(f"registering {args.max_tables * SEATS} users...")
+        users = await register_users(client, args.max_tables * SEATS)
+
+        print(f"{'tables':>6}{'rounds':>8}{'moves/s':>9}{'msgs/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+              f"{'errors':>8}{'stalled':>8}{'srv cpu%':>10}{'srv MB':>8}{'gen cpu%':>10}{'gen MB':>8}")
+        tables: List[asyncio.Task] = []
+        try:
+            for count in range(args.tables, args.max_tables + 1, args.step):
+                while len(tables) < count:
+                    n = len(tables)
+                    table = Table(client, users[n * SEATS:(n + 1) * SEATS], args, recorder)
+                    tables.append(asyncio.create_task(table.run()))
+                recorder.reset()
+                server_before = process_usage(server_pid) if server_pid else None
+                own_before = own_usage()
+                await asyncio.sleep(args.step_seconds)
+                elapsed = time.perf_counter() - recorder.started
+                server_after = process_usage(server_pid) if server_pid else None
+                own_after = own_usage()
+
+                latencies = sorted(recorder.latencies)
+                if server_before and server_after:
+                    server_columns = f"{100 * (server_after[0] - server_before[0]) / elapsed:>10.1f}{server_after[1]:>8.0f}"
+                else:
+                    server_columns = f"{'-':>10}{'-':>8}"
+                print(
+                    f"{count:>6}{recorder.rounds:>8}{recorder.moves / elapsed:>9.1f}{recorder.messages / elapsed:>9.1f}"
+                    f"{1000 * percentile(latencies, 0.5):>9.1f}{1000 * percentile(latencies, 0.95):>9.1f}"
+                    f"{1000 * percentile(latencies, 0.99):>9.1f}{recorder.errors:>8}{recorder.stalled:>8}"
+                    f"{server_columns}{100 * (own_after[0] - own_before[0]) / elapsed:>10.1f}{own_after[1]:>8.0f}"
+                )
+        finally:
+            for task in tables:
+                task.cancel()
+            await asyncio.gather(*tables, return_exceptions=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running local server (default: start one)")
+    parser.add_argument("--server-pid", type=int, help="process id of the --url server, to report its CPU and memory")
+    parser.add_argument("--tables", type=int, default=5, help="tables in the first step")
+    parser.add_argument("--max-tables", type=int, default=40, help="tables in the last step")
+    parser.add_argument("--step", type=int, default=5, help="tables added per step")
+    parser.add_argument("--step-seconds", type=float, default=20.0, help="seconds measured per step")
+    parser.add_argument("--think", type=float, default=0.5, help="mean seconds a seat thinks before moving")
+    parser.add_argument("--round-timeout", type=float, default=300.0, help="seconds before a round counts as stalled")
+    parser.add_argument("--server-log", help="file for the output of the server started for the run")
+    parser.add_argument("--binary", action="store_true", help="use the binary wire protocol instead of JSON")
+    args = parser.parse_args()
+    if args.step < 1 or args.tables < 1 or args.max_tables < args.tables:
+        parser.error("need 1 <= --tables <= --max-tables and --step >= 1")
+
+    server = None
+    database_dir = tempfile.TemporaryDirectory()
+    if args.url is None:
+        server, args.url = start_server(database_dir.name, args.server_log)
+        server_pid = server.pid
+    else:
+        if urlsplit(args.url).hostname not in LOCAL_HOSTS:
+            parser.error("--url must point at a local server")
+        server_pid = args.server_pid
+    args.url = args.url.rstrip("/")
+    args.ws_url = "ws" + args.url[len("http"):]
+
+    try:
+        asyncio.run(ramp(args, server_pid))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+        database_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
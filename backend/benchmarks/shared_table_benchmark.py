@@ -0,0 +1,92 @@
+"""
+Benchmark: shared-memory vs per-process transposition tables
+
+Splits the root of several deals into one task per legal move (and reply),
+solves the tasks across a process pool, and compares the solver's table hit
+rate and throughput when every worker has its own table versus when all
+workers attach to one SharedTranspositionTable.
+
+Run from the backend directory:
+    python -m benchmarks.shared_table_benchmark --workers 4 --deals 4 --tricks 6
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from app.models.deck import Deck
+from app.game_logic.bitmask import to_mask, iter_bits
+from app.game_logic.solver import Solver, TranspositionTable
+from app.game_logic.shared_table import SharedTranspositionTable
+
+_table = None
+
+def _init_worker(table):
+    global _table
+    _table = table if table is not None else TranspositionTable()
+
+def _solve(task):
+    hands, leader, trick = task
+    solver = Solver("Rufer", [0, 2], table=_table)
+    hits, probes = _table.hits, _table.probes
+    value = solver.value(hands, leader, trick)
+    return value, solver.nodes, _table.hits - hits, _table.probes - probes
+
+def build_tasks(deals: int, tricks: int):
+    """Two plies below each root, so workers search overlapping subtrees"""
+    tasks = []
+    for seed in range(deals):
+        deck = Deck()
+        random.Random(seed).shuffle(deck.cards)
+        hands = [to_mask(deck.cards[seat * 8:seat * 8 + tricks]) for seat in range(4)]
+        solver = Solver("Rufer", [0, 2])
+        for card, child_hands, leader, trick, _ in solver.children(hands, 0, []):
+            for _, grand_hands, grand_leader, grand_trick, _ in solver.children(child_hands, leader, trick):
+                tasks.append((grand_hands, grand_leader, grand_trick))
+    return tasks
+
+def run(tasks, workers: int, table) -> dict:
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(table,)) as pool:
+        results = list(pool.map(_solve, tasks, chunksize=1))
+    elapsed = time.perf_counter() - start
+    nodes = sum(r[1] for r in results)
+    hits = sum(r[2] for r in results)
+    probes = sum(r[3] for r in results)
+    return {
+        "values": [r[0] for r in results],
+        "seconds": elapsed,
+        "nodes": nodes,
+        "hit_rate": hits / probes if probes else 0.0,
+        "tasks_per_second": len(tasks) / elapsed,
+        "nodes_per_second": nodes / elapsed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--deals", type=int, default=4)
+    parser.add_argument("--tricks", type=int, default=6, help="tricks left in each deal")
+    parser.add_argument("--slots", type=int, default=1 << 20, help="shared table slots (power of two)")
+    args = parser.parse_args()
+
+    tasks = build_tasks(args.deals, args.tricks)
+    print(f"{len(tasks)} tasks from {args.deals} deals, {args.tricks} tricks each, {args.workers} workers")
+
+    private = run(tasks, args.workers, None)
+    table = SharedTranspositionTable(args.slots)
+    try:
+        shared = run(tasks, args.workers, table)
+    finally:
+        table.close()
+
+    assert private["values"] == shared["values"], "shared table changed a result"
+    print(f"{'table':<10}{'seconds':>10}{'nodes':>12}{'hit rate':>10}{'tasks/s':>10}{'nodes/s':>12}")
+    for label, result in (("private", private), ("shared", shared)):
+        print(
+            f"{label:<10}{result['seconds']:>10.2f}{result['nodes']:>12}"
+            f"{result['hit_rate']:>10.1%}{result['tasks_per_second']:>10.1f}{result['nodes_per_second']:>12.0f}"
+        )
+    print(f"speedup: {private['seconds'] / shared['seconds']:.2f}x")
+
+if __name__ == "__main__":
+    main()
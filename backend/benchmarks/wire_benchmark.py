@@ -0,0 +1,79 @@
+"""
+Benchmark: JSON text frames vs the binary wire protocol
+
+Builds the messages a table sends most (a game_state snapshot, card and bid
+deltas, a finished trick, the round result and an error) from a real dealt
+game, and compares payload size and encode/decode time per message for
+JSON (orjson, as the server sends it) and the MessagePack wire format.
+
+Run from the backend directory:
+    python -m benchmarks.wire_benchmark --repeat 20000
+"""
+import argparse
+import time
+import orjson
+from app.api import wire
+from app.api.websocket import EncodedState, public_state, _CARD_DICTS
+from app.models.game import Game
+
+def sample_messages() -> dict:
+    game = Game("bench-game")
+    for i in range(4):
+        game.add_player(f"Player {i + 1}")
+    game.deal_cards()
+    game.bidding_phase = False
+    game.highest_bid = {"contract_type": "Solo", "trump_suit": "Gras", "called_ace": None, "bidder_index": 1}
+    game.contract_type = "Solo"
+    hands = [[_CARD_DICTS[c] for c in p.hand] for p in game.players]
+    trick = [hands[seat][0] for seat in range(4)]
+    game.current_trick = [p.hand[0] for p in game.players[:2]]
+    state = EncodedState(game, dict(public_state("bench-game", game), version=12))
+    return {
+        "game_state": orjson.loads(state.frame(0)),
+        "card_played": {
+            "type": "card_played", "player_index": 1, "card": trick[1], "version": 13,
+            "changes": {"current_trick": trick[:2], "current_player": 2},
+        },
+        "bid_made": {
+            "type": "bid_made", "player_id": "Player 2", "player_index": 1, "contract": "Solo",
+            "trump_suit": "Gras", "called_ace": None, "version": 5,
+            "changes": {"highest_bid": game.highest_bid, "current_bidder": 2, "passes_in_a_row": 0},
+        },
+        "trick_complete": {
+            "type": "trick_complete", "winner": 3, "trick": trick, "version": 15,
+            "changes": {"current_trick": [], "current_player": 3, "trick_number": 1},
+        },
+        "round_complete": {
+            "type": "round_complete", "game_points": 3, "deal_id": None,
+            "scores": {"declarer_points": 72, "team_points": 72, "opponents_points": 48, "won": True,
+                       "schneider": False, "schwarz": False, "declarer_tricks": 5},
+            "message": "Round complete! Declarer team won!",
+        },
+        "error": {"type": "error", "message": "Invalid card play"},
+    }
+
+def timed(function, value, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(value)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20000, help="encodes/decodes per message and format")
+    args = parser.parse_args()
+
+    print(f"{'message':<16}{'json B':>8}{'wire B':>8}{'ratio':>7}"
+          f"{'json enc':>10}{'wire enc':>10}{'json dec':>10}{'wire dec':>10}  (us)")
+    for name, message in sample_messages().items():
+        as_json = orjson.dumps(message)
+        as_wire = wire.pack(message)
+        assert wire.unpack(as_wire) == orjson.loads(as_json)
+        print(
+            f"{name:<16}{len(as_json):>8}{len(as_wire):>8}{len(as_json) / len(as_wire):>6.1f}x"
+            f"{timed(orjson.dumps, message, args.repeat):>10.2f}{timed(wire.pack, message, args.repeat):>10.2f}"
+            f"{timed(orjson.loads, as_json, args.repeat):>10.2f}{timed(wire.unpack, as_wire, args.repeat):>10.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
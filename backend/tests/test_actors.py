@@ -0,0 +1,102 @@
+"""Tests for the per-game actor that applies commands one at a time"""
+import asyncio
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, patch
+from app.api import rooms as rooms_module
+from app.api.actors import GameActor
+from app.api.messages import Pass
+from app.api.websocket import ConnectionManager, handle_message
+from app.models.game import Game
+from app.models.room import GameRoom
+
+@pytest.mark.asyncio
+async def test_commands_never_interleave():
+    actor = GameActor("g1")
+    log = []
+
+    async def command(name):
+        log.append(f"{name} start")
+        await asyncio.sleep(0)
+        log.append(f"{name} end")
+        return name
+
+    actor.tell(command, "a")
+    results = await asyncio.gather(actor.ask(command, "b"), actor.ask(command, "c"))
+    assert results == ["b", "c"]
+    assert log == ["a start", "a end", "b start", "b end", "c start", "c end"]
+    assert actor.task.done()
+
+    stats = actor.stats()
+    assert (stats["processed"], stats["queued"]) == (3, 0) and stats["max_queued"] >= 2
+    assert stats["latency_p50_ms"] <= stats["latency_p99_ms"] and stats["commands_per_second"] > 0
+
+@pytest.mark.asyncio
+async def test_failures_reach_the_caller_and_spare_the_mailbox():
+    actor = GameActor("g1")
+
+    async def fail():
+        raise ValueError("no")
+
+    async def succeed():
+        return "yes"
+
+    actor.tell(fail)
+    with pytest.raises(ValueError):
+        await actor.ask(fail)
+    assert await actor.ask(succeed) == "yes"
+    assert actor.stats()["failed"] == 2
+
+@pytest.mark.asyncio
+async def test_websocket_messages_are_applied_in_order():
+    game = Game("g1")
+    for name in ["alice", "bob", "carol", "dave"]:
+        game.add_player(name)
+    game.deal_cards()
+    game.current_bidder_index = 0
+    manager = ConnectionManager()
+    manager.start_game("g1", game)
+    with patch("app.api.websocket.manager", manager), patch("app.api.websocket.schedule_bot_turns"):
+        for name in ["alice", "bob", "carol"]:
+            await handle_message("g1", name, Pass())
+        assert game.passes_in_a_row == 0  # queued, not applied yet
+        await manager.sessions["g1"].actor.task
+    assert game.passes_in_a_row == 3
+    assert [stats["processed"] for stats in manager.game_stats()] == [3]
+
+@pytest.mark.asyncio
+async def test_a_room_launches_once():
+    room = GameRoom("r1", 1, "alice")
+    room.add_player(1, "alice")
+    manager = ConnectionManager()
+    with patch.object(rooms_module, "manager", manager), patch("app.api.websocket.manager", manager), \
+            patch("app.api.websocket.schedule_bot_turns"):
+        actor = manager.session("r1").actor
+        first, second = await asyncio.gather(
+            actor.ask(rooms_module.launch_waiting_game, "r1", room, True),
+            actor.ask(rooms_module.launch_waiting_game, "r1", room, True),
+        )
+    assert first is second is manager.game("r1")
+    rooms_module.reaper.forget("r1")
+
+@pytest.mark.asyncio
+async def test_a_running_room_cannot_be_restarted_and_leaving_goes_through_the_actor():
+    room = GameRoom("r2", 1, "alice")
+    room.add_player(1, "alice")
+    room.set_player_ready(1, True)
+    manager = ConnectionManager()
+    alice = SimpleNamespace(id=1, username="alice")
+    with patch.object(rooms_module, "manager", manager), patch("app.api.websocket.manager", manager), \
+            patch("app.api.websocket.schedule_bot_turns"), patch.dict(rooms_module.rooms, {"r2": room}):
+        await rooms_module.start_game_with_bots("r2", alice)
+        game = room.game
+        with pytest.raises(HTTPException) as refused:
+            await rooms_module.start_game("r2", alice)
+        assert refused.value.status_code == 400 and room.game is game
+
+        actor = manager.session("r2").actor
+        processed = actor.processed
+        assert await rooms_module.leave_room("r2", alice) == {"message": "Room deleted"}  # only bots were left
+        assert actor.processed == processed + 1 and "r2" not in rooms_module.rooms
+    rooms_module.reaper.forget("r2")
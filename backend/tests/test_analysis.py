@@ -0,0 +1,127 @@
+"""Tests for post-game round analysis"""
+import asyncio
+import random
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from app.models.game import BOT, HUMAN, TIMEOUT, Game
+from app.models.card import Suit
+from app.game_logic.ai import ai_choose_card
+from app.game_logic.analysis import round_record, analyze_round, expand_analysis
+from app.api.analysis import AnalysisPipeline
+
+def play_round(seed):
+    """Play a Wenz round with random legal cards"""
+    random.seed(seed)
+    game = Game("analysis-game")
+    for i in range(4):
+        game.add_player(f"player{i+1}")
+    game.deal_cards()
+    game.current_bidder_index = 0
+    assert game.make_bid(0, "Wenz")
+    for i in range(1, 4):
+        game.pass_bid(i)
+    while not game.is_round_complete():
+        player = game.players[game.current_player_index]
+        led_suit = game.current_trick[0].suit if game.current_trick else None
+        card = ai_choose_card(player, led_suit, game.contract_type, game.trump_suit)
+        assert game.play_card(game.current_player_index, card)
+        if len(game.current_trick) == 4:
+            game.complete_trick()
+    return game
+
+def endgame_record(game, tricks_left):
+    """Cut a round record down to its last few tricks"""
+    record = round_record(game, [1, 2, None, 4])
+    start = (8 - tricks_left) * 4
+    hands = [0, 0, 0, 0]
+    for seat, card in record["plays"][start:]:
+        hands[seat] |= 1 << card
+    record["hands"] = hands
+    record["plays"] = record["plays"][start:]
+    record["play_origins"] = record["play_origins"][start:]
+    return record
+
+def test_game_records_deal_and_plays():
+    """The game keeps the dealt hands and every card in play order"""
+    game = play_round(1)
+    assert len(game.play_log) == 32
+    assert sorted(len(hand) for hand in game.initial_hands) == [8, 8, 8, 8]
+    assert game.play_log[0][0] == game.declarer_index
+
+def test_round_record_is_compact():
+    """Records are plain ints and strings"""
+    record = round_record(play_round(2), [1, 2, None, 4])
+    assert record["contract_type"] == "Wenz"
+    assert len(record["plays"]) == 32
+    assert all(isinstance(h, int) for h in record["hands"])
+    assert record["user_ids"] == [1, 2, None, 4]
+
+def test_analyze_endgame():
+    """Late moves get exact values, and actual points are replayed correctly"""
+    game = play_round(3)
+    record = endgame_record(game, 3)
+    analysis = analyze_round(record, exact_tricks=3)
+    
+    assert len(analysis["moves"]) == 12
+    for seat, card, best_win, played_win, best_points, played_points in analysis["moves"]:
+        if best_win is None:
+            continue
+        assert best_points is not None and played_points is not None
+        on_team = seat == game.declarer_index
+        assert (played_points <= best_points) if on_team else (played_points >= best_points)
+    
+    for number in analysis["mistakes"]:
+        seat, card, best_win, played_win, best_points, played_points = analysis["moves"][number]
+        assert best_win != played_win or abs(best_points - played_points) >= 10
+    
+    expanded = expand_analysis(analysis)
+    assert expanded["moves"][0]["card"]["suit"] in [s.value for s in Suit]
+    assert "nodes" not in expanded
+
+def test_only_human_moves_are_judged():
+    """Bot moves and moves made for a human whose clock ran out are never mistakes"""
+    game = play_round(3)
+    judged = analyze_round(endgame_record(game, 3), exact_tricks=3)
+    record = endgame_record(game, 3)
+    record["play_origins"] = [BOT if seat == 1 else TIMEOUT if seat == 2 else HUMAN for seat, _ in record["plays"]]
+    analysis = analyze_round(record, exact_tricks=3)
+
+    assert analysis["team_points"] == judged["team_points"]
+    for number, (seat, *values) in enumerate(analysis["moves"]):
+        if seat in (1, 2):
+            assert values[1:] == [None] * 4 and number not in analysis["mistakes"]
+        else:
+            assert values == judged["moves"][number][1:]
+    assert analysis["mistakes"] == [n for n in judged["mistakes"] if analysis["moves"][n][0] not in (1, 2)]
+
+    moves = expand_analysis(analysis)["moves"]
+    assert {move["origin"] for move in moves} == {HUMAN, BOT, TIMEOUT}
+    assert all(move["forced"] is None for move in moves if move["origin"] != HUMAN)
+
+@pytest.mark.asyncio
+async def test_pipeline_drops_when_full():
+    """Submitting never blocks: a full queue drops the round"""
+    pipeline = AnalysisPipeline(workers=1, queue_size=1)
+    assert not pipeline.submit({"game_id": "x"})  # Not started
+    
+    pipeline.queue = asyncio.Queue(maxsize=1)
+    assert pipeline.submit({"game_id": "a"})
+    assert not pipeline.submit({"game_id": "b"})
+    assert pipeline.stats()["dropped"] == 2
+    assert pipeline.stats()["queued"] == 1
+
+@pytest.mark.asyncio
+async def test_pipeline_analyses_and_saves():
+    """Queued rounds are analysed off the event loop and stored"""
+    saved = []
+    pipeline = AnalysisPipeline(workers=1, queue_size=4)
+    record = endgame_record(play_round(4), 2)
+    with patch("app.api.analysis.save_analysis", lambda r, a: saved.append(a)):
+        pipeline.start(executor=ThreadPoolExecutor(max_workers=1))
+        assert pipeline.submit(record)
+        await asyncio.wait_for(pipeline.queue.join(), timeout=10)
+        await pipeline.stop()
+    
+    assert pipeline.stats()["completed"] == 1
+    assert saved[0]["game_id"] == "analysis-game"
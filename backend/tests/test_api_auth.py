@@ -31,6 +31,18 @@ class TestAuthAPI:
         assert "access_token" in data
         assert data["token_type"] == "bearer"
     
+    def test_register_bot_name_is_reserved(self, client):
+        """Bots sit at tables as "Bot <n>", so nobody may register such a name"""
+        response = client.post(
+            "/api/auth/register",
+            json={
+                "username": "Bot 1",
+                "email": "bot1@example.com",
+                "password": "securepassword123"
+            }
+        )
+        assert response.status_code == 400
+    
     def test_login_user(self, client, test_user):
         """Test user login"""
         response = client.post(
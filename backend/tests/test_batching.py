@@ -0,0 +1,93 @@
+"""Tests for batching the messages caused by one action into one frame"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.api import wire
+from app.api.connections import Connection, batch
+from app.api.websocket import ConnectionManager, run_bot_turns
+from app.models.room import GameRoom
+
+@pytest.mark.asyncio
+async def test_one_frame_per_connection():
+    text, binary = AsyncMock(), AsyncMock()
+    text_connection = Connection(text, "alice")
+    binary_connection = Connection(binary, "bob", binary=True)
+    with batch():
+        for n in range(3):
+            text_connection.send({"type": "event", "n": n})
+            binary_connection.send({"type": "event", "n": n})
+        assert not text_connection.queue
+    await text_connection.flush()
+    await binary_connection.flush()
+
+    [text_call] = text.send_text.call_args_list
+    [binary_call] = binary.send_bytes.call_args_list
+    expected = {"type": "batch", "messages": [{"type": "event", "n": n} for n in range(3)]}
+    assert json.loads(text_call.args[0]) == expected
+    assert wire.unpack(binary_call.args[0]) == expected
+    text_connection.close()
+    binary_connection.close()
+
+@pytest.mark.asyncio
+async def test_single_messages_and_snapshots():
+    websocket = AsyncMock()
+    connection = Connection(websocket, "alice")
+    with batch():
+        connection.send({"type": "event"})
+    with batch():
+        connection.send({"type": "game_state", "state": 1})
+        with batch():  # joins the outer batch
+            connection.send({"type": "event"})
+        connection.send({"type": "game_state", "state": 2})
+    await connection.flush()
+    sent = [json.loads(c.args[0]) for c in websocket.send_text.call_args_list]
+    assert sent == [
+        {"type": "event"},
+        # The newer snapshot takes the older one's place, ahead of the event
+        {"type": "batch", "messages": [{"type": "game_state", "state": 2}, {"type": "event"}]},
+    ]
+    connection.close()
+
+@pytest.mark.asyncio
+async def test_tasks_started_in_a_batch_send_directly_later():
+    websocket = AsyncMock()
+    connection = Connection(websocket, "alice")
+
+    async def later():
+        await asyncio.sleep(0.01)
+        connection.send({"type": "later"})
+
+    with batch():
+        task = asyncio.create_task(later())
+        connection.send({"type": "now"})
+    await task
+    await connection.flush()
+    assert [json.loads(c.args[0])["type"] for c in websocket.send_text.call_args_list] == ["now", "later"]
+    connection.close()
+
+@pytest.mark.asyncio
+async def test_a_winning_card_is_one_frame():
+    room = GameRoom("batch-room", 1, "alice")
+    room.add_player(1, "alice")
+    game = room.start_game(fill_with_bots=True)
+    game.players[0].is_ai = True
+    game.current_bidder_index = 0
+    manager = ConnectionManager()
+    manager.start_game(room.room_id, game, room)
+    websocket = AsyncMock()
+    connection = await manager.connect(websocket, room.room_id, game.players[0].name)
+
+    bids = iter([{"contract": "Wenz", "trump_suit": None, "called_ace": None}])
+    with patch("app.api.websocket.manager", manager), \
+            patch("app.api.websocket.BOT_MOVE_DELAY", 0), \
+            patch("app.api.websocket.ai_choose_bid", side_effect=lambda g, i: next(bids, None)), \
+            patch("app.api.websocket.handle_round_complete", AsyncMock()):
+        await run_bot_turns(room.room_id)
+    await connection.flush()
+
+    frames = [json.loads(c.args[0]) for c in websocket.send_text.call_args_list]
+    batches = [[m["type"] for m in f["messages"]] for f in frames if f["type"] == "batch"]
+    assert batches == [["bid_passed", "bidding_complete"]] + [["card_played", "trick_complete"]] * 8
+    assert sum(f["type"] == "card_played" for f in frames) == 24
+    manager.disconnect(game.players[0].name)
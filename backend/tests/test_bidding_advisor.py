@@ -0,0 +1,126 @@
+"""Tests for the Monte Carlo bidding advisor"""
+import asyncio
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
+from app.api.messages import BiddingAdvice, Pass
+from app.api.websocket import ConnectionManager, _advice_tasks, handle_bidding_advice, handle_message
+from app.models.game import Game
+from app.models.card import Suit, Rank
+from app.game_logic.bitmask import CARD_INDEX, FULL_DECK, get_tables, to_mask
+from app.game_logic.bidding_advisor import BiddingAdvisor, playout, simulate_hand
+from app.game_logic.deal_analyzer import seat_contracts, _random_deal
+
+def strong_solo_hand():
+    """All four Obers and Unters: an unlosable Solo"""
+    return sum(
+        1 << CARD_INDEX[(suit, rank)] for suit in Suit for rank in (Rank.OBER, Rank.UNTER)
+    )
+
+@pytest.fixture
+def advisor():
+    advisor = BiddingAdvisor(workers=2, samples=40, budget=5.0, executor=ThreadPoolExecutor(max_workers=2))
+    yield advisor
+    advisor.shutdown()
+
+@pytest.fixture
+def bidding_game():
+    game = Game("advice-game")
+    for i in range(4):
+        game.add_player(f"player{i+1}")
+    game.deal_cards()
+    game.current_bidder_index = 0
+    return game
+
+def test_playout_scores_declarer_team():
+    hand = strong_solo_hand()
+    rest = FULL_DECK ^ hand
+    others = [0, 0, 0]
+    for i, card in enumerate(c for c in range(32) if rest >> c & 1):
+        others[i % 3] |= 1 << card
+    hands = [hand] + others
+    tables = get_tables("Solo", Suit.HERZ)
+    # Leading the top trumps takes every trick
+    assert playout(hands, 0, (True, False, False, False), tables) == 120
+    assert playout(hands, 0, (False, True, True, True), tables) == 0
+
+def test_simulation_respects_sample_limit_and_budget():
+    hand = _random_deal(2)[0]
+    contracts = seat_contracts(hand)
+    deadline = time.time() + 5.0
+    result = simulate_hand(hand, contracts, 25, deadline, seed=1)
+    assert result["samples"] == 25
+    assert len(result["totals"]) == len(contracts)
+    assert simulate_hand(hand, contracts, 25, time.time(), seed=1)["samples"] == 0
+    # Same seed, same deals
+    assert simulate_hand(hand, contracts, 25, deadline, seed=1) == result
+
+@pytest.mark.asyncio
+async def test_strong_hand_wins_solo(advisor):
+    advice = await advisor.advise(strong_solo_hand())
+    solos = [a for a in advice if a["contract_type"] == "Solo"]
+    assert len(solos) == 4
+    assert all(a["win_probability"] == 1.0 for a in solos)
+    assert all(a["samples"] == 40 for a in advice)
+
+@pytest.mark.asyncio
+async def test_advice_is_cached_by_hand(advisor):
+    hand = _random_deal(6)[1]
+    with patch("app.game_logic.bidding_advisor.simulate_hand", wraps=simulate_hand) as simulate:
+        first = await advisor.advise(hand)
+        second = await advisor.advise(hand)
+    assert first == second
+    assert simulate.call_count == advisor.workers
+    assert (advisor.hits, advisor.misses) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_deadline_is_taken_when_the_request_arrives(advisor):
+    hand = _random_deal(4)[2]
+    advice = await advisor.advise(hand, deadline=time.time() - 1)
+    assert all(a["samples"] == 0 and a["win_probability"] is None for a in advice)
+
+@pytest.mark.asyncio
+async def test_advice_does_not_hold_up_other_messages(bidding_game, advisor):
+    manager = ConnectionManager()
+    manager.start_game("advice-game", bidding_game)
+    manager.send_personal_message = AsyncMock()
+    release = asyncio.Event()
+
+    async def slow_advise(hand, deadline):
+        await release.wait()
+        return []
+
+    with patch("app.api.websocket.manager", manager), patch("app.api.websocket.advisor", advisor), \
+            patch.object(advisor, "advise", side_effect=slow_advise) as advise, \
+            patch("app.api.websocket.schedule_bot_turns"):
+        before = time.time()
+        await handle_message("advice-game", "player1", BiddingAdvice())
+        await handle_message("advice-game", "player1", Pass())
+        await manager.session("advice-game").actor.ask(asyncio.sleep, 0)
+        assert bidding_game.bids_made == 1  # the pass went through while the advice was pending
+        assert [c.args[0]["type"] for c in manager.send_personal_message.call_args_list] == []
+        assert before + advisor.budget <= advise.call_args.args[1] <= time.time() + advisor.budget
+
+        release.set()
+        await asyncio.gather(*_advice_tasks)
+    assert manager.send_personal_message.call_args[0][0]["type"] == "bidding_advice"
+
+@pytest.mark.asyncio
+async def test_handler_only_answers_during_bidding(bidding_game, advisor):
+    manager = ConnectionManager()
+    manager.start_game("advice-game", bidding_game)
+    manager.send_personal_message = AsyncMock()
+
+    with patch("app.api.websocket.manager", manager), patch("app.api.websocket.advisor", advisor):
+        await handle_bidding_advice("advice-game", "player2")
+        reply = manager.send_personal_message.call_args[0][0]
+        assert reply["type"] == "bidding_advice"
+        assert reply["player_index"] == 1
+        expected = seat_contracts(to_mask(bidding_game.players[1].hand))
+        assert [(a["contract_type"], a["trump_suit"], a["called_ace"]) for a in reply["contracts"]] == expected
+
+        bidding_game.bidding_phase = False
+        await handle_bidding_advice("advice-game", "player2")
+        reply = manager.send_personal_message.call_args[0][0]
+        assert reply["type"] == "error"
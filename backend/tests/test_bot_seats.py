@@ -0,0 +1,115 @@
+"""Tests for rooms started with bot seats"""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.api import rooms as rooms_module
+from app.api.clocks import Clocks
+from app.api.rooms import take_over_bot_seat
+from app.api.websocket import ConnectionManager, broadcast_game_state, run_bot_turns, get_bot_to_act
+from app.game_logic.ai import ai_choose_bid
+from app.models.room import GameRoom
+from app.models.card import Suit
+
+@pytest.fixture
+def room():
+    """A room with a single human waiting"""
+    room = GameRoom("bot-room", 1, "alice")
+    room.add_player(1, "alice")
+    return room
+
+def test_fill_with_bots(room):
+    """Empty seats are filled with ready bots"""
+    assert room.fill_with_bots() == 3
+    assert len(room.players) == 4
+    assert [p["username"] for p in room.players[1:]] == ["Bot 1", "Bot 2", "Bot 3"]
+    assert all(p["is_bot"] and p["ready"] for p in room.players[1:])
+    assert room.add_bot() is None
+
+def test_start_game_marks_bots_as_ai(room):
+    """Bot seats become AI players in the game"""
+    game = room.start_game(fill_with_bots=True)
+    assert room.status == "in_progress"
+    assert [p.is_ai for p in game.players] == [False, True, True, True]
+
+def test_seat_human_between_rounds(room):
+    """A human takes over a bot seat right away when no round is running"""
+    room.fill_with_bots()
+    seat = room.seat_human(2, "bob")
+    assert seat == 1
+    assert room.players[1] == {"user_id": 2, "username": "bob", "ready": True, "is_bot": False}
+
+def test_seat_human_takes_over_the_bots_hand(room):
+    """During a round the human plays on with the bot's cards"""
+    game = room.start_game(fill_with_bots=True)
+    hand = list(game.players[1].hand)
+    assert room.seat_human(2, "bob") == 1
+    assert game.players[1].name == "bob"
+    assert not game.players[1].is_ai
+    assert game.players[1].hand == hand
+
+def test_bot_names_are_reserved(room):
+    """Nobody can sit down under a bot's name"""
+    room.fill_with_bots()
+    assert room.seat_human(2, "bot 1") is None
+    assert not GameRoom("r2", 1, "alice").add_player(2, "Bot 7")
+
+@pytest.mark.asyncio
+async def test_joining_mid_round_starts_the_seats_clock(room):
+    """The seat stops being played by the bot and its new owner gets a turn clock"""
+    game = room.start_game(fill_with_bots=True)
+    game.current_bidder_index = 1
+    manager = ConnectionManager()
+    manager.start_game(room.room_id, game, room)
+    clocks = Clocks(tick=1.0)
+    with patch("app.api.websocket.manager", manager), patch.object(rooms_module, "manager", manager), \
+            patch("app.api.websocket.clocks", clocks), patch("app.api.websocket.schedule_bot_turns"):
+        await broadcast_game_state(room.room_id)
+        session = manager.sessions[room.room_id]
+        assert session.clock is None and get_bot_to_act(game) == 1
+
+        await take_over_bot_seat(room.room_id, room, SimpleNamespace(id=2, username="bob"))
+    assert session.seats["bob"] == 1
+    assert get_bot_to_act(game) is None
+    assert session.clock["player_index"] == 1
+    rooms_module.reaper.forget(room.room_id)
+
+def test_ai_bid_outranks_highest_bid(room):
+    """AI only proposes bids the game will accept"""
+    game = room.start_game(fill_with_bots=True)
+    game.highest_bid = {"contract_type": "Wenz", "trump_suit": None, "called_ace": None, "bidder_index": 0}
+    with patch("app.game_logic.ai.random.random", return_value=0.0):
+        bid = ai_choose_bid(game, 1)
+    assert bid["contract"] == "Solo"
+    assert isinstance(bid["trump_suit"], Suit)
+
+@pytest.mark.asyncio
+async def test_bots_play_a_full_round(room):
+    """Bots bid and play through the regular handlers until the round is over"""
+    game = room.start_game(fill_with_bots=True)
+    game.players[0].is_ai = True  # An all-bot table
+    manager = ConnectionManager()
+    manager.start_game(room.room_id, game, room)
+    
+    bids = iter([{"contract": "Wenz", "trump_suit": None, "called_ace": None}])
+    with patch("app.api.websocket.manager", manager), \
+            patch("app.api.websocket.BOT_MOVE_DELAY", 0), \
+            patch("app.api.websocket.ai_choose_bid", side_effect=lambda g, i: next(bids, None)):
+        await run_bot_turns(room.room_id)
+    
+    assert game.contract_type == "Wenz"
+    assert game.is_round_complete()
+    assert get_bot_to_act(game) is None
+
+def test_a_seat_left_mid_round_stays_in_place(room):
+    """A bot plays on for a human who leaves, so a late joiner gets that seat's own hand"""
+    room.add_player(2, "bob")
+    game = room.start_game(fill_with_bots=True)
+    bob_hand = list(game.players[1].hand)
+    assert room.remove_player(1) == 0
+    assert [p["username"] for p in room.players] == ["Bot 3", "bob", "Bot 1", "Bot 2"]
+    assert game.players[0].is_ai and game.players[0].name == "Bot 3"
+    assert room.has_humans()
+
+    assert room.seat_human(3, "carol") == 0
+    assert game.players[1].hand == bob_hand and game.players[1].name == "bob"
+    assert not game.players[0].is_ai
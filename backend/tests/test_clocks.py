@@ -0,0 +1,101 @@
+"""Tests for the timer wheel and turn clocks"""
+import random
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.api.clocks import Clocks, TimerWheel
+from app.api.websocket import ConnectionManager, broadcast_game_state
+from app.models.game import HUMAN, TIMEOUT, Game
+
+def test_timers_fire_on_their_tick_at_every_level():
+    wheel = TimerWheel(1.0, slots=8, levels=4, now=0.0)
+    fired = []
+    rng = random.Random(7)
+    expected = {n: rng.randrange(1, 8 ** 4) for n in range(300)}
+    for n, tick in expected.items():
+        wheel.schedule(n, tick - 0.5, lambda n=n: fired.append((n, wheel.current)), now=0.0)
+
+    for tick in range(1, 8 ** 4):
+        wheel.advance(float(tick))
+    assert sorted(fired) == sorted(expected.items())
+    assert wheel.timers == {}
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(1.0, slots=8, levels=3, now=0.0)
+    fired = []
+    wheel.schedule("a", 100, lambda: fired.append("a"), now=0.0)
+    wheel.schedule("b", 100, lambda: fired.append("b"), now=0.0)
+    wheel.cancel("a")
+    wheel.advance(50.0)
+    wheel.schedule("b", 10, lambda: fired.append("b again"), now=50.0)
+    assert wheel.advance(59.0) == 0
+    assert wheel.advance(60.0) == 1
+    wheel.advance(200.0)
+    assert fired == ["b again"]
+    with pytest.raises(ValueError):
+        wheel.schedule("c", 8 ** 3, lambda: None, now=200.0)
+
+def make_game() -> Game:
+    game = Game("g1")
+    for name in ["alice", "bob", "carol", "dave"]:
+        game.add_player(name)
+    game.deal_cards()
+    game.current_bidder_index = 0
+    return game
+
+@pytest.fixture
+def table():
+    manager = ConnectionManager()
+    game = make_game()
+    manager.start_game("g1", game)
+    clocks = Clocks(tick=1.0)
+    with patch("app.api.websocket.manager", manager), patch("app.api.websocket.clocks", clocks), \
+            patch("app.api.websocket.schedule_bot_turns"):
+        yield manager, game, clocks
+
+async def run_out(manager, clocks):
+    """Let every running clock run out and the game apply what that causes"""
+    clocks.wheel.advance(clocks.wheel.origin + 10 ** 5)
+    task = manager.sessions["g1"].actor.task
+    if task is not None:
+        await task
+
+@pytest.mark.asyncio
+async def test_bidding_clock_passes_for_the_player(table):
+    manager, game, clocks = table
+    websocket = AsyncMock()
+    connection = await manager.connect(websocket, "g1", "alice")
+    await broadcast_game_state("g1")
+    session = manager.sessions["g1"]
+    assert session.clock["player_index"] == 0 and session.public["clock"] == session.clock
+    assert list(clocks.wheel.timers) == ["g1"]
+
+    await run_out(manager, clocks)
+    assert game.passes_in_a_row == 1 and game.current_bidder_index == 1
+    assert game.bid_log == [(0, None, TIMEOUT)]
+    assert session.clock["player_index"] == 1  # bob's clock is running now
+    manager.disconnect("alice", connection)
+
+@pytest.mark.asyncio
+async def test_play_clock_plays_a_legal_card(table):
+    manager, game, clocks = table
+    game.make_bid(0, "Wenz")
+    for player_index in (1, 2, 3):
+        game.pass_bid(player_index)
+    assert game.bidding_complete and game.contract is not None
+    await broadcast_game_state("g1")
+    player_index = game.current_player_index
+    hand = len(game.players[player_index].hand)
+
+    await run_out(manager, clocks)
+    assert len(game.players[player_index].hand) == hand - 1
+    assert len(game.current_trick) == 1
+    assert game.play_log[-1][::2] == (player_index, TIMEOUT)
+    assert [origin for _, _, origin in game.bid_log] == [HUMAN] * 4
+
+@pytest.mark.asyncio
+async def test_bots_have_no_clock(table):
+    manager, game, clocks = table
+    for player in game.players:
+        player.is_ai = True
+    await broadcast_game_state("g1")
+    assert manager.sessions["g1"].clock is None and clocks.wheel.timers == {}
@@ -0,0 +1,108 @@
+"""Tests for per-connection outbound queues"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.api.connections import Connection
+from app.api.websocket import ConnectionManager
+
+class SlowSocket:
+    """A websocket whose sends block until released"""
+
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+        self.close = AsyncMock()
+
+    async def send_text(self, text):
+        await self.release.wait()
+        self.sent.append(json.loads(text))
+
+@pytest.mark.asyncio
+async def test_messages_are_sent_in_order():
+    websocket = AsyncMock()
+    connection = Connection(websocket, "alice")
+    for n in range(5):
+        assert connection.send({"type": "event", "n": n})
+    await connection.flush()
+    assert [json.loads(c.args[0])["n"] for c in websocket.send_text.call_args_list] == list(range(5))
+    stats = connection.stats()
+    assert stats["sent"] == 5 and stats["queued"] == 0 and stats["max_queued"] >= 1
+    connection.close()
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_wait_for_slow_clients():
+    manager = ConnectionManager()
+    slow, fast = SlowSocket(), AsyncMock()
+    slow_connection = await manager.connect(slow, "g1", "slow")
+    fast_connection = await manager.connect(fast, "g1", "fast")
+
+    await asyncio.wait_for(manager.broadcast_to_game({"type": "trick_complete"}, "g1"), 0.1)
+    await asyncio.wait_for(fast_connection.flush(), 0.1)
+    assert json.loads(fast.send_text.call_args[0][0]) == {"type": "trick_complete", "seq": 1}
+    assert slow.sent == [] and slow_connection.stats()["queued"] <= 1
+
+    slow.release.set()
+    await slow_connection.flush()
+    assert slow.sent == [{"type": "trick_complete", "seq": 1}]
+    manager.disconnect("slow")
+    manager.disconnect("fast")
+
+@pytest.mark.asyncio
+async def test_queued_state_is_coalesced():
+    slow = SlowSocket()
+    connection = Connection(slow, "bob")
+    connection.send({"type": "event", "n": 0})
+    await asyncio.sleep(0)  # The writer picks up the first message and blocks on it
+    for version in range(3):
+        connection.send({"type": "game_state", "state": version})
+    connection.send({"type": "event", "n": 1})
+    connection.send({"type": "game_state", "state": 3})
+    # The newest state takes the first one's place, ahead of the event queued since
+    assert [json.loads(text) for _, text, _ in connection.queue] == [
+        {"type": "game_state", "state": 3}, {"type": "event", "n": 1},
+    ]
+    assert connection.coalesced == 3
+
+    slow.release.set()
+    await connection.flush()
+    assert [m.get("state", m.get("n")) for m in slow.sent] == [0, 3, 1]
+    connection.close()
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_disconnected():
+    manager = ConnectionManager()
+    slow = SlowSocket()
+    with patch("app.api.connections.OUTBOUND_QUEUE_LIMIT", 3):
+        connection = await manager.connect(slow, "g1", "slow")
+    for n in range(5):
+        await manager.send_personal_message({"type": "event", "n": n}, "slow")
+    assert connection.closed
+    assert "slow" not in manager.user_sessions
+    await asyncio.sleep(0.01)
+    slow.close.assert_awaited_once()
+    assert slow.close.call_args.kwargs["code"] == 1013
+
+@pytest.mark.asyncio
+async def test_failed_send_disconnects():
+    manager = ConnectionManager()
+    websocket = AsyncMock()
+    websocket.send_text.side_effect = RuntimeError("connection reset")
+    connection = await manager.connect(websocket, "g1", "alice")
+    await manager.send_personal_message({"type": "event"}, "alice")
+    await connection.flush()
+    await asyncio.sleep(0)
+    assert connection.closed
+    assert "alice" not in manager.user_sessions
+
+@pytest.mark.asyncio
+async def test_stale_disconnect_keeps_new_connection():
+    manager = ConnectionManager()
+    old = await manager.connect(AsyncMock(), "g1", "alice")
+    new = await manager.connect(AsyncMock(), "g1", "alice")
+    assert old.closed
+    manager.disconnect("alice", old)
+    assert manager.sessions["g1"].connections["alice"] is new
+    assert [s["user_id"] for s in manager.connection_stats()] == ["alice"]
+    manager.disconnect("alice")
+    assert new.closed
@@ -0,0 +1,140 @@
+"""Tests for the deal analyzer"""
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from unittest.mock import patch
+from app.models.card import Suit
+from app.game_logic.bitmask import SUIT_MASKS, to_cards
+from app.game_logic.deal_analyzer import (
+    parse_hands, canonical_deal, contract_variants, evaluate_contract, rotate_results, _random_deal,
+)
+from app.game_logic.solver import Solver
+from fastapi import FastAPI, Request
+from app.api.deals import DealAnalyzer, get_deal_analysis, router as deals_router
+
+def as_dicts(hands):
+    return [[{"suit": c.suit.value, "rank": c.rank.value} for c in to_cards(hand)] for hand in hands]
+
+def fake_evaluate(hands, seat, contract_type, trump_suit, called_ace):
+    """Cheap stand-in that still depends on the seating"""
+    return {
+        "seat": seat, "contract_type": contract_type, "trump_suit": trump_suit,
+        "called_ace": called_ace, "partner": (seat + 1) % 4 if called_ace else None,
+        "won": bool(hands[seat] & 1), "schneider": False, "schneider_lost": False, "nodes": 0,
+    }
+
+def test_parse_hands_roundtrip():
+    hands = _random_deal(1)
+    assert parse_hands(as_dicts(hands)) == hands
+
+def test_parse_hands_rejects_incomplete_deals():
+    hands = as_dicts(_random_deal(1))
+    with pytest.raises(ValueError):
+        parse_hands(hands[:3])
+    duplicate = [list(hand) for hand in hands]
+    duplicate[1][0] = duplicate[0][0]
+    with pytest.raises(ValueError):
+        parse_hands(duplicate)
+    hands[2][0] = {"suit": "Eichel", "rank": "Six"}
+    with pytest.raises(ValueError):
+        parse_hands(hands)
+
+def test_rotations_share_canonical_key():
+    hands = _random_deal(2)
+    key, rotation = canonical_deal(hands)
+    for r in range(4):
+        rotated = [hands[(seat + r) % 4] for seat in range(4)]
+        rotated_key, rotated_rotation = canonical_deal(rotated)
+        assert rotated_key == key
+        # The same original hand ends up as canonical seat 0
+        assert rotated[rotated_rotation] == hands[rotation]
+
+def test_contract_variants():
+    hands = list(SUIT_MASKS)  # Seat i holds the whole of suit i, including its ace
+    tasks = contract_variants(hands)
+    assert len(tasks) == 4 * (3 + 1 + 4)
+    assert (0, "Rufer", None, Suit.EICHEL.value) not in tasks
+    assert (0, "Rufer", None, Suit.GRAS.value) in tasks
+
+def test_evaluate_contract_matches_exact_value():
+    # Four-card endings keep the search small
+    deal = _random_deal(5)
+    small = [sum(1 << c for c in [c for c in range(32) if hand >> c & 1][:4]) for hand in deal]
+    for seat in range(4):
+        result = evaluate_contract(small, seat, "Solo", Suit.HERZ.value, None)
+        points = Solver("Solo", [seat], Suit.HERZ).value(small, seat)
+        assert result["won"] == (points >= 61)
+        assert result["schneider_lost"] == (points < 31)
+        assert result["partner"] is None
+
+def test_rotate_results():
+    results = [{"seat": 0, "partner": 3}, {"seat": 2, "partner": None}]
+    rotated = rotate_results(results, 1)
+    assert rotated == [{"seat": 1, "partner": 0}, {"seat": 3, "partner": None}]
+
+@pytest.mark.asyncio
+async def test_analyzer_caches_by_canonical_deal():
+    analyzer = DealAnalyzer(cache_size=4)
+    analyzer.executor = ThreadPoolExecutor(max_workers=2)
+    hands = _random_deal(3)
+    rotated = hands[1:] + hands[:1]
+    try:
+        with patch("app.api.deals.evaluate_contract", side_effect=fake_evaluate) as evaluate:
+            first, concurrent = await asyncio.gather(analyzer.analyze(hands), analyzer.analyze(hands))
+            calls = evaluate.call_count
+            again = await analyzer.analyze(rotated)
+            assert evaluate.call_count == calls
+    finally:
+        analyzer.shutdown()
+
+    assert first == concurrent
+    assert analyzer.misses == 1
+    assert analyzer.hits == 2
+    assert len(first) == len(contract_variants(hands))
+    # Seat s of the rotated deal holds hands[s + 1]
+    for result in again:
+        match = next(
+            r for r in first
+            if r["seat"] == (result["seat"] + 1) % 4
+            and (r["contract_type"], r["trump_suit"], r["called_ace"])
+            == (result["contract_type"], result["trump_suit"], result["called_ace"])
+        )
+        assert result["won"] == match["won"]
+
+def api_request():
+    """A request to the app, with deals mounted under /api as in app.main"""
+    app = FastAPI()
+    app.include_router(deals_router, prefix="/api")
+    return Request({"type": "http", "router": app.router, "scheme": "http", "server": ("testserver", 80),
+                    "root_path": "", "path": "/", "query_string": b"", "headers": []})
+
+@pytest.mark.asyncio
+async def test_slow_analysis_becomes_a_job():
+    analyzer = DealAnalyzer(cache_size=4)
+    analyzer.executor = ThreadPoolExecutor(max_workers=2)
+    hands = _random_deal(4)
+    release = threading.Event()
+
+    def slow_evaluate(*args):
+        release.wait(5)
+        return fake_evaluate(*args)
+
+    try:
+        with patch("app.api.deals.evaluate_contract", side_effect=slow_evaluate), \
+                patch("app.api.deals.analyzer", analyzer):
+            assert await analyzer.analyze(hands, wait=0.01) is None
+            job_id = analyzer.job(hands)
+            pending = await get_deal_analysis(job_id, api_request(), current_user=None)
+            assert pending.status_code == 202
+            assert pending.headers["location"] == f"http://testserver/api/deals/analyze/{job_id}"
+
+            # The evaluation outlives the request that started it
+            release.set()
+            await analyzer.in_flight[canonical_deal(hands)[0]]
+            done = await get_deal_analysis(job_id, api_request(), current_user=None)
+    finally:
+        analyzer.shutdown()
+
+    assert done["status"] == "done" and len(done["results"]) == len(contract_variants(hands))
+    assert analyzer.status("unknown") is None
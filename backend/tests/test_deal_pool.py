@@ -0,0 +1,70 @@
+"""Tests for duplicate-deal pools"""
+from app.models.card import Card, Suit, Rank
+from app.models.game import Game
+from app.models.room import GameRoom
+from app.game_logic.bitmask import FULL_DECK, to_mask
+from app.game_logic.deal_pool import DealPool, get_pool
+
+def make_room(room_id, seed, round_number, rotation):
+    room = GameRoom(room_id, 1, "alice")
+    room.use_deal_pool(seed, round_number, rotation)
+    for i, name in enumerate(["alice", "bob", "carol", "dave"]):
+        room.add_player(i + 1, name)
+    return room
+
+def test_pools_are_seed_addressed():
+    first, second = DealPool(7, 8), DealPool(7, 8)
+    assert first.deals == second.deals
+    assert first.first_bidders == second.first_bidders
+    assert DealPool(8, 8).deals != first.deals
+    for deal in first.deals:
+        assert deal[0] | deal[1] | deal[2] | deal[3] == FULL_DECK
+
+def test_get_pool_is_cached():
+    assert get_pool(3) is get_pool(3)
+    assert get_pool(3) is not get_pool(3, 16)
+
+def test_rotation_moves_hands_and_first_bidder():
+    pool = get_pool(11)
+    plain = pool.hands(2)
+    rotated = pool.hands(2, rotation=1)
+    for seat in range(4):
+        assert rotated[(seat + 1) % 4] == plain[seat]
+    assert pool.first_bidder(2, 1) == (pool.first_bidder(2) + 1) % 4
+
+def test_rounds_wrap_around_the_pool():
+    pool = get_pool(5, 4)
+    assert pool.hands(1) == pool.hands(5)
+    assert pool.deal_id(5) == pool.deal_id(1) == "5:1"
+
+def test_deal_cards_uses_preset_hands_exactly():
+    game = Game("preset")
+    for i in range(4):
+        game.add_player(f"player{i}")
+    hands = get_pool(0).hands(0)
+    # Even a preset hand with the Eichel Ace for seat 0 is dealt unchanged
+    ace = Card(Suit.EICHEL, Rank.ACE)
+    holder = next(seat for seat, hand in enumerate(hands) if ace in hand)
+    hands[0], hands[holder] = hands[holder], hands[0]
+    game.deal_cards(hands)
+    assert [to_mask(p.hand) for p in game.players] == [to_mask(h) for h in hands]
+    assert game.initial_hands == hands
+    assert game.players[0].hand is not hands[0]
+
+def test_tables_share_deal_with_rotated_seats():
+    north = make_room("table-1", 42, 3, 0)
+    east = make_room("table-2", 42, 3, 1)
+    north_game = north.start_game()
+    east_game = east.start_game()
+
+    assert north_game.deal_id == east_game.deal_id == "42:3"
+    assert north_game.round_number == 3
+    for seat in range(4):
+        assert to_mask(east_game.players[(seat + 1) % 4].hand) == to_mask(north_game.players[seat].hand)
+    assert east.first_bidder() == (north.first_bidder() + 1) % 4
+    assert east.to_dict()["deal_pool"] == {"seed": 42, "round": 3, "rotation": 1}
+
+def test_rooms_without_pool_shuffle():
+    room = GameRoom("casual", 1, "alice")
+    assert room.first_bidder() is None
+    assert room.to_dict()["deal_pool"] is None
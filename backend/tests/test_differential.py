@@ -0,0 +1,78 @@
+"""Tests for the differential fuzzing harness"""
+from app.models.card import Card, Suit, Rank
+from app.game_logic.bitmask import CARD_INDEX, SUIT_OF, popcount
+from app.game_logic.differential import (
+    BitmaskEngine, ReferenceRules, check_all_comparisons, run_range, minimize, fuzz,
+)
+
+HERZ_OBER = CARD_INDEX[(Suit.HERZ, Rank.OBER)]
+EICHEL_OBER = CARD_INDEX[(Suit.EICHEL, Rank.OBER)]
+
+class SwappedObers(BitmaskEngine):
+    """Ranks the Eichel Ober above the Herz Ober"""
+
+    def compare(self, contract, card, other, led_suit):
+        if {card, other} == {HERZ_OBER, EICHEL_OBER}:
+            return 1 if card == EICHEL_OBER else -1
+        return super().compare(contract, card, other, led_suit)
+
+    def trick_winner(self, contract, trick, leader):
+        best = 0
+        for position in range(1, 4):
+            if self.compare(contract, trick[position], trick[best], SUIT_OF[trick[0]]) > 0:
+                best = position
+        return (leader + best) % 4
+
+class NoFollowOnTrump(BitmaskEngine):
+    """Forgets to follow suit when a trump was led"""
+
+    def valid_plays(self, contract, hand, led_card):
+        if led_card == HERZ_OBER:
+            return hand
+        return super().valid_plays(contract, hand, led_card)
+
+class IgnoresPartner(BitmaskEngine):
+    """Scores a Rufer as if the declarer played alone"""
+
+    def score(self, contract, declarer, partner, tricks):
+        return super().score(contract, declarer, None, tricks)
+
+def test_fast_path_matches_reference():
+    assert check_all_comparisons() is None
+    cases, checks, divergence = run_range(0, 300)
+    assert divergence is None
+    assert cases == 300
+    assert checks > 300 * 60
+
+def test_wrong_ranking_is_minimized_to_a_comparison():
+    _, _, divergence = run_range(0, 2000, SwappedObers)
+    assert divergence is not None
+    assert divergence.check == "compare"
+    assert set(divergence.args[:2]) == {HERZ_OBER, EICHEL_OBER}
+    # The reproduction is a runnable reference call
+    call = divergence.reproduction().split("  #")[0]
+    assert eval(call, {"Card": Card, "Suit": Suit, "Rank": Rank}) == divergence.expected
+
+def test_wrong_valid_plays_are_minimized():
+    _, _, divergence = run_range(0, 2000, NoFollowOnTrump)
+    assert divergence.check == "valid_plays"
+    hand, led_card = divergence.args
+    assert led_card == HERZ_OBER
+    assert popcount(hand) == 2
+
+def test_wrong_score_is_minimized():
+    _, _, divergence = run_range(0, 2000, IgnoresPartner)
+    assert divergence.check == "score"
+    declarer, partner, tricks = divergence.args
+    assert partner is not None
+    assert len(tricks) == 1 and tricks[0][0] == partner
+
+def test_minimize_keeps_a_real_divergence():
+    divergence = run_range(0, 2000, SwappedObers)[2]
+    again = minimize(divergence, SwappedObers(), ReferenceRules())
+    assert again.check == divergence.check and again.args == divergence.args
+
+def test_fuzz_reports_totals():
+    result = fuzz(100, 40, workers=1, chunk_size=20)
+    assert result["cases"] == 40
+    assert result["divergence"] is None
@@ -0,0 +1,88 @@
+"""Tests for structured, queue-based logging"""
+import io
+import json
+import logging
+import threading
+import pytest
+from app.log import ROOT_LOGGER, JsonFormatter, configure_logging, log_event, stop_logging
+
+@pytest.fixture
+def output():
+    """Configure logging into a buffer and restore the app logger afterwards"""
+    app_logger = logging.getLogger(ROOT_LOGGER)
+    saved = (app_logger.level, app_logger.handlers, app_logger.propagate)
+    stream = io.StringIO()
+    yield stream
+    stop_logging()
+    app_logger.level, app_logger.handlers, app_logger.propagate = saved
+    for name in ("app.test.quiet", "app.test.loud"):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+
+def lines(stream: io.StringIO) -> list:
+    stop_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+def test_events_are_json_lines_with_fields(output):
+    configure_logging(level="INFO", levels="", sample="", fmt="json", stream=output)
+    log_event(logging.getLogger("app.test"), logging.INFO, "ws.connected", user_id="alice", game_id="g1")
+    [entry] = lines(output)
+    assert entry["event"] == "ws.connected" and entry["level"] == "INFO" and entry["logger"] == "app.test"
+    assert entry["user_id"] == "alice" and entry["game_id"] == "g1"
+
+def test_per_module_levels(output):
+    configure_logging(level="INFO", levels="app.test.quiet=ERROR,app.test.loud=DEBUG", sample="", stream=output)
+    log_event(logging.getLogger("app.test.quiet"), logging.WARNING, "dropped")
+    log_event(logging.getLogger("app.test.loud"), logging.DEBUG, "kept")
+    log_event(logging.getLogger("app.test.other"), logging.DEBUG, "dropped too")
+    assert [entry["event"] for entry in lines(output)] == ["kept"]
+
+def test_disabled_levels_do_not_build_records(output):
+    configure_logging(level="WARNING", levels="", sample="", stream=output)
+    logger = logging.getLogger("app.test")
+    calls = []
+    logger.makeRecord = lambda *args, **kwargs: calls.append(args)
+    try:
+        log_event(logger, logging.DEBUG, "ws.message", type="play_card")
+    finally:
+        del logger.makeRecord
+    assert calls == []
+
+def test_sampled_events_keep_one_in_n(output):
+    configure_logging(level="DEBUG", levels="", sample="ws.message=10", stream=output)
+    logger = logging.getLogger("app.test")
+    for _ in range(35):
+        log_event(logger, logging.DEBUG, "ws.message")
+    log_event(logger, logging.DEBUG, "ws.connected")
+    entries = lines(output)
+    assert [entry["event"] for entry in entries] == ["ws.message"] * 4 + ["ws.connected"]
+    assert all(entry["sampled"] == 10 for entry in entries[:4])
+
+def test_exceptions_are_included(output):
+    configure_logging(level="INFO", levels="", sample="", stream=output)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        log_event(logging.getLogger("app.test"), logging.ERROR, "bot.error", exc_info=True, game_id="g1")
+    [entry] = lines(output)
+    assert "ValueError: boom" in entry["exc"] and entry["game_id"] == "g1"
+
+def test_formatting_happens_off_the_calling_thread(output, monkeypatch):
+    threads = []
+    original = JsonFormatter.format
+
+    def format(self, record):
+        threads.append(threading.current_thread())
+        return original(self, record)
+
+    monkeypatch.setattr(JsonFormatter, "format", format)
+    configure_logging(level="INFO", levels="", sample="", stream=output)
+    log_event(logging.getLogger("app.test"), logging.INFO, "ws.disconnected")
+    assert len(lines(output)) == 1
+    assert threads and threading.current_thread() not in threads
+
+def test_text_format(output):
+    configure_logging(level="INFO", levels="", sample="", fmt="text", stream=output)
+    log_event(logging.getLogger("app.test"), logging.WARNING, "ws.slow_consumer", user_id="bob", queued=64)
+    stop_logging()
+    line = output.getvalue().strip()
+    assert "WARNING" in line and "ws.slow_consumer" in line and "user_id=bob queued=64" in line
@@ -0,0 +1,73 @@
+"""Tests for decoding and validating client messages"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import WebSocketDisconnect
+from app.api import wire
+from app.api.messages import Pass, PlayCard, SelectContract, decode
+from app.api.websocket import ConnectionManager, websocket_endpoint
+from app.models.card import Rank, Suit
+from app.models.game import Game
+
+def test_valid_messages_decode_to_models():
+    message, error = decode('{"type": "play_card", "card": {"suit": "Herz", "rank": "Ace", "value": 11}}')
+    assert error is None and isinstance(message, PlayCard)
+    assert (message.card.suit, message.card.rank) == (Suit.HERZ, Rank.ACE)
+
+    message, _ = decode('{"type": "bid", "contract": "Rufer", "called_ace": "Gras", "trump_suit": null}')
+    assert isinstance(message, SelectContract) and message.called_ace == Suit.GRAS and message.trump_suit is None
+
+    message, _ = decode(wire.pack({"type": "pass"}), binary=True)
+    assert isinstance(message, Pass)
+
+@pytest.mark.parametrize("frame, code", [
+    ("{", "malformed"),
+    ("[1, 2]", "malformed"),
+    ('{"card": {}}', "unknown_type"),
+    ('{"type": "shuffle"}', "unknown_type"),
+    ('{"type": "play_card", "card": {"suit": "Spades", "rank": "Ace"}}', "invalid"),
+    ('{"type": "select_contract", "contract": "Ramsch"}', "invalid"),
+])
+def test_bad_frames_become_errors(frame, code):
+    message, error = decode(frame)
+    assert message is None
+    assert error["type"] == "error" and error["code"] == code
+
+def test_errors_name_the_bad_fields():
+    _, error = decode('{"type": "play_card", "card": {"suit": "Spades"}}')
+    assert error["message"] == "Invalid play_card message"
+    assert [e["field"] for e in error["errors"]] == ["card.suit", "card.rank"]
+
+    _, error = decode(b"\xc1", binary=True)
+    assert error["code"] == "malformed"
+
+@pytest.mark.asyncio
+async def test_garbage_does_not_cost_the_connection():
+    game = Game("g1")
+    for name in ["alice", "bob", "carol", "dave"]:
+        game.add_player(name)
+    game.deal_cards()
+    game.current_bidder_index = 0
+    manager = ConnectionManager()
+    manager.start_game("g1", game)
+
+    frames = iter(["not json", '{"type": "play_card", "card": {"suit": 7}}', '{"type": "pass"}'])
+
+    async def receive_text():
+        try:
+            return next(frames)
+        except StopIteration:
+            await asyncio.sleep(0.01)  # Gives the writer time to send
+            raise WebSocketDisconnect()
+
+    websocket = AsyncMock()
+    websocket.receive_text = receive_text
+    with patch("app.api.websocket.manager", manager), patch("app.api.websocket.schedule_bot_turns"):
+        await websocket_endpoint(websocket, "g1", "alice")
+    assert game.passes_in_a_row == 1
+
+    sent = [json.loads(c.args[0]) for c in websocket.send_text.call_args_list]
+    messages = [m for f in sent for m in (f["messages"] if f["type"] == "batch" else [f])]
+    assert [m.get("code") for m in messages if m["type"] == "error"] == ["malformed", "invalid"]
+    assert any(m["type"] == "bid_passed" for m in messages)
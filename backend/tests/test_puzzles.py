@@ -0,0 +1,109 @@
+"""Tests for the endgame puzzle generator and puzzle API"""
+import json
+import random
+import pytest
+from fastapi import HTTPException
+from unittest.mock import patch
+from app.models.card import Suit, Rank
+from app.game_logic.bitmask import CARD_INDEX, popcount
+from app.game_logic.puzzles import PuzzleFile, find_puzzles, generate
+from app.game_logic.solver import Solver
+import app.api.puzzles as puzzles_api
+
+SEEDS = (0, 60)
+
+@pytest.fixture(scope="module")
+def puzzle_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("puzzles") / "puzzles.bin")
+    generate(path, *SEEDS, workers=1, chunk_size=20)
+    return path
+
+@pytest.fixture
+def puzzle_file(puzzle_path):
+    puzzles = PuzzleFile(puzzle_path)
+    yield puzzles
+    puzzles.close()
+
+def test_file_holds_every_puzzle_of_the_range(puzzle_file):
+    expected = [p for seed in range(*SEEDS) for p in find_puzzles(seed)]
+    assert len(puzzle_file) == len(expected) > 0
+    assert sorted(puzzle_file.get(i)["seed"] for i in range(len(puzzle_file))) == sorted(p[4] for p in expected)
+
+def test_answer_is_the_only_winning_card(puzzle_file):
+    puzzle = puzzle_file.get(0)
+    hands = [sum(1 << CARD_INDEX[(Suit(c["suit"]), Rank(c["rank"]))] for c in hand) for hand in puzzle["hands"]]
+    trump = Suit(puzzle["trump_suit"]) if puzzle["trump_suit"] else None
+    team = [s for s in (puzzle["declarer_index"], puzzle["partner_index"]) if s is not None]
+    solver = Solver(puzzle["contract_type"], team, trump)
+    outcomes = solver.move_outcomes(hands, puzzle["to_play"], puzzle["goal_points"] - puzzle["declarer_team_points"])
+    wanted = puzzle["to_play"] in team
+    winning = [card for card, reached in outcomes.items() if reached == wanted]
+    answer = CARD_INDEX[(Suit(puzzle["answer"]["suit"]), Rank(puzzle["answer"]["rank"]))]
+    assert winning == [answer]
+    assert popcount(hands[puzzle["to_play"]]) == puzzle["difficulty"] + 2
+
+def test_records_are_sorted_by_difficulty(puzzle_file):
+    levels = [puzzle_file.get(i)["difficulty"] for i in range(len(puzzle_file))]
+    assert levels == sorted(levels)
+    for level, indices in puzzle_file.by_difficulty.items():
+        assert levels.count(level) == len(indices)
+        assert all(levels[i] == level for i in indices)
+
+def test_truncated_file_is_rejected(puzzle_path, tmp_path):
+    path = tmp_path / "truncated.bin"
+    with open(puzzle_path, "rb") as f:
+        path.write_bytes(f.read()[:-1])
+    with pytest.raises(ValueError):
+        PuzzleFile(str(path))
+
+def test_random_by_difficulty(puzzle_file):
+    rng = random.Random(1)
+    for level, indices in puzzle_file.by_difficulty.items():
+        puzzle = puzzle_file.random(level, rng)
+        if indices:
+            assert puzzle["difficulty"] == level
+        else:
+            assert puzzle is None
+
+def test_generation_resumes_without_duplicates(tmp_path):
+    path = str(tmp_path / "resume.bin")
+    first = generate(path, 0, 20, workers=1, chunk_size=20)
+    # A chunk that was being written when the run died is dropped on resume
+    with open(path + ".records", "ab") as f:
+        f.write(b"\x00" * 7)
+    with patch("app.game_logic.puzzles.find_puzzles_in_range", side_effect=AssertionError("regenerated")):
+        assert generate(path, 0, 20, workers=1, chunk_size=20) == first
+    total = generate(path, 0, 40, workers=1, chunk_size=20)
+    assert total == len([p for seed in range(40) for p in find_puzzles(seed)])
+    with open(path + ".progress") as f:
+        assert sorted(json.load(f)["done"]) == [0, 20]
+
+def test_generate_refuses_to_overwrite_foreign_file(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not puzzles")
+    with pytest.raises(FileExistsError):
+        generate(str(path), 0, 10, workers=1)
+
+@pytest.mark.asyncio
+async def test_api_hides_answer_and_checks_solution(puzzle_file):
+    with patch.object(puzzles_api, "_puzzle_file", puzzle_file):
+        puzzle = await puzzles_api.get_random_puzzle(difficulty=None, current_user=None)
+        assert "answer" not in puzzle
+        answer = puzzle_file.get(puzzle["id"])["answer"]
+        request = puzzles_api.SolvePuzzleRequest(card=answer)
+        result = await puzzles_api.solve_puzzle(puzzle["id"], request, current_user=None)
+        assert result["correct"] is True
+
+        with pytest.raises(HTTPException) as error:
+            await puzzles_api.solve_puzzle(len(puzzle_file), request, current_user=None)
+        assert error.value.status_code == 404
+        with pytest.raises(HTTPException) as error:
+            await puzzles_api.get_random_puzzle(difficulty=9, current_user=None)
+        assert error.value.status_code == 400
+
+def test_missing_puzzle_file_is_unavailable(tmp_path):
+    with patch.object(puzzles_api, "_puzzle_file", None), \
+            patch.object(puzzles_api, "PUZZLE_FILE", str(tmp_path / "missing.bin")):
+        with pytest.raises(HTTPException) as error:
+            puzzles_api.get_puzzle_file()
+    assert error.value.status_code == 503
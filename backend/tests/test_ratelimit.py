@@ -0,0 +1,84 @@
+"""Tests for the token buckets that limit what clients send"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import WebSocketDisconnect
+from app.api.ratelimit import RateLimiter, parse_limits
+from app.api.websocket import ConnectionManager, websocket_endpoint
+from app.models.game import Game
+
+def test_parse_limits():
+    assert parse_limits("*=20/40, get_state=0.5,pass=") == {"*": (20.0, 40.0), "get_state": (0.5, 0.5)}
+
+def test_bursts_refill_at_the_rate():
+    limiter = RateLimiter({"get_state": (1, 3)}, strikes=5, strike_rate=0)
+    limits = limiter.connection("alice", now=0.0)
+    assert [limits.allow("get_state", now=0.0) for _ in range(4)] == [True, True, True, False]
+    assert limits.allow("get_state", now=0.5) is False
+    assert limits.allow("get_state", now=1.0) is True
+    assert limits.allow("play_card", now=1.0) is True  # no limit configured
+    assert limiter.stats()["rejected"] == {"get_state": 2}
+
+def test_bid_and_select_contract_share_a_bucket():
+    limiter = RateLimiter({"select_contract": (1, 2)}, strikes=5, strike_rate=0)
+    limits = limiter.connection("alice", now=0.0)
+    assert [limits.allow(kind, now=0.0) for kind in ("bid", "select_contract", "bid")] == [True, True, False]
+    assert limiter.stats()["rejected"] == {"select_contract": 1}
+
+def test_reconnecting_does_not_refill_the_user():
+    limiter = RateLimiter({"get_state": (1, 2)}, strikes=5, strike_rate=0)
+    first = limiter.connection("alice", now=0.0)
+    assert first.allow("get_state", now=0.0) and first.allow("get_state", now=0.0)
+    first.release(now=0.0)
+    second = limiter.connection("alice", now=0.0)
+    assert second.allow("get_state", now=0.0) is False
+    assert limiter.connection("bob", now=0.0).allow("get_state", now=0.0) is True
+
+    second.release(now=10.0)  # refilled by now: nothing left to remember
+    assert "alice" not in limiter.users
+
+def test_strikes_run_out():
+    limiter = RateLimiter({"pass": (1, 1)}, strikes=2, strike_rate=0)
+    limits = limiter.connection("alice", now=0.0)
+    limits.allow("pass", now=0.0)
+    for _ in range(2):
+        assert limits.allow("pass", now=0.0) is False and not limits.banned
+    assert limits.allow("pass", now=0.0) is False and limits.banned
+    assert limiter.stats()["disconnected"] == 1
+
+@pytest.mark.asyncio
+async def test_flooding_gets_the_client_rejected_then_disconnected():
+    game = Game("g1")
+    for name in ["alice", "bob", "carol", "dave"]:
+        game.add_player(name)
+    game.deal_cards()
+    game.current_bidder_index = 0
+    manager = ConnectionManager()
+    manager.start_game("g1", game)
+    limiter = RateLimiter({"*": (100, 100), "get_state": (0.001, 2)}, strikes=3, strike_rate=0)
+
+    received = 0
+
+    async def receive_text():
+        nonlocal received
+        received += 1
+        if received > 50:
+            raise WebSocketDisconnect()
+        await asyncio.sleep(0.001)  # Gives the writer time to send
+        return '{"type": "get_state"}'
+
+    websocket = AsyncMock()
+    websocket.receive_text = receive_text
+    with patch("app.api.websocket.manager", manager), patch("app.api.websocket.limiter", limiter), \
+            patch("app.api.websocket.schedule_bot_turns"):
+        await websocket_endpoint(websocket, "g1", "alice")
+    assert received == 6  # two served, three rejected, then out
+    websocket.close.assert_awaited_with(code=1008, reason="Rate limit exceeded")
+    assert "alice" not in manager.sessions["g1"].connections
+
+    sent = [json.loads(c.args[0]) for c in websocket.send_text.call_args_list]
+    messages = [m for f in sent for m in (f["messages"] if f["type"] == "batch" else [f])]
+    errors = [m for m in messages if m["type"] == "error"]
+    assert [m["code"] for m in errors] == ["rate_limited"] * 3
+    assert errors[0]["message"] == "Too many get_state messages"
@@ -0,0 +1,88 @@
+"""Tests for the idle room reaper"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.api import rooms as rooms_module
+from app.api.reaper import Reaper
+from app.api.websocket import ConnectionManager
+from app.models.room import GameRoom
+
+def test_sweep_only_looks_at_due_keys():
+    checked = []
+
+    def expiry(key, last_active, now):
+        checked.append(key)
+        return "idle", last_active + 2000
+
+    evicted = []
+    reaper = Reaper(expiry, evicted.append)
+    for n in range(1000):
+        reaper.touch(f"k{n}", now=float(n))
+    reaper.sweep(now=1000.0)  # first look at every key schedules its deadline
+    checked.clear()
+
+    assert reaper.sweep(now=2004.5) == 5
+    assert evicted == ["k0", "k1", "k2", "k3", "k4"]
+    assert checked == evicted
+    assert reaper.stats()["tracked"] == 995 and reaper.stats()["evicted"] == {"idle": 5}
+
+def test_activity_postpones_eviction():
+    reaper = Reaper(lambda key, last_active, now: ("idle", last_active + 10), lambda key: None)
+    reaper.touch("a", now=0.0)
+    reaper.sweep(now=0.0)
+    reaper.touch("a", now=8.0)
+    assert reaper.sweep(now=12.0) == 0
+    assert reaper.scheduled["a"] == 18.0
+    assert reaper.sweep(now=18.0) == 1 and "a" not in reaper.last_active
+
+def test_forgotten_keys_are_skipped():
+    evicted = []
+    reaper = Reaper(lambda key, last_active, now: ("idle", last_active), evicted.append)
+    reaper.touch("a", now=0.0)
+    reaper.forget("a")
+    reaper.touch("b", now=0.0)
+    reaper.sweep(now=1.0)
+    assert evicted == ["b"]
+
+@pytest.fixture
+def server():
+    """Empty room registry, connection manager and reaper"""
+    manager = ConnectionManager()
+    reaper = Reaper(rooms_module._room_expiry, rooms_module._evict_room)
+    with patch.object(rooms_module, "rooms", {}), patch.object(rooms_module, "manager", manager), \
+            patch.object(rooms_module, "reaper", reaper):
+        yield rooms_module.rooms, manager, reaper
+
+def add_room(rooms, manager, room_id, started=False):
+    room = GameRoom(room_id, 1, "alice")
+    room.add_player(1, "alice")
+    rooms[room_id] = room
+    if started:
+        manager.start_game(room_id, room.start_game(fill_with_bots=True), room)
+    return room
+
+@pytest.mark.asyncio
+async def test_idle_rooms_are_evicted_by_kind(server):
+    rooms, manager, reaper = server
+    add_room(rooms, manager, "waiting")
+    add_room(rooms, manager, "abandoned", started=True)
+    finished = add_room(rooms, manager, "finished", started=True)
+    add_room(rooms, manager, "connected", started=True)
+    await manager.connect(AsyncMock(), "connected", "alice")
+    for room_id in rooms:
+        reaper.touch(room_id, now=0.0)
+    for session in manager.sessions.values():
+        session.last_active = 0.0
+
+    with patch.object(type(finished.game), "is_round_complete", lambda game: game is finished.game):
+        reaper.sweep(now=rooms_module.FINISHED_GAME_TTL)
+        assert set(rooms) == {"waiting", "abandoned", "connected"}
+        reaper.sweep(now=rooms_module.ABANDONED_GAME_TTL)
+        assert set(rooms) == {"waiting", "connected"}
+        reaper.sweep(now=rooms_module.WAITING_ROOM_TTL)
+        assert set(rooms) == {"connected"}
+
+    assert set(manager.sessions) == {"connected"}
+    assert reaper.stats()["evicted"] == {"finished": 1, "abandoned": 1, "never_started": 1}
+    stats = rooms_module.room_stats()
+    assert (stats["rooms"], stats["games"], stats["connections"], stats["tracked"]) == (1, 1, 1, 1)
+    manager.disconnect("alice")
@@ -0,0 +1,106 @@
+"""Tests for resuming a dropped websocket without a full resync"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import WebSocketDisconnect
+from app.api.websocket import ConnectionManager, broadcast_game_state, resume_session, websocket_endpoint
+from app.models.game import Game
+
+def make_game() -> Game:
+    game = Game("g1")
+    for name in ["alice", "bob", "carol", "dave"]:
+        game.add_player(name)
+    game.deal_cards()
+    game.current_bidder_index = 0
+    return game
+
+def socket():
+    """A client that stays connected briefly, then goes away"""
+    websocket = AsyncMock()
+
+    async def receive_text():
+        await asyncio.sleep(0.01)  # Gives the writer time to send
+        raise WebSocketDisconnect()
+
+    websocket.receive_text = receive_text
+    return websocket
+
+def received(websocket) -> list:
+    return unbatch(json.loads(c.args[0]) for c in websocket.send_text.call_args_list)
+
+def unbatch(frames) -> list:
+    """Messages in the order the client handles them, batches unwrapped"""
+    messages = []
+    for message in frames:
+        messages.extend(message["messages"] if message["type"] == "batch" else [message])
+    return messages
+
+@pytest.fixture
+def manager():
+    manager = ConnectionManager()
+    manager.start_game("g1", make_game())
+    with patch("app.api.websocket.manager", manager), patch("app.api.websocket.schedule_bot_turns"):
+        yield manager
+
+async def broadcast(manager, count):
+    for n in range(count):
+        await manager.broadcast_to_game({"type": "player_joined", "n": n}, "g1")
+
+@pytest.mark.asyncio
+async def test_reconnect_replays_only_missed_events(manager):
+    first = socket()
+    connect = asyncio.create_task(websocket_endpoint(first, "g1", "alice"))
+    await asyncio.sleep(0)
+    await broadcast(manager, 3)
+    await connect
+    hello, snapshot, *events = received(first)
+    assert hello["type"] == "session" and not hello["resumed"] and hello["seq"] == 0
+    assert snapshot["type"] == "game_state" and snapshot["state"]["seq"] == 0
+    assert [event["seq"] for event in events] == [1, 2, 3]
+
+    await broadcast(manager, 2)  # While alice is away
+
+    second = socket()
+    await websocket_endpoint(second, "g1", "alice", resume_token=hello["resume_token"], last_seq=3)
+    hello_again, *replayed = received(second)
+    assert hello_again["resumed"] and hello_again["resume_token"] != hello["resume_token"]
+    assert [(event["seq"], event["type"], event.get("n")) for event in replayed] == [
+        (4, "player_disconnected", None), (5, "player_joined", 0), (6, "player_joined", 1),
+    ]
+
+@pytest.mark.asyncio
+async def test_tokens_are_single_use_and_per_user(manager):
+    session = manager.sessions["g1"]
+    connection = await manager.connect(AsyncMock(), "g1", "alice")
+    assert not resume_session(session, connection, None, None)
+    token = session.resume_tokens["alice"]
+
+    bob = await manager.connect(AsyncMock(), "g1", "bob")
+    assert not resume_session(session, bob, token, 0)
+
+    again = await manager.connect(AsyncMock(), "g1", "alice")
+    assert resume_session(session, again, token, 0)
+    latest = await manager.connect(AsyncMock(), "g1", "alice")
+    assert not resume_session(session, latest, token, 0)
+    manager.disconnect("alice")
+    manager.disconnect("bob")
+
+@pytest.mark.asyncio
+async def test_large_gaps_and_snapshots_fall_back_to_a_snapshot(manager):
+    session = manager.sessions["g1"]
+    connection = await manager.connect(AsyncMock(), "g1", "alice")
+    resume_session(session, connection, None, None)
+
+    await broadcast(manager, session.events.maxlen + 1)
+    connection = await manager.connect(AsyncMock(), "g1", "alice")
+    assert not resume_session(session, connection, session.resume_tokens["alice"], 0)
+
+    seen = session.seq
+    await broadcast(manager, 1)
+    await broadcast_game_state("g1")
+    await broadcast(manager, 1)
+    connection = await manager.connect(AsyncMock(), "g1", "alice")
+    assert not resume_session(session, connection, session.resume_tokens["alice"], seen)
+    assert session.missed(session.seq - 1) is not None and session.missed(session.seq + 1) is None
+    manager.disconnect("alice")
@@ -0,0 +1,90 @@
+"""Tests for per-game sessions in the connection manager"""
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.api.messages import Pass
+from app.api.websocket import ConnectionManager, handle_get_state, handle_pass
+from app.models.game import Game
+from app.models.room import GameRoom
+
+def make_game(game_id: str, names) -> Game:
+    game = Game(game_id)
+    for name in names:
+        game.add_player(name)
+    game.deal_cards()
+    game.current_bidder_index = 0
+    return game
+
+async def sent(connection, websocket) -> list:
+    await connection.flush()
+    return [json.loads(c.args[0]) for c in websocket.send_text.call_args_list]
+
+@pytest.mark.asyncio
+async def test_seats_are_per_game():
+    manager = ConnectionManager()
+    manager.start_game("g1", make_game("g1", ["alice", "bob", "carol", "dave"]))
+    manager.start_game("g2", make_game("g2", ["erin", "frank", "grace", "alice"]))
+    assert manager.sessions["g1"].seats["alice"] == 0
+    assert manager.sessions["g2"].seats["alice"] == 3
+
+    websocket = AsyncMock()
+    connection = await manager.connect(websocket, "g2", "alice")
+    with patch("app.api.websocket.manager", manager):
+        await handle_get_state("g2", "alice")
+    [message] = await sent(connection, websocket)
+    assert message["state"]["your_player_index"] == 3
+    manager.disconnect("alice")
+
+@pytest.mark.asyncio
+async def test_connecting_elsewhere_moves_the_user():
+    manager = ConnectionManager()
+    manager.start_game("g1", make_game("g1", ["alice", "bob", "carol", "dave"]))
+    old = await manager.connect(AsyncMock(), "g1", "alice")
+    new = await manager.connect(AsyncMock(), "lobby", "alice")
+    assert old.closed and not new.closed
+    assert "alice" not in manager.sessions["g1"].connections
+    assert manager.user_sessions["alice"] is manager.sessions["lobby"]
+
+    assert manager.disconnect("alice")
+    assert "alice" not in manager.user_sessions
+    # A session without game or clients is dropped, a running game is kept
+    assert "lobby" not in manager.sessions and "g1" in manager.sessions
+
+@pytest.mark.asyncio
+async def test_remove_game_keeps_connected_clients():
+    manager = ConnectionManager()
+    manager.start_game("g1", make_game("g1", ["alice", "bob", "carol", "dave"]))
+    await manager.connect(AsyncMock(), "g1", "alice")
+    manager.remove_game("g1")
+    session = manager.sessions["g1"]
+    assert session.game is None and session.seats == {} and "alice" in session.connections
+    manager.disconnect("alice")
+    assert "g1" not in manager.sessions
+
+@pytest.mark.asyncio
+async def test_users_without_a_seat_get_no_hand():
+    manager = ConnectionManager()
+    manager.start_game("g1", make_game("g1", ["alice", "bob", "carol", "dave"]))
+    websocket = AsyncMock()
+    connection = await manager.connect(websocket, "g1", "mallory")
+    with patch("app.api.websocket.manager", manager):
+        await handle_get_state("g1", "mallory")
+        await handle_pass("g1", "mallory", Pass())
+    messages = await sent(connection, websocket)
+    assert [m["type"] for m in messages] == ["error", "error"]
+    assert manager.sessions["g1"].game.passes_in_a_row == 0
+    manager.disconnect("mallory")
+
+def test_reseat_after_a_human_takes_a_bot_seat():
+    room = GameRoom("room", 1, "alice")
+    room.add_player(1, "alice")
+    game = room.start_game(fill_with_bots=True)
+    manager = ConnectionManager()
+    session = manager.start_game("room", game, room)
+    bot = game.players[1].name
+    assert session.seats[bot] == 1
+
+    with patch.object(Game, "is_round_complete", return_value=True):
+        assert room.seat_human(2, "bob") == 1
+    session.reseat()
+    assert session.seats["bob"] == 1 and bot not in session.seats
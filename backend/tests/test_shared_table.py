@@ -0,0 +1,76 @@
+"""Tests for the shared-memory transposition table"""
+import random
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from app.models.deck import Deck
+from app.game_logic.bitmask import to_mask
+from app.game_logic.solver import Solver, TranspositionTable
+from app.game_logic.shared_table import SharedTranspositionTable, BUCKET_SIZE
+
+@pytest.fixture
+def table():
+    table = SharedTranspositionTable(1 << 8)
+    yield table
+    table.close()
+
+def deal_hands(seed, tricks):
+    deck = Deck()
+    random.Random(seed).shuffle(deck.cards)
+    return [to_mask(deck.cards[seat * 8:seat * 8 + tricks]) for seat in range(4)]
+
+def solve_in_child(table, hands):
+    """Runs in a worker process: solve with the attached table and report its stats"""
+    solver = Solver("Rufer", [0, 2], table=table)
+    value = solver.value(hands, 0)
+    return value, table.hits
+
+def test_get_put_roundtrip(table):
+    key = 0xDEADBEEFCAFEF00D
+    assert table.get(key) is None
+    table.put(key, 5, 30, 1 << 10)
+    assert table.get(key) == (30, 1 << 10)
+    table.put(key, 5, 42, 42)
+    assert table.get(key) == (42, 42)
+    assert table.hits == 2
+    assert table.probes == 3
+
+def test_size_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        SharedTranspositionTable(1000)
+
+def test_full_bucket_replaces_shallowest(table):
+    # Keys differing only above the index bits share one bucket
+    keys = [(i + 1) << 32 for i in range(BUCKET_SIZE + 2)]
+    for depth, key in enumerate(keys[:BUCKET_SIZE], start=2):
+        table.put(key, depth, depth, depth)
+
+    # Shallower than everything resident: not admitted
+    table.put(keys[BUCKET_SIZE], 1, 1, 1)
+    assert table.get(keys[BUCKET_SIZE]) is None
+
+    # Deeper entry evicts the shallowest resident (depth 2)
+    table.put(keys[BUCKET_SIZE + 1], 8, 8, 8)
+    assert table.get(keys[BUCKET_SIZE + 1]) == (8, 8)
+    assert table.get(keys[0]) is None
+    assert all(table.get(key) is not None for key in keys[1:BUCKET_SIZE])
+
+def test_clear(table):
+    table.put(123, 3, 1, 2)
+    table.clear()
+    assert table.get(123) is None
+    assert table.hits == 0
+
+def test_solver_values_match_private_table(table):
+    for seed in range(3):
+        hands = deal_hands(seed, 4)
+        expected = Solver("Rufer", [0, 2], table=TranspositionTable()).value(hands, 0)
+        assert Solver("Rufer", [0, 2], table=table).value(hands, 0) == expected
+
+def test_child_process_sees_parent_entries(table):
+    hands = deal_hands(7, 4)
+    expected = Solver("Rufer", [0, 2], table=table).value(hands, 0)
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        value, hits = pool.submit(solve_in_child, table, hands).result()
+    assert value == expected
+    # The root position was already solved exactly by the parent
+    assert hits >= 1
@@ -0,0 +1,135 @@
+"""Tests for the distributed simulation coordinator and workers (localhost only)"""
+import asyncio
+import copy
+import random
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from app.simulation.coordinator import Coordinator
+from app.simulation.protocol import send_message, read_message
+from app.simulation.runner import merge_results, play_game, simulate_seeds
+from app.simulation.worker import run_worker
+
+@pytest.fixture(scope="module")
+def executor():
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+async def dead_worker(port, units=1):
+    """Take units and drop the connection without answering"""
+    for _ in range(units):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await send_message(writer, {"type": "hello", "worker": "dead"})
+        message = await read_message(reader)
+        assert message["type"] == "unit"
+        writer.close()
+        await writer.wait_closed()
+
+def test_games_are_reproducible_from_seed():
+    first, second = play_game(11), play_game(11)
+    assert first.play_log == second.play_log
+    assert first.contract_type == second.contract_type
+
+def test_simulate_seeds_counts_every_game():
+    result = simulate_seeds(range(50))
+    played = sum(stats["played"] for stats in result["contracts"].values())
+    assert result["games"] == 50
+    assert played + result["passed"] == 50
+
+@pytest.mark.asyncio
+async def test_workers_aggregate_all_units(executor):
+    coordinator = Coordinator(0, 230, unit_size=50, port=0)
+    await coordinator.start()
+    try:
+        counts = await asyncio.gather(
+            run_worker("127.0.0.1", coordinator.port, "a", executor),
+            run_worker("127.0.0.1", coordinator.port, "b", executor),
+        )
+        result = await asyncio.wait_for(coordinator.wait(), 10)
+    finally:
+        await coordinator.close()
+    assert sum(counts) == coordinator.total_units == 5
+    assert result == simulate_seeds(range(230))
+    assert coordinator.failed_units == []
+
+@pytest.mark.asyncio
+async def test_units_of_dead_workers_are_retried(executor):
+    coordinator = Coordinator(0, 100, unit_size=25, port=0)
+    await coordinator.start()
+    try:
+        await dead_worker(coordinator.port, units=2)
+        await run_worker("127.0.0.1", coordinator.port, "survivor", executor)
+        result = await asyncio.wait_for(coordinator.wait(), 10)
+    finally:
+        await coordinator.close()
+    assert coordinator.retries == 2
+    assert result == simulate_seeds(range(100))
+    assert coordinator.workers == {"survivor": 4}
+
+@pytest.mark.asyncio
+async def test_silent_worker_loses_its_lease(executor):
+    coordinator = Coordinator(0, 20, unit_size=10, port=0, lease_timeout=0.2)
+    await coordinator.start()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", coordinator.port)
+        await send_message(writer, {"type": "hello", "worker": "stuck"})
+        assert (await read_message(reader))["type"] == "unit"
+        await run_worker("127.0.0.1", coordinator.port, "healthy", executor)
+        result = await asyncio.wait_for(coordinator.wait(), 10)
+        writer.close()
+    finally:
+        await coordinator.close()
+    assert result["games"] == 20
+    assert coordinator.retries == 1
+
+@pytest.mark.asyncio
+async def test_units_are_given_up_after_max_attempts():
+    coordinator = Coordinator(0, 10, unit_size=10, port=0, max_attempts=2)
+    await coordinator.start()
+    try:
+        await dead_worker(coordinator.port, units=2)
+        result = await asyncio.wait_for(coordinator.wait(), 10)
+    finally:
+        await coordinator.close()
+    assert coordinator.failed_units == [0]
+    assert result["games"] == 0
+
+def test_play_game_leaves_the_global_random_alone():
+    random.seed(5)
+    expected = random.random()
+    random.seed(5)
+    play_game(3)
+    assert random.random() == expected
+
+@pytest.mark.parametrize("part", [
+    {"games": 2, "passed": 1, "contracts": {"Solo": {"played": 1, "won": 1, "schneider": 0, "schwarz": 0}}},
+    {"games": 2, "passed": 1, "contracts": {"Solo": {"played": 1, "won": "1", "schneider": 0, "schwarz": 0, "team_points": 70}}},
+    {"games": 3, "passed": 1, "contracts": {"Solo": {"played": 1, "won": 1, "schneider": 0, "schwarz": 0, "team_points": 70}}},
+    {"games": 1, "passed": -1, "contracts": {"Solo": {"played": 2, "won": 1, "schneider": 0, "schwarz": 0, "team_points": 70}}},
+    ["not", "a", "result"],
+])
+def test_malformed_results_are_not_merged(part):
+    total = simulate_seeds(range(5))
+    before = copy.deepcopy(total)
+    with pytest.raises(ValueError):
+        merge_results(total, part)
+    assert total == before
+
+@pytest.mark.asyncio
+async def test_units_with_malformed_results_are_retried(executor):
+    coordinator = Coordinator(0, 10, unit_size=10, port=0)
+    await coordinator.start()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", coordinator.port)
+        await send_message(writer, {"type": "hello", "worker": "liar"})
+        unit = await read_message(reader)
+        await send_message(writer, {"type": "result", "unit_id": unit["unit_id"], "result": {
+            "games": 10, "passed": 0, "contracts": {"Solo": {"played": "10"}},
+        }})
+        await reader.read()  # The coordinator hangs up on it
+        writer.close()
+        await run_worker("127.0.0.1", coordinator.port, "honest", executor)
+        result = await asyncio.wait_for(coordinator.wait(), 10)
+    finally:
+        await coordinator.close()
+    assert result == simulate_seeds(range(10))
+    assert coordinator.retries == 1 and coordinator.workers == {"honest": 1}
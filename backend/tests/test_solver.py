@@ -0,0 +1,102 @@
+"""Tests for the bitmask rules and the double-dummy solver"""
+import random
+import pytest
+from app.models.card import Card, Suit, Rank
+from app.models.deck import Deck
+from app.models.player import Player
+from app.game_logic.tricks import determine_trick_winner, get_valid_plays
+from app.game_logic.bitmask import (
+    CARDS, get_tables, to_mask, to_cards, valid_plays, card_index,
+)
+from app.game_logic.solver import Solver, TranspositionTable
+
+CONTRACTS = [("Rufer", None), ("Wenz", None), ("Solo", Suit.GRAS)]
+
+def deal(seed, tricks):
+    """Deal `tricks` cards per seat from a seeded shuffle"""
+    deck = Deck()
+    random.Random(seed).shuffle(deck.cards)
+    return [deck.cards[seat * 8:seat * 8 + tricks] for seat in range(4)]
+
+def reference_value(hands, leader, trick, contract_type, trump_suit, team):
+    """Plain minimax over the object model"""
+    players = [Player(i, f"p{i}") for i in range(4)]
+    for player, hand in zip(players, hands):
+        player.hand = list(hand)
+    
+    def search(leader, trick):
+        seat = (leader + len(trick)) % 4
+        if not players[seat].hand:
+            return 0
+        led_suit = trick[0].suit if trick else None
+        values = []
+        for card in get_valid_plays(players[seat], led_suit, contract_type, trump_suit):
+            players[seat].hand.remove(card)
+            played = trick + [card]
+            if len(played) == 4:
+                winner = determine_trick_winner(played, players, leader, contract_type, trump_suit)
+                gain = sum(c.value for c in played) if winner in team else 0
+                values.append(gain + search(winner, []))
+            else:
+                values.append(search(leader, played))
+            players[seat].hand.append(card)
+        return max(values) if seat in team else min(values)
+    
+    return search(leader, trick)
+
+@pytest.mark.parametrize("contract_type,trump_suit", CONTRACTS)
+def test_trick_winner_matches_object_model(contract_type, trump_suit):
+    """Random tricks are won by the same seat in both engines"""
+    tables = get_tables(contract_type, trump_suit)
+    players = [Player(i, f"p{i}") for i in range(4)]
+    rng = random.Random(7)
+    for _ in range(500):
+        trick = rng.sample(CARDS, 4)
+        expected = determine_trick_winner(trick, players, 0, contract_type, trump_suit)
+        assert tables.trick_winner([card_index(c) for c in trick]) == expected
+
+def test_valid_plays_matches_object_model():
+    """Follow-suit rules agree with get_valid_plays"""
+    rng = random.Random(3)
+    player = Player(0, "p0")
+    for _ in range(200):
+        player.hand = rng.sample(CARDS, 6)
+        led = rng.choice(CARDS)
+        expected = get_valid_plays(player, led.suit, "Rufer")
+        assert set(to_cards(valid_plays(to_mask(player.hand), card_index(led)))) == set(expected)
+
+@pytest.mark.parametrize("contract_type,trump_suit", CONTRACTS)
+@pytest.mark.parametrize("seed", [1, 2])
+def test_solver_matches_minimax(contract_type, trump_suit, seed):
+    """Alpha-beta with a transposition table finds the exact minimax value"""
+    hands = deal(seed, 3)
+    team = [0, 2] if contract_type == "Rufer" else [0]
+    solver = Solver(contract_type, team, trump_suit)
+    expected = reference_value(hands, 0, [], contract_type, trump_suit, team)
+    
+    assert solver.value([to_mask(h) for h in hands], 0) == expected
+    assert solver.reaches([to_mask(h) for h in hands], 0, expected)
+    assert not solver.reaches([to_mask(h) for h in hands], 0, expected + 1)
+
+def test_move_values_mid_trick():
+    """Move values include the points already lying in the trick"""
+    hands = deal(4, 3)
+    led = hands[0].pop()
+    masks = [to_mask(h) for h in hands]
+    solver = Solver("Wenz", [0])
+    values = solver.move_values(masks, 0, [card_index(led)])
+    
+    follower = Player(1, "p1")
+    follower.hand = hands[1]
+    assert set(values) == {card_index(c) for c in get_valid_plays(follower, led.suit, "Wenz")}
+    assert min(values.values()) == solver.value(masks, 0, [card_index(led)])
+
+def test_transposition_table_keeps_deeper_entries():
+    """A full table only admits entries at least as deep as the one it evicts"""
+    table = TranspositionTable(max_entries=1)
+    table.put(1, 5, 10, 10)
+    table.put(2, 3, 4, 4)
+    assert table.get(2) is None
+    table.put(3, 6, 7, 7)
+    assert table.get(3) == (7, 7)
+    assert table.get(1) is None
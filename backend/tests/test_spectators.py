@@ -0,0 +1,137 @@
+"""Tests for the spectator channel"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.api import spectators as spectators_module
+from app.api.spectators import SpectatorHub
+from app.api.messages import Pass
+from app.api.websocket import ConnectionManager, handle_pass, spectator_endpoint
+from app.models.game import Game
+from app.models.room import GameRoom
+
+class StuckSocket:
+    """A spectator whose sends never complete"""
+
+    def __init__(self):
+        self.close = AsyncMock()
+
+    async def send_text(self, text):
+        await asyncio.Event().wait()
+
+def make_game() -> Game:
+    game = Game("g1")
+    for name in ["alice", "bob", "carol", "dave"]:
+        game.add_player(name)
+    game.deal_cards()
+    game.current_bidder_index = 0
+    return game
+
+@pytest.fixture
+def hub():
+    hub = SpectatorHub()
+    with patch("app.api.websocket.spectators", hub):
+        yield hub
+    hub.shutdown()
+
+@pytest.mark.asyncio
+async def test_games_without_spectators_publish_nothing(hub):
+    hub.publish("g1", 1, {"players": []}, make_game())
+    assert hub.channels == {}
+
+@pytest.mark.asyncio
+async def test_one_encoding_for_all_spectators(hub):
+    game = make_game()
+    sockets = [AsyncMock() for _ in range(200)]
+    connections = [hub.join(websocket, "g1", f"viewer{i}") for i, websocket in enumerate(sockets)]
+    manager = ConnectionManager()
+    manager.start_game("g1", game)
+    with patch("app.api.websocket.manager", manager), patch("app.api.websocket.schedule_bot_turns"), \
+            patch("app.api.spectators.encode", wraps=spectators_module.encode) as encode:
+        await handle_pass("g1", "alice", Pass())
+        assert len(hub.channels["g1"].pending) == 1
+        hub.channels["g1"].tick(float("inf"))
+    assert encode.call_count == 1
+
+    await asyncio.gather(*(connection.flush() for connection in connections))
+    frames = {websocket.send_text.call_args[0][0] for websocket in sockets}
+    assert len(frames) == 1
+    message = json.loads(frames.pop())
+    assert message["type"] == "spectator_state"
+    assert message["state"]["hand_sizes"] == [8, 8, 8, 8] and message["state"]["version"] == 1
+    assert not any("hand" in key and key != "hand_sizes" for key in message["state"])
+
+@pytest.mark.asyncio
+async def test_updates_are_delayed(hub):
+    websocket = AsyncMock()
+    connection = hub.join(websocket, "g1", "viewer")
+    channel = hub.channels["g1"]
+    with patch.object(spectators_module, "SPECTATOR_DELAY", 30.0), \
+            patch("app.api.spectators.time.monotonic", return_value=100.0):
+        hub.publish("g1", 1, {"trick_number": 0}, make_game())
+    with patch.object(spectators_module, "SPECTATOR_DELAY", 30.0):
+        channel.tick(129.0)
+        await connection.flush()
+        assert not websocket.send_text.called
+        channel.tick(130.0)
+    await connection.flush()
+    assert json.loads(websocket.send_text.call_args[0][0])["state"]["trick_number"] == 0
+
+@pytest.mark.asyncio
+async def test_backlog_slows_updates_down(hub):
+    fast = [hub.join(AsyncMock(), "g1", f"fast{i}") for i in range(5)]
+    stuck = [hub.join(StuckSocket(), "g1", f"stuck{i}") for i in range(5)]
+    channel = hub.channels["g1"]
+    game = make_game()
+    for version in range(1, 5):
+        hub.publish("g1", version, {"version": version}, game)
+        channel.tick(float("inf"))
+        await asyncio.sleep(0)
+    assert channel.interval > spectators_module.SPECTATOR_INTERVAL
+    assert channel.throttled >= 1
+    # Stuck spectators hold at most one queued update each
+    assert all(len(connection.queue) <= 1 for connection in stuck)
+
+    for connection in stuck:
+        hub.leave(connection)
+    for version in range(5, 12):
+        hub.publish("g1", version, {"version": version}, game)
+        channel.tick(float("inf"))
+        await asyncio.gather(*(connection.flush() for connection in fast))
+    assert channel.interval == spectators_module.SPECTATOR_INTERVAL
+
+@pytest.mark.asyncio
+async def test_last_spectator_closes_the_channel(hub):
+    connection = hub.join(AsyncMock(), "g1", "viewer")
+    task = hub.channels["g1"].task
+    hub.leave(connection)
+    await asyncio.sleep(0)
+    assert hub.channels == {} and task.cancelled()
+
+@pytest.mark.asyncio
+async def test_only_featured_public_games_can_be_watched(hub):
+    manager = ConnectionManager()
+    manager.start_game("g1", make_game())  # no room
+    for room_id, private, featured in [("g2", False, False), ("g3", True, True)]:
+        manager.start_game(room_id, make_game(), GameRoom(room_id, 1, "alice", private, featured=featured))
+
+    with patch("app.api.websocket.manager", manager):
+        for game_id in ["g1", "g2", "g3", "nope"]:
+            websocket = AsyncMock()
+            await spectator_endpoint(websocket, game_id, "eve")
+            websocket.close.assert_awaited_with(code=1008, reason="Game cannot be watched")
+    assert hub.channels == {}
+
+@pytest.mark.asyncio
+async def test_spectators_are_capped_per_game_and_per_user(hub):
+    with patch.object(spectators_module, "SPECTATOR_MAX_PER_GAME", 3), \
+            patch.object(spectators_module, "SPECTATOR_MAX_PER_USER", 2):
+        mine = [hub.join(AsyncMock(), "g1", "eve") for _ in range(3)]
+        assert mine[2] is None
+        assert hub.join(AsyncMock(), "g1", "bob") is not None
+        assert hub.join(AsyncMock(), "g1", "carol") is None  # game full
+        assert hub.join(AsyncMock(), "g2", "eve") is None  # eve holds two already
+
+        hub.leave(mine[0])
+        assert hub.join(AsyncMock(), "g2", "eve") is not None
+    assert hub.per_user == {"eve": 2, "bob": 1}
@@ -0,0 +1,94 @@
+"""Tests for versioned delta state updates"""
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.api.websocket import ConnectionManager, broadcast_game_state, run_bot_turns, send_game_state_to_user
+from app.models.room import GameRoom
+
+def apply(state, message):
+    """What the frontend client does with a delta"""
+    state = dict(state, **message["changes"])
+    if message["type"] == "card_played":
+        card = message["card"]
+        if message["player_index"] == state["your_player_index"]:
+            state["your_hand"] = [c for c in state["your_hand"] if (c["suit"], c["rank"]) != (card["suit"], card["rank"])]
+        else:
+            state["other_hands"] = [
+                n - 1 if i == message["player_index"] and n is not None else n
+                for i, n in enumerate(state["other_hands"])
+            ]
+    state["version"] = message["version"]
+    state["seq"] = message["seq"]
+    return state
+
+@pytest.fixture
+async def table():
+    """An all-bot game with a socket connected for every seat"""
+    room = GameRoom("delta-room", 1, "alice")
+    room.add_player(1, "alice")
+    game = room.start_game(fill_with_bots=True)
+    game.players[0].is_ai = True
+    game.current_bidder_index = 0
+    manager = ConnectionManager()
+    manager.start_game(room.room_id, game, room)
+    sockets = {}
+    for player in game.players:
+        sockets[player.name] = AsyncMock()
+        await manager.connect(sockets[player.name], room.room_id, player.name)
+    yield manager, room.room_id, game, sockets
+    for name in list(manager.user_sessions):
+        manager.disconnect(name)
+
+async def received(manager, sockets, name):
+    await manager.user_sessions[name].connections[name].flush()
+    return unbatch(json.loads(c.args[0]) for c in sockets[name].send_text.call_args_list)
+
+def unbatch(frames) -> list:
+    """Messages in the order the client handles them, batches unwrapped"""
+    messages = []
+    for message in frames:
+        messages.extend(message["messages"] if message["type"] == "batch" else [message])
+    return messages
+
+@pytest.mark.asyncio
+async def test_deltas_rebuild_the_snapshot(table):
+    manager, game_id, game, sockets = table
+    bids = iter([{"contract": "Wenz", "trump_suit": None, "called_ace": None}])
+    with patch("app.api.websocket.manager", manager), \
+            patch("app.api.websocket.BOT_MOVE_DELAY", 0), \
+            patch("app.api.websocket.schedule_bot_turns"), \
+            patch("app.api.websocket.ai_choose_bid", side_effect=lambda g, i: next(bids, None)), \
+            patch("app.api.websocket.handle_round_complete", AsyncMock()):
+        await broadcast_game_state(game_id)
+        await run_bot_turns(game_id)
+        assert game.is_round_complete()
+
+        for seat, player in enumerate(game.players):
+            messages = await received(manager, sockets, player.name)
+            assert messages[0]["type"] == "game_state"
+            assert sum(m["type"] == "game_state" for m in messages) == 1
+            assert sum(m["type"] == "card_played" for m in messages) == 32
+            state = messages[0]["state"]
+            for message in messages[1:]:
+                assert message["version"] == state["version"] + 1
+                state = apply(state, message)
+
+            sockets[player.name].send_text.reset_mock()
+            await send_game_state_to_user(game_id, player.name)
+            snapshot = (await received(manager, sockets, player.name))[-1]["state"]
+            assert state == snapshot
+            assert state["your_hand"] == [] and state["round_complete"]
+
+@pytest.mark.asyncio
+async def test_delta_only_carries_changed_fields(table):
+    manager, game_id, game, sockets = table
+    with patch("app.api.websocket.manager", manager), \
+            patch("app.api.websocket.schedule_bot_turns"):
+        from app.api.messages import Pass
+        from app.api.websocket import handle_pass
+        await broadcast_game_state(game_id)
+        await handle_pass(game_id, game.players[0].name, Pass())
+    passed = (await received(manager, sockets, game.players[2].name))[-1]
+    assert passed["type"] == "bid_passed"
+    assert passed["version"] == manager.sessions[game_id].version == 2
+    assert set(passed["changes"]) == {"current_bidder", "passes_in_a_row"}
@@ -0,0 +1,110 @@
+"""Tests for the training-data exporter"""
+import numpy as np
+import pytest
+from unittest.mock import patch
+from app.game_logic.analysis import round_record
+from app.game_logic.training_export import (
+    TrainingExporter, encode_round, load_chunks, bid_action,
+    FEATURE_SIZE, HAND, TRICK, BIDDING, DECLARER, PASS_ACTION, WENZ_ACTION,
+)
+from app.models.game import BOT, HUMAN, TIMEOUT
+from app.simulation.runner import play_game
+import app.api.training as training_api
+
+def played_record(seed, user_ids=None):
+    """Round record of the first seed at or after `seed` that reached card play, as if humans had played it"""
+    while True:
+        game = play_game(seed)
+        if game.contract is not None:
+            record = round_record(game, user_ids or [1, 2, 3, 4])
+            record["bid_origins"] = [HUMAN] * len(record["bids"])
+            record["play_origins"] = [HUMAN] * len(record["plays"])
+            return record
+        seed += 1
+
+def test_encodes_every_decision():
+    record = played_record(3)
+    features, actions, seats = encode_round(record)
+    bids, plays = record["bids"], record["plays"]
+    assert features.shape == (len(bids) + len(plays), FEATURE_SIZE)
+    assert list(actions[len(bids):]) == [card for _, card in plays]
+    assert list(seats) == [b[0] for b in bids] + [p[0] for p in plays]
+    assert all(features[:len(bids), BIDDING] == 1)
+    assert not features[len(bids):, BIDDING].any()
+
+    # The hand shrinks by one card per trick, and the trick slots fill in order
+    for number, row in enumerate(features[len(bids):]):
+        assert row[HAND:HAND + 32].sum() == 8 - number // 4
+        assert row[TRICK:TRICK + 96].sum() == number % 4
+        assert row[HAND + actions[len(bids) + number]] == 1
+        assert row[DECLARER:DECLARER + 4].sum() == 1
+
+def test_bid_actions():
+    record = played_record(3)
+    _, actions, _ = encode_round(record)
+    expected = [bid_action(*bid[1:]) for bid in record["bids"]]
+    assert list(actions[:len(expected)]) == expected
+    assert bid_action(None, None, None) == PASS_ACTION
+    assert bid_action("Wenz", None, None) == WENZ_ACTION
+
+def test_only_selected_seats_are_kept():
+    record = played_record(5)
+    _, _, seats = encode_round(record, seats=[2])
+    assert set(seats) == {2}
+    assert len(seats) == 8 + sum(1 for b in record["bids"] if b[0] == 2)
+
+def test_simulated_rounds_are_bot_moves():
+    game = next(game for game in map(play_game, range(3, 100)) if game.contract is not None)
+    record = round_record(game, [1, 2, 3, 4])
+    assert set(record["play_origins"]) == set(record["bid_origins"]) == {BOT}
+    _, actions, _ = encode_round(record, humans_only=True)
+    assert len(actions) == 0
+
+def test_only_human_decisions_are_exported(tmp_path):
+    record = played_record(7)
+    # Seat 3 was a bot until a human took it over, and a human's clock ran out on their first card
+    record["play_origins"] = [BOT if seat == 3 else HUMAN for seat, _ in record["plays"]]
+    record["bid_origins"] = [BOT if bid[0] == 3 else HUMAN for bid in record["bids"]]
+    first = next(i for i, (seat, _) in enumerate(record["plays"]) if seat != 3)
+    record["play_origins"][first] = TIMEOUT
+    expected = [i for i, origin in enumerate(record["play_origins"]) if origin == HUMAN]
+
+    exporter = TrainingExporter(str(tmp_path))
+    rows = exporter.export_round(record)
+    exporter.close()
+    _, actions, seats = encode_round(record, humans_only=True)
+    assert rows == len(actions)
+    assert 3 not in seats
+    bids = sum(1 for bid in record["bids"] if bid[0] != 3)
+    assert list(actions[bids:]) == [record["plays"][i][1] for i in expected]
+
+def test_exporter_chunks_and_resumes(tmp_path):
+    records = [played_record(seed, [1, None, 3, None]) for seed in (1, 20, 40)]
+    expected = [encode_round(r, seats=[0, 2]) for r in records]
+
+    exporter = TrainingExporter(str(tmp_path), chunk_rows=12)
+    assert exporter.export_round(records[0]) == len(expected[0][1])
+    exporter.close()
+    # Reopening continues the partly filled chunk
+    exporter = TrainingExporter(str(tmp_path))
+    for record in records[1:]:
+        exporter.export_round(record)
+    exporter.close()
+
+    chunks = list(load_chunks(str(tmp_path)))
+    assert len(chunks) == -(-exporter.total_rows // 12)
+    assert all(len(actions) == 12 for _, actions in chunks[:-1])
+    features = np.concatenate([f for f, _ in chunks])
+    actions = np.concatenate([a for _, a in chunks])
+    assert np.array_equal(features, np.concatenate([f for f, _, _ in expected]))
+    assert np.array_equal(actions, np.concatenate([a for _, a, _ in expected]))
+
+def test_incompatible_export_is_rejected(tmp_path):
+    TrainingExporter(str(tmp_path)).close()
+    with patch("app.game_logic.training_export.FEATURE_SIZE", FEATURE_SIZE + 1):
+        with pytest.raises(ValueError):
+            TrainingExporter(str(tmp_path))
+
+def test_submit_round_is_off_without_export_dir():
+    with patch.object(training_api, "exporter", None):
+        assert training_api.submit_round(played_record(1)) is False
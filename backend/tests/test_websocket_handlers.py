@@ -1,7 +1,9 @@
 """Unit tests for WebSocket handlers"""
+import json
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from app.api.websocket import ConnectionManager, handle_get_state, handle_select_contract, handle_pass, manager
+from app.api.messages import Pass, SelectContract
+from app.api.websocket import ConnectionManager, broadcast_game_state, handle_get_state, handle_select_contract, handle_pass, manager
 from app.models.game import Game
 from app.models.card import Suit
 
@@ -28,17 +30,22 @@ async def test_handle_get_state(mock_manager, mock_game):
     user_id = "player1"
     
     # Set up manager state
-    mock_manager.games[game_id] = mock_game
-    mock_manager.user_to_player_index[user_id] = 0
-    mock_manager.active_connections[user_id] = AsyncMock()
-    mock_manager.active_connections[user_id].send_json = AsyncMock()
+    mock_manager.start_game(game_id, mock_game)
+    websocket = AsyncMock()
+    connection = await mock_manager.connect(websocket, game_id, user_id)
     
     # Patch the global manager
     with patch('app.api.websocket.manager', mock_manager):
         await handle_get_state(game_id, user_id)
+    await connection.flush()
     
     # Verify message was sent
-    assert mock_manager.active_connections[user_id].send_json.called
+    assert websocket.send_text.called
+    message = json.loads(websocket.send_text.call_args[0][0])
+    assert message["type"] == "game_state"
+    assert message["state"]["your_player_index"] == 0
+    assert len(message["state"]["your_hand"]) == 8
+    connection.close()
 
 @pytest.mark.asyncio
 async def test_handle_select_contract(mock_manager, mock_game):
@@ -47,33 +54,24 @@ async def test_handle_select_contract(mock_manager, mock_game):
     user_id = "player1"
     
     # Set up manager state
-    mock_manager.games[game_id] = mock_game
-    mock_manager.user_to_player_index[user_id] = 0
-    mock_manager.active_connections[user_id] = AsyncMock()
-    mock_manager.active_connections[user_id].send_json = AsyncMock()
+    mock_manager.start_game(game_id, mock_game)
     mock_manager.send_personal_message = AsyncMock()
     mock_manager.broadcast_to_game = AsyncMock()
     mock_game.current_bidder_index = 0  # Set current bidder
     mock_game.bidding_phase = True
     mock_game.bidding_complete = False
     
-    # Create message
-    message = {
-        "contract": "Rufer",
-        "called_ace": "Eichel"
-    }
-    
     # Find an ace not in player's hand
     player = mock_game.players[0]
     ace_not_in_hand = None
     for suit in [Suit.EICHEL, Suit.GRAS, Suit.HERZ, Suit.SCHELLEN]:
         has_ace = any(card.suit == suit and card.rank.value == "Ace" for card in player.hand)
         if not has_ace:
-            ace_not_in_hand = suit.value
+            ace_not_in_hand = suit
             break
     
     if ace_not_in_hand:
-        message["called_ace"] = ace_not_in_hand
+        message = SelectContract(contract="Rufer", called_ace=ace_not_in_hand)
         # Patch the global manager
         with patch('app.api.websocket.manager', mock_manager):
             await handle_select_contract(game_id, user_id, message)
@@ -89,17 +87,14 @@ async def test_handle_pass(mock_manager, mock_game):
     user_id = "player1"
     
     # Set up manager state
-    mock_manager.games[game_id] = mock_game
-    mock_manager.user_to_player_index[user_id] = 0
-    mock_manager.active_connections[user_id] = AsyncMock()
-    mock_manager.active_connections[user_id].send_json = AsyncMock()
+    mock_manager.start_game(game_id, mock_game)
     mock_manager.send_personal_message = AsyncMock()
     mock_manager.broadcast_to_game = AsyncMock()
     mock_game.current_bidder_index = 0  # Set current bidder
     mock_game.bidding_phase = True
     mock_game.bidding_complete = False
     
-    message = {}
+    message = Pass()
     # Patch the global manager
     with patch('app.api.websocket.manager', mock_manager):
         await handle_pass(game_id, user_id, message)
@@ -107,3 +102,31 @@ async def test_handle_pass(mock_manager, mock_game):
     # Should have incremented passes
     assert mock_game.passes_in_a_row >= 1
 
+
+@pytest.mark.asyncio
+async def test_broadcast_game_state_per_seat(mock_manager, mock_game):
+    """Every seat gets the shared public state with only its own hand"""
+    game_id = "test-game"
+    session = mock_manager.start_game(game_id, mock_game)
+    sockets = {}
+    for player in mock_game.players:
+        sockets[player.name] = AsyncMock()
+        await mock_manager.connect(sockets[player.name], game_id, player.name)
+    
+    with patch('app.api.websocket.manager', mock_manager):
+        await broadcast_game_state(game_id)
+    states = []
+    for name, websocket in sockets.items():
+        await session.connections[name].flush()
+        states.append(json.loads(websocket.send_text.call_args[0][0])["state"])
+        mock_manager.disconnect(name)
+    
+    for index, state in enumerate(states):
+        assert state["your_player_index"] == index
+        assert state["your_hand"] == [
+            {"suit": c.suit.value, "rank": c.rank.value, "value": c.value}
+            for c in mock_game.players[index].hand
+        ]
+        assert state["other_hands"][index] is None
+        assert state["players"] == [p.name for p in mock_game.players]
+        assert state["bidding_phase"] is True
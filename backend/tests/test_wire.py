@@ -0,0 +1,90 @@
+"""Tests for the binary wire protocol"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import WebSocketDisconnect
+from jose import jwt
+from app.api import wire
+from app.api.websocket import ConnectionManager, EncodedState, public_state
+from app.main import websocket_route
+from app.models.game import Game
+
+CARD = {"suit": "Eichel", "rank": "Ace", "value": 11}
+
+@pytest.mark.parametrize("value", [
+    None, True, False, 0, 127, 128, 255, 256, 65535, 65536, 2**32, -1, -32, -33, -128, -129, -2**31 - 1,
+    1.5, "", "x" * 31, "x" * 32, "ü" * 200, "y" * 70000, [], list(range(20)), {"a": 1},
+    {str(i): i for i in range(20)},
+    {"type": "card_played", "version": 7, "player_index": 2, "card": CARD,
+     "changes": {"current_trick": [CARD], "current_player": 3}},
+    {"suit": "Eichel", "rank": "Ace"},  # Not a full card dict: stays a map
+    {"suit": "Eichel", "rank": "Ace", "value": 10},
+])
+def test_round_trip(value):
+    assert wire.unpack(wire.pack(value)) == value
+
+def test_cards_are_three_bytes():
+    assert len(wire.pack(CARD)) == 3
+    trick = {"type": "trick_complete", "winner": 1, "trick": [CARD] * 4}
+    assert len(wire.pack(trick)) < len(json.dumps(trick)) / 4
+
+@pytest.mark.parametrize("data", [b"", b"\x92\x01", b"\xd4\x02\x00", b"\xd4\x01\x40", b"\xc1", b"\x01\x02", b"\x81\x90\x01"])
+def test_malformed_input_raises_value_error(data):
+    with pytest.raises(ValueError):
+        wire.unpack(data)
+
+def test_binary_state_frame_matches_json():
+    game = Game("wire-game")
+    for i in range(4):
+        game.add_player(f"p{i}")
+    game.deal_cards()
+    encoded = EncodedState(game, dict(public_state("wire-game", game), version=3))
+    for seat in range(4):
+        assert wire.unpack(encoded.frame(seat, binary=True)) == json.loads(encoded.frame(seat))
+
+class FakeSocket:
+    """Just enough of a starlette WebSocket for the route"""
+
+    def __init__(self, subprotocols, frames):
+        token = jwt.encode({"sub": "wire-user"}, "your-secret-key-change-in-production", algorithm="HS256")
+        self.scope = {"subprotocols": subprotocols}
+        self.query_params = {"token": token}
+        self.accept = AsyncMock()
+        self.send_text = AsyncMock()
+        self.send_bytes = AsyncMock()
+        self.close = AsyncMock()
+        self.frames = list(frames)
+
+    async def receive(self):
+        await asyncio.sleep(0.01)  # Gives the writer time to send replies
+        if not self.frames:
+            raise WebSocketDisconnect()
+        return self.frames.pop(0)
+
+    receive_bytes = receive_text = receive
+
+async def run_route(websocket):
+    manager = ConnectionManager()
+    with patch("app.api.websocket.manager", manager):
+        await websocket_route(websocket, "missing-game")
+
+@pytest.mark.asyncio
+async def test_subprotocol_negotiation():
+    websocket = FakeSocket([wire.SUBPROTOCOL], [wire.pack({"type": "get_state"})])
+    await run_route(websocket)
+    websocket.accept.assert_awaited_once_with(subprotocol=wire.SUBPROTOCOL)
+    sent = [wire.unpack(c.args[0]) for c in websocket.send_bytes.call_args_list]
+    greeting, reply = sent
+    assert greeting["type"] == "batch"
+    assert [m["type"] for m in greeting["messages"]] == ["session", "error"] and not greeting["messages"][0]["resumed"]
+    assert reply == {"type": "error", "message": "Game not found"}
+    assert not websocket.send_text.called
+
+@pytest.mark.asyncio
+async def test_json_stays_the_default():
+    websocket = FakeSocket(["something-else"], ['{"type": "get_state"}'])
+    await run_route(websocket)
+    websocket.accept.assert_awaited_once_with(subprotocol=None)
+    assert [json.loads(c.args[0])["type"] for c in websocket.send_text.call_args_list] == ["batch", "error"]
+    assert not websocket.send_bytes.called
@@ -27,6 +27,12 @@ interface GameState {
     bidder_index: number
   } | null
   passes_in_a_row?: number
+  // Clock of the human to act; deadline in epoch seconds
+  clock?: {
+    player_index: number
+    timeout: number
+    deadline: number
+  } | null
 }
 
 function GameBoard() {
@@ -42,6 +48,7 @@ function GameBoard() {
   const [error, setError] = useState('')
   const wsRef = useRef<GameWebSocket | null>(null)
   const userIdRef = useRef<string>('')
+  const [now, setNow] = useState(() => Date.now() / 1000)
 
   useEffect(() => {
     const token = localStorage.getItem('token')
@@ -76,6 +83,13 @@ function GameBoard() {
     }
   }, [roomId])
 
+  useEffect(() => {
+    if (!gameState?.clock) return
+    setNow(Date.now() / 1000)
+    const timer = setInterval(() => setNow(Date.now() / 1000), 1000)
+    return () => clearInterval(timer)
+  }, [gameState?.clock])
+
   const handleWebSocketMessage = (message: any) => {
     setLoading(false)
 
@@ -112,23 +126,10 @@ function GameBoard() {
           current_bidder: state.current_bidder,
           highest_bid: state.highest_bid || null,
           passes_in_a_row: state.passes_in_a_row || 0,
+          clock: state.clock || null,
         }))
         break
 
-      case 'bid_made':
-      case 'bid_passed':
-      case 'bidding_complete':
-        if (wsRef.current) {
-          wsRef.current.getState()
-        }
-        break
-
-      case 'trick_complete':
-        if (wsRef.current) {
-          wsRef.current.getState()
-        }
-        break
-
       case 'error':
         setError(message.message || t('login.errorOccurred'))
         break
@@ -329,6 +330,11 @@ function GameBoard() {
         {/* Bottom Player - You */}
         <div className={`player-seat player-bottom ${isYourBidTurn || isYourPlayTurn ? 'active' : ''}`}>
           <div className="player-name">You ({playerNames[yourPlayerIndex]})</div>
+          {gameState.clock && gameState.clock.player_index === yourPlayerIndex && (
+            <div className="turn-clock">
+              {t('game.timeLeft', { seconds: Math.max(0, Math.ceil(gameState.clock.deadline - now)) })}
+            </div>
+          )}
         </div>
       </div>
 
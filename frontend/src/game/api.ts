@@ -114,6 +114,15 @@ export async function startGame(roomId: string): Promise<any> {
   return response.json()
 }
 
+export async function startGameWithBots(roomId: string): Promise<any> {
+  const response = await fetch(`${API_BASE_URL}/rooms/${roomId}/start-with-bots`, {
+    method: 'POST',
+    headers: getAuthHeaders(),
+  })
+  if (!response.ok) throw new Error('Failed to start game')
+  return response.json()
+}
+
 export async function getRoom(roomId: string): Promise<any> {
   const response = await fetch(`${API_BASE_URL}/rooms/${roomId}`, {
     headers: getAuthHeaders(),
@@ -123,3 +132,48 @@ export async function getRoom(roomId: string): Promise<any> {
 }
 
 
+
+export async function getRecentAnalyses(limit: number = 10): Promise<any[]> {
+  const response = await fetch(`${API_BASE_URL}/analysis/recent?limit=${limit}`, {
+    headers: getAuthHeaders(),
+  })
+  if (!response.ok) throw new Error('Failed to get game analysis')
+  return response.json()
+}
+
+export async function analyzeDeal(hands: { suit: string; rank: string }[][]): Promise<any> {
+  let response = await fetch(`${API_BASE_URL}/deals/analyze`, {
+    method: 'POST',
+    headers: getAuthHeaders(),
+    body: JSON.stringify({ hands }),
+  })
+  // Long analyses come back as a job to poll
+  while (response.status === 202) {
+    const { jobId } = await response.json()
+    await new Promise((resolve) => setTimeout(resolve, 2000))
+    response = await fetch(`${API_BASE_URL}/deals/analyze/${jobId}`, {
+      headers: getAuthHeaders(),
+    })
+  }
+  if (!response.ok) throw new Error('Failed to analyze deal')
+  return response.json()
+}
+
+export async function getRandomPuzzle(difficulty?: number): Promise<any> {
+  const query = difficulty ? `?difficulty=${difficulty}` : ''
+  const response = await fetch(`${API_BASE_URL}/puzzles/random${query}`, {
+    headers: getAuthHeaders(),
+  })
+  if (!response.ok) throw new Error('Failed to get puzzle')
+  return response.json()
+}
+
+export async function solvePuzzle(puzzleId: number, card: { suit: string; rank: string }): Promise<any> {
+  const response = await fetch(`${API_BASE_URL}/puzzles/${puzzleId}/solve`, {
+    method: 'POST',
+    headers: getAuthHeaders(),
+    body: JSON.stringify({ card }),
+  })
+  if (!response.ok) throw new Error('Failed to check puzzle')
+  return response.json()
+}
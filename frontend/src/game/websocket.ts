@@ -1,41 +1,60 @@
 // WebSocket client for real-time game communication
+import { SUBPROTOCOL, pack, unpack } from './wire'
+
+const MAX_RECONNECT_ATTEMPTS = 8
 
 export class GameWebSocket {
   private ws: WebSocket | null = null
   private gameId: string
   private onMessageCallback?: (message: any) => void
+  // Latest full state and its version; deltas are applied to it
+  private state: any = null
+  private version = 0
+  private resyncing = false
+  // Ask for the compact binary protocol (the server falls back to JSON)
+  private binary: boolean
+  // Resuming after a dropped connection: token from the server and the last event seq seen
+  private resumeToken: string | null = null
+  private lastSeq = 0
+  private reconnectAttempts = 0
+  private closedByClient = false
 
-  constructor(gameId: string, userId: string) {
+  constructor(gameId: string, userId: string, binary = false) {
     this.gameId = gameId
+    this.binary = binary
     // userId stored for potential future use
     void userId
   }
 
   connect(onMessage: (message: any) => void) {
     this.onMessageCallback = onMessage
-    
+    this.closedByClient = false
+    this.open()
+  }
+
+  private open() {
     const backendHttpUrl = import.meta.env.VITE_BACKEND_HTTP_URL as string | undefined
     const baseHttpUrl = backendHttpUrl ?? window.location.origin
     const protocol = baseHttpUrl.startsWith('https:') ? 'wss:' : 'ws:'
     const hostAndPort = baseHttpUrl.replace(/^https?:/, '') // -> //host[:port]
     const token = localStorage.getItem('token')
-    const wsUrl = `${protocol}${hostAndPort}/ws/${this.gameId}?token=${encodeURIComponent(token || '')}`
+    let wsUrl = `${protocol}${hostAndPort}/ws/${this.gameId}?token=${encodeURIComponent(token || '')}`
+    if (this.resumeToken) {
+      // The server replays only the events we missed (or sends a snapshot)
+      wsUrl += `&resume=${encodeURIComponent(this.resumeToken)}&seq=${this.lastSeq}`
+    }
     
-    this.ws = new WebSocket(wsUrl)
+    this.ws = this.binary ? new WebSocket(wsUrl, [SUBPROTOCOL]) : new WebSocket(wsUrl)
+    this.ws.binaryType = 'arraybuffer'
     
     this.ws.onopen = () => {
-      console.log('WebSocket connected, requesting initial game state')
-      // Request initial game state after a small delay to ensure backend is ready
-      setTimeout(() => {
-        this.send({ type: 'get_state' })
-      }, 100)
+      // The server sends a full game state (or the missed events) as soon as we are connected
+      console.log('WebSocket connected')
+      this.reconnectAttempts = 0
     }
     
     this.ws.onmessage = (event) => {
-      const message = JSON.parse(event.data)
-      if (this.onMessageCallback) {
-        this.onMessageCallback(message)
-      }
+      this.handleMessage(typeof event.data === 'string' ? JSON.parse(event.data) : unpack(event.data))
     }
     
     this.ws.onerror = (error) => {
@@ -44,12 +63,93 @@ export class GameWebSocket {
     
     this.ws.onclose = () => {
       console.log('WebSocket disconnected')
+      if (!this.closedByClient && this.reconnectAttempts < MAX_RECONNECT_ATTEMPTS) {
+        const delay = Math.min(500 * 2 ** this.reconnectAttempts, 8000)
+        this.reconnectAttempts += 1
+        setTimeout(() => {
+          if (!this.closedByClient) this.open()
+        }, delay)
+      }
+    }
+  }
+
+  // Snapshots replace the state; versioned events are deltas applied to it,
+  // after which the app gets a synthesized game_state as before
+  private handleMessage(message: any) {
+    if (message.type === 'batch') {
+      // Everything one action caused, in order
+      message.messages.forEach((inner: any) => this.handleMessage(inner))
+      return
+    }
+    
+    if (message.type === 'session') {
+      this.resumeToken = message.resume_token
+      if (!message.resumed) this.lastSeq = message.seq
+      return
+    }
+    
+    if (message.type === 'game_state') {
+      this.state = message.state
+      this.version = message.state.version ?? 0
+      this.lastSeq = message.state.seq ?? this.lastSeq
+      this.resyncing = false
+      this.emit(message)
+      return
+    }
+    
+    if (message.seq !== undefined) {
+      // Already seen (replayed around a reconnect)
+      if (message.seq <= this.lastSeq) return
+      this.lastSeq = message.seq
+    }
+    
+    if (message.version !== undefined) {
+      if (this.state && message.version === this.version + 1) {
+        this.applyDelta(message)
+        this.emit(message)
+        this.emit({ type: 'game_state', state: { ...this.state } })
+        return
+      }
+      this.emit(message)
+      if (message.version > this.version && !this.resyncing) {
+        // Missed an update: ask for a fresh snapshot
+        this.resyncing = true
+        this.getState()
+      }
+      return
+    }
+    
+    this.emit(message)
+  }
+  
+  private applyDelta(message: any) {
+    const state = { ...this.state, ...message.changes }
+    if (message.type === 'card_played') {
+      if (message.player_index === state.your_player_index) {
+        state.your_hand = state.your_hand.filter(
+          (c: any) => c.suit !== message.card.suit || c.rank !== message.card.rank
+        )
+      } else {
+        state.other_hands = state.other_hands.map((count: number | null, i: number) =>
+          i === message.player_index && count !== null ? count - 1 : count
+        )
+      }
+    }
+    state.version = message.version
+    state.seq = message.seq
+    this.state = state
+    this.version = message.version
+  }
+  
+  private emit(message: any) {
+    if (this.onMessageCallback) {
+      this.onMessageCallback(message)
     }
   }
 
   send(message: any) {
     if (this.ws && this.ws.readyState === WebSocket.OPEN) {
-      this.ws.send(JSON.stringify(message))
+      this.ws.send(this.ws.protocol === SUBPROTOCOL ? pack(message) : JSON.stringify(message))
     }
   }
 
@@ -75,6 +175,12 @@ export class GameWebSocket {
     })
   }
 
+  requestBiddingAdvice() {
+    this.send({
+      type: 'bidding_advice'
+    })
+  }
+
   getState() {
     this.send({
       type: 'get_state'
@@ -82,6 +188,7 @@ export class GameWebSocket {
   }
 
   disconnect() {
+    this.closedByClient = true
     if (this.ws) {
       this.ws.close()
       this.ws = null
@@ -0,0 +1,162 @@
+// Binary wire protocol (MessagePack, cards as single-byte extension values)
+// Mirrors backend/app/api/wire.py; used when GameWebSocket is created with binary = true
+
+export const SUBPROTOCOL = 'schafkopf.msgpack.v1'
+
+const CARD_EXT = 1
+const SUITS = ['Eichel', 'Gras', 'Herz', 'Schellen']
+const RANKS = ['Ace', 'King', 'Ober', 'Unter', 'Ten', 'Nine', 'Eight', 'Seven']
+const VALUES: Record<string, number> = {
+  Ace: 11, Ten: 10, King: 4, Ober: 3, Unter: 2, Nine: 0, Eight: 0, Seven: 0,
+}
+
+// Card index = suit * 8 + rank, the order the backend deck is built in
+function cardCode(card: any): number | null {
+  const suit = SUITS.indexOf(card.suit)
+  const rank = RANKS.indexOf(card.rank)
+  if (suit < 0 || rank < 0 || card.value !== VALUES[card.rank]) return null
+  return suit * 8 + rank
+}
+
+function isCard(value: any): boolean {
+  const keys = Object.keys(value)
+  return keys.length === 3 && 'suit' in value && 'rank' in value && 'value' in value
+}
+
+const textEncoder = new TextEncoder()
+const textDecoder = new TextDecoder()
+
+export function pack(value: any): Uint8Array {
+  const out: number[] = []
+  const push16 = (n: number) => out.push((n >> 8) & 0xff, n & 0xff)
+  const push32 = (n: number) => out.push((n >>> 24) & 0xff, (n >> 16) & 0xff, (n >> 8) & 0xff, n & 0xff)
+
+  const write = (v: any) => {
+    if (v === null || v === undefined) {
+      out.push(0xc0)
+    } else if (typeof v === 'boolean') {
+      out.push(v ? 0xc3 : 0xc2)
+    } else if (typeof v === 'number') {
+      if (Number.isInteger(v) && v >= 0 && v < 0x80) out.push(v)
+      else if (Number.isInteger(v) && v < 0 && v >= -32) out.push(v & 0xff)
+      else if (Number.isInteger(v) && v >= 0 && v < 0x100000000) {
+        out.push(0xce)
+        push32(v)
+      } else if (Number.isInteger(v) && v < 0 && v >= -0x80000000) {
+        out.push(0xd2)
+        push32(v)
+      } else {
+        const view = new DataView(new ArrayBuffer(8))
+        view.setFloat64(0, v)
+        out.push(0xcb, ...new Uint8Array(view.buffer))
+      }
+    } else if (typeof v === 'string') {
+      const bytes = textEncoder.encode(v)
+      if (bytes.length < 32) out.push(0xa0 | bytes.length)
+      else if (bytes.length < 0x100) out.push(0xd9, bytes.length)
+      else if (bytes.length < 0x10000) {
+        out.push(0xda)
+        push16(bytes.length)
+      } else {
+        out.push(0xdb)
+        push32(bytes.length)
+      }
+      out.push(...bytes)
+    } else if (Array.isArray(v)) {
+      if (v.length < 16) out.push(0x90 | v.length)
+      else {
+        out.push(0xdc)
+        push16(v.length)
+      }
+      v.forEach(write)
+    } else if (typeof v === 'object') {
+      const code = isCard(v) ? cardCode(v) : null
+      if (code !== null) {
+        out.push(0xd4, CARD_EXT, code)
+        return
+      }
+      const entries = Object.entries(v).filter(([, item]) => item !== undefined)
+      if (entries.length < 16) out.push(0x80 | entries.length)
+      else {
+        out.push(0xde)
+        push16(entries.length)
+      }
+      entries.forEach(([key, item]) => {
+        write(key)
+        write(item)
+      })
+    } else {
+      throw new Error(`Cannot encode ${typeof v}`)
+    }
+  }
+
+  write(value)
+  return new Uint8Array(out)
+}
+
+export function unpack(buffer: ArrayBuffer): any {
+  const bytes = new Uint8Array(buffer)
+  const view = new DataView(buffer)
+  let pos = 0
+
+  const str = (length: number) => {
+    const value = textDecoder.decode(bytes.subarray(pos, pos + length))
+    pos += length
+    return value
+  }
+  const array = (length: number) => {
+    const result = []
+    for (let i = 0; i < length; i++) result.push(read())
+    return result
+  }
+  const map = (length: number) => {
+    const result: Record<string, any> = {}
+    for (let i = 0; i < length; i++) {
+      const key = read()
+      result[key] = read()
+    }
+    return result
+  }
+
+  const read = (): any => {
+    const byte = bytes[pos++]
+    if (byte < 0x80) return byte
+    if (byte >= 0xe0) return byte - 0x100
+    if (byte >= 0xa0 && byte <= 0xbf) return str(byte & 0x1f)
+    if (byte >= 0x90 && byte <= 0x9f) return array(byte & 0x0f)
+    if (byte >= 0x80 && byte <= 0x8f) return map(byte & 0x0f)
+    let value: any
+    switch (byte) {
+      case 0xc0: return null
+      case 0xc2: return false
+      case 0xc3: return true
+      case 0xd4: {
+        const ext = bytes[pos++]
+        const code = bytes[pos++]
+        if (ext !== CARD_EXT) throw new Error(`Unknown extension type ${ext}`)
+        const rank = RANKS[code % 8]
+        return { suit: SUITS[Math.floor(code / 8)], rank, value: VALUES[rank] }
+      }
+      case 0xcc: value = view.getUint8(pos); pos += 1; return value
+      case 0xcd: value = view.getUint16(pos); pos += 2; return value
+      case 0xce: value = view.getUint32(pos); pos += 4; return value
+      case 0xcf: value = Number(view.getBigUint64(pos)); pos += 8; return value
+      case 0xd0: value = view.getInt8(pos); pos += 1; return value
+      case 0xd1: value = view.getInt16(pos); pos += 2; return value
+      case 0xd2: value = view.getInt32(pos); pos += 4; return value
+      case 0xd3: value = Number(view.getBigInt64(pos)); pos += 8; return value
+      case 0xca: value = view.getFloat32(pos); pos += 4; return value
+      case 0xcb: value = view.getFloat64(pos); pos += 8; return value
+      case 0xd9: value = bytes[pos]; pos += 1; return str(value)
+      case 0xda: value = view.getUint16(pos); pos += 2; return str(value)
+      case 0xdb: value = view.getUint32(pos); pos += 4; return str(value)
+      case 0xdc: value = view.getUint16(pos); pos += 2; return array(value)
+      case 0xdd: value = view.getUint32(pos); pos += 4; return array(value)
+      case 0xde: value = view.getUint16(pos); pos += 2; return map(value)
+      case 0xdf: value = view.getUint32(pos); pos += 4; return map(value)
+    }
+    throw new Error(`Unsupported type byte ${byte}`)
+  }
+
+  return read()
+}